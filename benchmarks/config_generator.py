@@ -0,0 +1,143 @@
+"""Generator of synthetic evergreen-shaped evaluated project configurations."""
+import copy
+import random
+from typing import Any, Dict, List
+
+COMMAND_TYPES = ("shell.exec", "subprocess.exec", "s3.put", "s3.get", "expansions.update")
+
+
+def _make_command(rng: random.Random, index: int) -> Dict[str, Any]:
+    """
+    Make a command definition.
+
+    :param rng: Random numbers generator.
+    :param index: Index of the command used to make its content unique.
+    :return: Command definition.
+    """
+    command_type = rng.choice(COMMAND_TYPES)
+    return {
+        "command": command_type,
+        "params": {
+            "working_dir": "src",
+            "script": (
+                f"set -o errexit\n"
+                f"${{python}} buildscripts/step_{index}.py --arg ${{arg_{index % 50}}}\n"
+            ),
+            "env": {"PYTHONPATH": "${workdir}/src", "INDEX": str(index)},
+        },
+    }
+
+
+def generate_evg_config(
+    num_functions: int,
+    num_tasks: int,
+    num_task_groups: int,
+    num_variants: int,
+    tasks_per_variant: int,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Generate evaluated evergreen project configuration.
+
+    :param num_functions: Number of functions.
+    :param num_tasks: Number of tasks.
+    :param num_task_groups: Number of task groups.
+    :param num_variants: Number of build variants.
+    :param tasks_per_variant: Number of tasks and task groups in every build variant.
+    :param seed: Seed of random numbers generator.
+    :return: Evaluated evergreen project configuration.
+    """
+    rng = random.Random(seed)
+    func_names = [f"func_{i}" for i in range(num_functions)]
+    functions = {
+        func_name: [_make_command(rng, i * 3 + j) for j in range(rng.randint(1, 3))]
+        for i, func_name in enumerate(func_names)
+    }
+
+    tasks: List[Dict[str, Any]] = []
+    for i in range(num_tasks):
+        commands: List[Dict[str, Any]] = [
+            {"func": rng.choice(func_names), "vars": {"suite": f"suite_{i}"}}
+            for _ in range(rng.randint(1, 4))
+        ]
+        commands.append(_make_command(rng, i))
+        tasks.append(
+            {
+                "name": f"task_{i}",
+                "tags": [f"tag_{i % 10}", "default"],
+                "depends_on": [{"name": "compile"}] if i % 3 else [],
+                "commands": commands,
+            }
+        )
+
+    task_groups = []
+    tasks_per_group = max(1, num_tasks // max(1, num_task_groups) // 4)
+    for i in range(num_task_groups):
+        first_task = (i * tasks_per_group) % max(1, num_tasks)
+        task_groups.append(
+            {
+                "name": f"task_group_{i}",
+                "max_hosts": 1,
+                "setup_group": [{"func": rng.choice(func_names)}],
+                "teardown_group": [{"func": rng.choice(func_names)}],
+                "setup_task": [{"func": rng.choice(func_names)}],
+                "teardown_task": [{"func": rng.choice(func_names)}],
+                "tasks": [
+                    f"task_{j % num_tasks}" for j in range(first_task, first_task + tasks_per_group)
+                ],
+            }
+        )
+
+    task_and_group_names = [task["name"] for task in tasks] + [
+        task_group["name"] for task_group in task_groups
+    ]
+    variants = []
+    for i in range(num_variants):
+        variant_tasks = rng.sample(
+            task_and_group_names, min(tasks_per_variant, len(task_and_group_names))
+        )
+        variants.append(
+            {
+                "name": f"variant_{i}",
+                "display_name": f"Variant {i}",
+                "run_on": [f"distro_{i % 12}"],
+                "expansions": {f"arg_{j}": f"value_{(i + j) % 7}" for j in range(50)},
+                "tasks": [{"name": task_name} for task_name in sorted(variant_tasks)],
+            }
+        )
+
+    return {
+        "functions": functions,
+        "pre": [{"func": func_names[0]}] if func_names else [],
+        "post": [{"func": func_names[-1]}] if func_names else [],
+        "tasks": tasks,
+        "task_groups": task_groups,
+        "buildvariants": variants,
+    }
+
+
+def mutate_evg_config(
+    evg_config: Dict[str, Any], num_changes: int = 1, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Make a patched copy of a generated configuration.
+
+    The given number of functions, tasks and build variants is changed in the copy.
+
+    :param evg_config: Configuration made by `generate_evg_config`.
+    :param num_changes: Number of changed entities of every kind.
+    :param seed: Seed of random numbers generator.
+    :return: Patched configuration.
+    """
+    rng = random.Random(seed)
+    patched = copy.deepcopy(evg_config)
+    func_names = sorted(patched["functions"])
+    for func_name in rng.sample(func_names, min(num_changes, len(func_names))):
+        patched["functions"][func_name][0]["params"]["script"] += "echo patched\n"
+    for task in rng.sample(patched["tasks"], min(num_changes, len(patched["tasks"]))):
+        task["tags"].append("patched")
+    for variant in rng.sample(
+        patched["buildvariants"], min(num_changes, len(patched["buildvariants"]))
+    ):
+        variant["expansions"]["patched"] = "true"
+    return patched
@@ -0,0 +1,91 @@
+"""
+Check parity of the native evaluator with recorded `evergreen evaluate` outputs.
+
+Record the output in the project repository and compare it with the native evaluation:
+    evergreen evaluate --path etc/evergreen.yml > /tmp/evaluated.yml
+    python -m benchmarks.evaluator_parity --recorded /tmp/evaluated.yml etc/evergreen.yml
+
+Every recorded output can be checked at once by passing several pairs of recorded outputs and
+project configurations. The exit code is non-zero if any entity differs.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.utils.config_hasher import ConfigHasher
+from evg_config_changes_verifier.utils.yaml_utils import load_yaml
+
+NAMED_LIST_SECTIONS = ("tasks", "task_groups", "buildvariants")
+
+
+def _by_name(section: Any) -> Dict[str, Any]:
+    """
+    Index a section of configuration by entity names.
+
+    :param section: Section of configuration.
+    :return: Map of entity names to entities, the whole section under empty name otherwise.
+    """
+    if isinstance(section, dict):
+        return section
+    if isinstance(section, list) and all(isinstance(e, dict) and "name" in e for e in section):
+        return {entity["name"]: entity for entity in section}
+    return {"": section}
+
+
+def compare(recorded: Dict[str, Any], evaluated: Dict[str, Any]) -> List[str]:
+    """
+    Compare recorded and natively evaluated configurations.
+
+    :param recorded: Recorded `evergreen evaluate` output.
+    :param evaluated: Natively evaluated configuration.
+    :return: Descriptions of differences.
+    """
+    hasher = ConfigHasher()
+    differences = []
+    for key in sorted(set(recorded) | set(evaluated)):
+        if key not in evaluated or key not in recorded:
+            differences.append(
+                f"{key}: present only in {'recorded' if key in recorded else 'native'}"
+            )
+            continue
+        recorded_entities = _by_name(recorded[key])
+        evaluated_entities = _by_name(evaluated[key])
+        for name in sorted(set(recorded_entities) | set(evaluated_entities)):
+            if name not in recorded_entities or name not in evaluated_entities:
+                differences.append(f"{key}/{name}: missing in one of the configurations")
+            elif hasher.digest(recorded_entities[name]) != hasher.digest(evaluated_entities[name]):
+                differences.append(f"{key}/{name}: differs")
+    return differences
+
+
+def main() -> None:
+    """Run the parity check."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--recorded", type=Path, action="append", required=True)
+    parser.add_argument("evg_project_config", type=Path, nargs="+")
+    args = parser.parse_args()
+    if len(args.recorded) != len(args.evg_project_config):
+        parser.error("Every project configuration needs a recorded output.")
+
+    evaluator = NativeEvgEvaluator.create()
+    failed = False
+    for recorded_path, evg_project_config in zip(args.recorded, args.evg_project_config):
+        start = time.perf_counter()
+        evaluated = evaluator.evaluate_config(evg_project_config)
+        elapsed = time.perf_counter() - start
+        differences = compare(load_yaml(recorded_path.read_text()), evaluated)
+        status = "OK" if not differences else f"{len(differences)} differences"
+        print(f"{evg_project_config} vs {recorded_path}: {status} ({elapsed:.2f}s)")
+        for difference in differences:
+            print(f"  {difference}")
+        failed = failed or bool(differences)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
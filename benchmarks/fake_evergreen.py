@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `evergreen evaluate` that serves pre-built evaluated configurations.
+
+A project configuration file refers to its evaluated configuration with a first line like:
+    # evaluated: /path/to/evaluated.yml
+
+The evaluated configuration is written to stdout as is, so evaluation costs only reading the
+file and the verifier can be benchmarked without Evergreen CLI. To use it instead of the real
+CLI put an `evergreen` executable that runs this script on PATH.
+"""
+import shutil
+import sys
+from pathlib import Path
+
+EVALUATED_MARKER = "# evaluated: "
+
+
+def main() -> None:
+    """Serve evaluated configuration of the project configuration given with `--path`."""
+    args = sys.argv[1:]
+    if not args or args[0] != "evaluate" or "--path" not in args:
+        sys.exit("usage: fake_evergreen.py evaluate --path <project config>")
+
+    project_config = Path(args[args.index("--path") + 1])
+    with project_config.open() as config_file:
+        first_line = config_file.readline()
+    if not first_line.startswith(EVALUATED_MARKER):
+        sys.exit(f"{project_config} does not refer to an evaluated configuration.")
+
+    with open(first_line[len(EVALUATED_MARKER) :].strip(), "rb") as evaluated:
+        shutil.copyfileobj(evaluated, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
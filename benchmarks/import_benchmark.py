@@ -0,0 +1,191 @@
+"""
+Benchmark of the command line interface startup time.
+
+The CLI module is imported in fresh processes with `python -X importtime` and the cumulative
+import time of the module is taken from its report. `verify-evg-config-changes --help` is run in
+fresh processes too. Modules that should be imported only by the commands using them must not be
+imported at startup at all.
+
+Usage:
+    python -m benchmarks.import_benchmark --output startup.json
+    python -m benchmarks.import_benchmark --baseline startup.json --max-import-ms 100
+
+Times are the best of `--repeat` runs. The benchmark exits with a non-zero status if the import
+takes longer than `--max-import-ms` or any of the deferred modules is imported at startup.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import evg_config_changes_verifier
+
+CLI_MODULE = "evg_config_changes_verifier.cli"
+# Heavy dependencies and modules of the verifier the CLI imports only when running a command
+DEFERRED_MODULES = (
+    "inject",
+    "plumbum",
+    "structlog",
+    "yaml",
+    "evg_config_changes_verifier.orchestrator",
+    "evg_config_changes_verifier.update_checks",
+)
+DEFAULT_MAX_IMPORT_MS = 100.0
+# `import time:     self [us] | cumulative | imported package`
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def _get_env() -> Dict[str, str]:
+    """Get environment of the measured processes, importing the same package as this one."""
+    package_root = str(Path(evg_config_changes_verifier.__file__).resolve().parents[1])
+    python_path = [package_root] + [
+        path for path in os.environ.get("PYTHONPATH", "").split(os.pathsep) if path
+    ]
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(python_path)}
+
+
+def parse_import_times(report: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse `-X importtime` report.
+
+    :param report: Standard error of the process run with `-X importtime`.
+    :return: Names of imported modules to their own and cumulative import times in microseconds.
+    """
+    import_times = {}
+    for line in report.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match is not None:
+            import_times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return import_times
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Import the CLI module in a fresh process.
+
+    :param env: Environment of the process.
+    :return: Names of imported modules to their own and cumulative import times in microseconds.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {CLI_MODULE}"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return parse_import_times(process.stderr)
+
+
+def measure_help(env: Dict[str, str]) -> float:
+    """
+    Run `--help` of the CLI in a fresh process.
+
+    :param env: Environment of the process.
+    :return: Wall time of the process in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", CLI_MODULE, "--help"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def run_benchmark(repeat: int, top: int) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    :param repeat: Number of runs to take the best time of.
+    :param top: Number of modules with the longest own import time to report.
+    :return: Benchmark results.
+    """
+    env = _get_env()
+    runs = [measure_import(env) for _ in range(repeat)]
+    best = min(runs, key=lambda import_times: import_times[CLI_MODULE][1])
+    slowest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "python": sys.version.split()[0],
+        "import_ms": best[CLI_MODULE][1] / 1000,
+        "help_seconds": min(measure_help(env) for _ in range(repeat)),
+        "modules": len(best),
+        "deferred_modules_imported": [name for name in DEFERRED_MODULES if name in best],
+        "slowest_modules": {name: self_us / 1000 for name, (self_us, _) in slowest},
+    }
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """
+    Print results, compared with baseline results if given.
+
+    :param results: Benchmark results.
+    :param baseline: Baseline benchmark results to compare with.
+    """
+    comparison = ""
+    if baseline is not None and baseline["import_ms"] > 0:
+        comparison = f" ({results['import_ms'] / baseline['import_ms']:.2f}x baseline)"
+    print(f"Import of {CLI_MODULE}: {results['import_ms']:.1f} ms{comparison}")
+    print(f"`--help`: {results['help_seconds']:.3f} s, {results['modules']} modules imported")
+    print(f"{'module':<60} {'own time, ms':>14}")
+    for name, own_ms in results["slowest_modules"].items():
+        print(f"{name:<60} {own_ms:>14.1f}")
+
+
+def check_results(results: Dict[str, Any], max_import_ms: float) -> List[str]:
+    """
+    Check results against the startup budget.
+
+    :param results: Benchmark results.
+    :param max_import_ms: Maximum import time of the CLI module in milliseconds.
+    :return: Descriptions of exceeded limits.
+    """
+    failures = []
+    if results["import_ms"] > max_import_ms:
+        failures.append(
+            f"Import of {CLI_MODULE} took {results['import_ms']:.1f} ms, more than"
+            f" {max_import_ms:.1f} ms."
+        )
+    for name in results["deferred_modules_imported"]:
+        failures.append(f"{name} is imported at startup, import it in the commands using it.")
+    return failures
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to print.")
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        default=DEFAULT_MAX_IMPORT_MS,
+        help="Fail if importing the CLI module takes longer.",
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON to the file.")
+    parser.add_argument("--baseline", type=Path, help="Compare with results of an earlier run.")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    results = run_benchmark(args.repeat, args.top)
+    print_results(results, baseline)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    failures = check_results(results, args.max_import_ms)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Microbenchmark of parsing evaluated evergreen project configurations.
+
+Usage:
+    python -m benchmarks.parse_benchmark --tasks 5000 --variants 50
+"""
+import argparse
+import time
+from typing import Callable
+
+import yaml
+
+from benchmarks.config_generator import generate_evg_config
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.utils.yaml_utils import load_yaml
+
+
+def _measure(label: str, parse: Callable[[], None], repeat: int) -> float:
+    """
+    Measure the best time of parsing.
+
+    :param label: Label to report the time with.
+    :param parse: Function that parses the documents.
+    :param repeat: Number of repetitions.
+    :return: Best time in seconds.
+    """
+    best = min(_time_once(parse) for _ in range(repeat))
+    print(f"{label:<40} {best:8.3f}s")
+    return best
+
+
+def _time_once(parse: Callable[[], None]) -> float:
+    """
+    Time single call.
+
+    :param parse: Function that parses the documents.
+    :return: Time in seconds.
+    """
+    start = time.perf_counter()
+    parse()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the microbenchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--functions", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--task-groups", type=int, default=50)
+    parser.add_argument("--variants", type=int, default=20)
+    parser.add_argument("--tasks-per-variant", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    evg_config = generate_evg_config(
+        args.functions, args.tasks, args.task_groups, args.variants, args.tasks_per_variant
+    )
+    original = yaml.dump(evg_config, Dumper=yaml.SafeDumper, sort_keys=False)
+    evg_config["tasks"][0]["tags"].append("patched")
+    patched = yaml.dump(evg_config, Dumper=yaml.SafeDumper, sort_keys=False)
+    print(f"Document size: {len(original) / 1024 / 1024:.1f} MiB x 2")
+
+    baseline = _measure(
+        "yaml.safe_load, sequential",
+        lambda: [yaml.safe_load(original), yaml.safe_load(patched)],
+        args.repeat,
+    )
+    c_loader = _measure(
+        "libyaml loader, sequential",
+        lambda: [load_yaml(original), load_yaml(patched)],
+        args.repeat,
+    )
+    compact = _measure(
+        "compact records from YAML events",
+        lambda: [CompactEvgConfig.load(original), CompactEvgConfig.load(patched)],
+        args.repeat,
+    )
+    print(f"Speedup over yaml.safe_load: {baseline / c_loader:.1f}x sequential")
+    print(f"Speedup over yaml.safe_load: {baseline / compact:.1f}x compact records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark of verification phases on synthetic evergreen project configurations.
+
+A temporary git repository with a generated project configuration is created, the configuration
+is patched in the working tree and the changes are verified phase by phase: diff, evaluate,
+parse, index and every update check. Evaluation uses `fake_evergreen.py` that serves pre-built
+evaluated configurations instead of Evergreen CLI.
+
+Usage:
+    python -m benchmarks.phase_benchmark --preset large --output results.json
+    python -m benchmarks.phase_benchmark --preset large --baseline results.json
+
+Time is the best of `--repeat` runs, peak memory is the peak of Python allocations during the
+phase measured with tracemalloc in a separate run.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+import yaml
+from plumbum import local
+from structlog.stdlib import LoggerFactory
+
+from benchmarks.config_generator import generate_evg_config, mutate_evg_config
+from benchmarks.fake_evergreen import EVALUATED_MARKER
+from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.orchestrator import UPDATE_CHECKS_SCHEDULER
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+
+RESULTS_FORMAT_VERSION = 1
+EVG_PROJECT_YAML = Path("etc/evergreen.yml")
+TARGET_BRANCH = "master"
+FAKE_EVERGREEN = Path(__file__).with_name("fake_evergreen.py")
+
+# Numbers of functions, tasks, task groups, build variants and tasks per build variant
+PRESETS = {
+    "small": (200, 1000, 20, 20, 200),
+    "medium": (1000, 5000, 100, 100, 500),
+    "large": (3000, 20000, 400, 500, 1000),
+}
+
+Phase = Tuple[str, Callable[[Dict[str, Any]], None]]
+
+
+def write_project_config(repo_dir: Path, evaluated_path: Path, evg_config: Dict[str, Any]) -> str:
+    """
+    Write evaluated configuration and a project configuration referring to it.
+
+    :param repo_dir: Repository directory.
+    :param evaluated_path: Location to write the evaluated configuration to.
+    :param evg_config: Evaluated configuration.
+    :return: Evaluated configuration YAML document.
+    """
+    document = yaml.dump(evg_config, Dumper=yaml.SafeDumper, sort_keys=False)
+    evaluated_path.write_text(document)
+    project_config = repo_dir / EVG_PROJECT_YAML
+    project_config.parent.mkdir(parents=True, exist_ok=True)
+    project_config.write_text(f"{EVALUATED_MARKER}{evaluated_path}\n{document}")
+    return document
+
+
+def _create_repo(work_dir: Path, evg_config: Dict[str, Any], patched: Dict[str, Any]) -> int:
+    """
+    Create repository with the original configuration committed and the patched one in the tree.
+
+    :param work_dir: Directory to create the repository in.
+    :param evg_config: Original evaluated configuration.
+    :param patched: Patched evaluated configuration.
+    :return: Size of the evaluated configuration in bytes.
+    """
+    repo_dir = work_dir / "repo"
+    repo_dir.mkdir()
+    git = local.cmd.git["-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost"]
+    git["init", "--quiet", "--initial-branch", TARGET_BRANCH, repo_dir]()
+    document = write_project_config(repo_dir, work_dir / "original.yml", evg_config)
+    git["-C", repo_dir, "add", "."]()
+    git["-C", repo_dir, "commit", "--quiet", "-m", "Original configuration"]()
+    write_project_config(repo_dir, work_dir / "patched.yml", patched)
+    return len(document)
+
+
+def _make_phases(evg_config_service: EvgConfigService) -> List[Phase]:
+    """
+    Make verification phases that pass their results to the next phases in a shared state.
+
+    :param evg_config_service: Service for working with evergreen project configurations.
+    :return: Names and functions of the phases.
+    """
+    git_cli_proxy = evg_config_service.git_cli_proxy
+    evg_cli_proxy = evg_config_service.evg_cli_proxy
+
+    def diff(state: Dict[str, Any]) -> None:
+        assert evg_config_service.has_config_changes(EVG_PROJECT_YAML, TARGET_BRANCH)
+        state["merge_base"] = git_cli_proxy.merge_base(TARGET_BRANCH)
+        git_cli_proxy.diff(
+            no_pager=True, target_branch=state["merge_base"], output_file=state["patch_file"]
+        )
+
+    def evaluate(state: Dict[str, Any]) -> None:
+        git_cli_proxy.apply(patch_file=state["patch_file"], reverse=True)
+        try:
+            state["original_document"] = evg_cli_proxy.evaluate(EVG_PROJECT_YAML)
+        finally:
+            git_cli_proxy.apply(patch_file=state["patch_file"])
+        state["patched_document"] = evg_cli_proxy.evaluate(EVG_PROJECT_YAML)
+
+    def parse(state: Dict[str, Any]) -> None:
+        state["original_config"] = CompactEvgConfig.load(state["original_document"])
+        state["patched_config"] = CompactEvgConfig.load(state["patched_document"])
+
+    def index(state: Dict[str, Any]) -> None:
+        state["evg_config_states"] = EvgConfigStates.create(
+            state["original_config"], state["patched_config"]
+        )
+        state["check_results"] = {}
+
+    def make_check_phase(update_check: Any) -> Phase:
+        def check(state: Dict[str, Any]) -> None:
+            results = state["check_results"]
+            results[update_check.name] = UPDATE_CHECKS_SCHEDULER.run_check(
+                update_check, state["evg_config_states"], results
+            )
+
+        return f"check:{update_check.name}", check
+
+    def merge(state: Dict[str, Any]) -> None:
+        state["evg_config_changes"] = UPDATE_CHECKS_SCHEDULER.merge(state["check_results"])
+
+    return [
+        ("diff", diff),
+        ("evaluate", evaluate),
+        ("parse", parse),
+        ("index", index),
+        *(
+            make_check_phase(update_check)
+            for update_check in UPDATE_CHECKS_SCHEDULER.ordered_checks
+        ),
+        ("merge", merge),
+    ]
+
+
+def _run_phases(
+    phases: List[Phase], patch_file: Path, trace_memory: bool
+) -> Tuple[Dict[str, float], EvgConfigChanges]:
+    """
+    Run all phases once.
+
+    :param phases: Names and functions of the phases.
+    :param patch_file: Location of the patch file.
+    :param trace_memory: Measure peak memory instead of time.
+    :return: Time in seconds or peak memory in bytes of every phase and the found changes.
+    """
+    state: Dict[str, Any] = {"patch_file": patch_file}
+    measurements = {}
+    for name, phase in phases:
+        if trace_memory:
+            tracemalloc.start()
+            phase(state)
+            measurements[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            phase(state)
+            measurements[name] = time.perf_counter() - start
+    return measurements, state["evg_config_changes"]
+
+
+def run_benchmark(
+    sizes: Tuple[int, int, int, int, int], num_changes: int, repeat: int
+) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    :param sizes: Numbers of functions, tasks, task groups, variants and tasks per variant.
+    :param num_changes: Number of changed entities of every kind.
+    :param repeat: Number of timed runs.
+    :return: JSON serializable results.
+    """
+    evg_config = generate_evg_config(*sizes)
+    patched = mutate_evg_config(evg_config, num_changes)
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="evg-config-benchmark-") as tmp_dir:
+        work_dir = Path(tmp_dir)
+        config_size = _create_repo(work_dir, evg_config, patched)
+        del evg_config, patched
+
+        git_cli_proxy = GitCliProxy.create()
+        evg_config_service = EvgConfigService(
+            git_cli_proxy,
+            EvgCliProxy(local[sys.executable][FAKE_EVERGREEN]),
+            EvgIncludeService(git_cli_proxy),
+            EvgConfigCache.create(enabled=False),
+        )
+        phases = _make_phases(evg_config_service)
+        patch_file = work_dir / "changes.patch"
+        os.chdir(work_dir / "repo")
+        try:
+            timings = [_run_phases(phases, patch_file, trace_memory=False) for _ in range(repeat)]
+            peak_memory, evg_config_changes = _run_phases(phases, patch_file, trace_memory=True)
+        finally:
+            os.chdir(cwd)
+
+    functions, tasks, task_groups, variants, tasks_per_variant = sizes
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "functions": functions,
+            "tasks": tasks,
+            "task_groups": task_groups,
+            "variants": variants,
+            "tasks_per_variant": tasks_per_variant,
+            "changes": num_changes,
+            "repeat": repeat,
+        },
+        "evaluated_config_bytes": config_size,
+        "changes": evg_config_changes.as_dict(),
+        "phases": {
+            name: {
+                "seconds": min(timing[name] for timing, _ in timings),
+                "peak_memory_bytes": peak_memory[name],
+            }
+            for name, _ in phases
+        },
+    }
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """
+    Print results table, compared with baseline results if given.
+
+    :param results: Benchmark results.
+    :param baseline: Baseline benchmark results to compare with.
+    """
+    print(f"Evaluated configuration size: {results['evaluated_config_bytes'] / 2 ** 20:.1f} MiB")
+    print(f"{'phase':<28} {'time, s':>10} {'peak, MiB':>10} {'time vs baseline':>18}")
+    baseline_phases = baseline["phases"] if baseline is not None else {}
+    for name, phase in results["phases"].items():
+        comparison = ""
+        if name in baseline_phases and baseline_phases[name]["seconds"] > 0:
+            comparison = f"{phase['seconds'] / baseline_phases[name]['seconds']:.2f}x"
+        peak_mib = phase["peak_memory_bytes"] / 2**20
+        print(f"{name:<28} {phase['seconds']:>10.3f} {peak_mib:>10.1f} {comparison:>18}")
+    total = sum(phase["seconds"] for phase in results["phases"].values())
+    print(f"{'total':<28} {total:>10.3f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--functions", type=int)
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--task-groups", type=int)
+    parser.add_argument("--variants", type=int)
+    parser.add_argument("--tasks-per-variant", type=int)
+    parser.add_argument("--changes", type=int, default=5, help="Changed entities of every kind.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to the file.")
+    parser.add_argument("--baseline", type=Path, help="Compare with results of an earlier run.")
+    args = parser.parse_args()
+
+    overrides = (
+        args.functions,
+        args.tasks,
+        args.task_groups,
+        args.variants,
+        args.tasks_per_variant,
+    )
+    sizes = tuple(
+        default if override is None else override
+        for default, override in zip(PRESETS[args.preset], overrides)
+    )
+    baseline = json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    # Logging the found changes of large configurations would dominate the checks time
+    structlog.configure(logger_factory=LoggerFactory())
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run_benchmark(sizes, args.changes, args.repeat)
+    print_results(results, baseline)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
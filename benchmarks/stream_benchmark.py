@@ -0,0 +1,121 @@
+"""
+Benchmark of parsing `evergreen evaluate` output from a stream versus a buffered string.
+
+Original and patched configurations are evaluated with `fake_evergreen.py` and parsed in both
+modes. Every mode runs in a fresh process, so that its peak resident set size is measured alone.
+
+Usage:
+    python -m benchmarks.stream_benchmark --preset large --output stream.json
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from plumbum import local
+
+from benchmarks.config_generator import generate_evg_config, mutate_evg_config
+from benchmarks.phase_benchmark import (
+    EVG_PROJECT_YAML,
+    FAKE_EVERGREEN,
+    PRESETS,
+    write_project_config,
+)
+from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.utils.yaml_utils import load_yaml
+
+MODES = ("buffered", "streamed")
+
+
+def _evaluate_buffered(evg_cli_proxy: EvgCliProxy, cwds: List[Path]) -> List[CompactEvgConfig]:
+    """
+    Evaluate configurations into strings concurrently and parse them afterwards.
+
+    :param evg_cli_proxy: Proxy for interacting with Evergreen CLI.
+    :param cwds: Directories to run evaluations in.
+    :return: Evaluated configurations.
+    """
+    with ThreadPoolExecutor(max_workers=len(cwds)) as executor:
+        evaluated = list(
+            executor.map(lambda cwd: evg_cli_proxy.evaluate(EVG_PROJECT_YAML, cwd=cwd), cwds)
+        )
+    return [CompactEvgConfig.from_dict(load_yaml(document)) for document in evaluated]
+
+
+def run_mode(mode: str, cwds: List[Path]) -> Dict[str, Any]:
+    """
+    Evaluate and parse configurations in one of the modes.
+
+    :param mode: "buffered" or "streamed".
+    :param cwds: Directories to run evaluations in.
+    :return: Time in seconds and peak resident set size in bytes.
+    """
+    evg_cli_proxy = EvgCliProxy(local[sys.executable][FAKE_EVERGREEN])
+    start = time.perf_counter()
+    if mode == "buffered":
+        configs = _evaluate_buffered(evg_cli_proxy, cwds)
+    else:
+        configs = evg_cli_proxy.evaluate_configs([(EVG_PROJECT_YAML, cwd) for cwd in cwds])
+    elapsed = time.perf_counter() - start
+    assert all(config.tasks for config in configs)
+    return {
+        "seconds": elapsed,
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to the file.")
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--cwd", type=Path, action="append", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode is not None:
+        print(json.dumps(run_mode(args.run_mode, args.cwd)))
+        return
+
+    evg_config = generate_evg_config(*PRESETS[args.preset])
+    patched = mutate_evg_config(evg_config)
+    with tempfile.TemporaryDirectory(prefix="evg-config-benchmark-") as tmp_dir:
+        work_dir = Path(tmp_dir)
+        cwds = []
+        for name, config in (("original", evg_config), ("patched", patched)):
+            (work_dir / name).mkdir()
+            document = write_project_config(work_dir / name, work_dir / f"{name}.yml", config)
+            cwds.append(work_dir / name)
+        del evg_config, patched
+
+        results: Dict[str, Any] = {"preset": args.preset, "evaluated_config_bytes": len(document)}
+        for mode in MODES:
+            command = [sys.executable, "-m", "benchmarks.stream_benchmark", "--run-mode", mode]
+            for cwd in cwds:
+                command.extend(["--cwd", str(cwd)])
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output)
+
+    print(
+        f"Evaluated configuration size: {results['evaluated_config_bytes'] / 2 ** 20:.1f} MiB x 2"
+    )
+    for mode in MODES:
+        print(
+            f"{mode:<10} {results[mode]['seconds']:8.2f}s"
+            f" {results[mode]['max_rss_bytes'] / 2 ** 20:10.1f} MiB peak RSS"
+        )
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Orchestrator for verifying evergreen config changes of many revisions at once."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import inject
+import structlog
+
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.models.evg_models import (
+    EvgConfigChanges,
+    EvgConfigChangesStep,
+    EvgConfigStates,
+)
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+from evg_config_changes_verifier.utils.profiler import PROFILER
+from evg_config_changes_verifier.utils.sharded_diff import get_shard_workers
+
+LOGGER = structlog.get_logger(__name__)
+
+# Evaluated configurations with their indexes, set before forking comparison workers so that
+# the workers inherit them instead of receiving pickled copies for every comparison
+_EVALUATED_STATES: List[Tuple[CompactEvgConfig, EvgConfigIndex]] = []
+
+
+def _get_evaluated_states(original: int, patched: int) -> EvgConfigStates:
+    """
+    Get states of two of the evaluated configurations.
+
+    :param original: Position of the original configuration in evaluated states.
+    :param patched: Position of the patched configuration in evaluated states.
+    :return: Evergreen project configuration states.
+    """
+    original_config, original_index = _EVALUATED_STATES[original]
+    patched_config, patched_index = _EVALUATED_STATES[patched]
+    return EvgConfigStates(
+        original_config=original_config,
+        patched_config=patched_config,
+        original_index=original_index,
+        patched_index=patched_index,
+    )
+
+
+def _get_compared_entries(evg_config: CompactEvgConfig) -> int:
+    """
+    Get number of entries compared in a configuration, i.e. its tasks and build variant tasks.
+
+    :param evg_config: Evaluated configuration.
+    :return: Number of compared entries.
+    """
+    return len(evg_config.tasks) + sum(
+        len(variant.tasks) for variant in evg_config.variants.values()
+    )
+
+
+def _compare_evaluated_states(original: int, patched: int) -> EvgConfigChanges:
+    """
+    Compare two of the evaluated configurations.
+
+    :param original: Position of the original configuration in evaluated states.
+    :param patched: Position of the patched configuration in evaluated states.
+    :return: Evergreen project configuration changes.
+    """
+    return find_evg_config_changes(_get_evaluated_states(original, patched))
+
+
+class BatchVerificationOrchestrator:
+    """Orchestrator for verifying evergreen config changes of many revisions at once."""
+
+    @inject.autoparams()
+    def __init__(
+        self,
+        evg_config_service: EvgConfigService,
+        git_cli_proxy: GitCliProxy,
+        task_selection_service: TaskSelectionService,
+    ) -> None:
+        """
+        Initialize.
+
+        :param evg_config_service: Service for working with evergreen project configurations.
+        :param git_cli_proxy: Proxy for interacting with Git CLI.
+        :param task_selection_service: Service for selecting task runs that verify the changes.
+        """
+        self.evg_config_service = evg_config_service
+        self.git_cli_proxy = git_cli_proxy
+        self.task_selection_service = task_selection_service
+
+    def get_commit_range_changes(
+        self, evg_project_yaml: Path, commit_range: str
+    ) -> List[EvgConfigChangesStep]:
+        """
+        Get evergreen project configuration changes of every commit in the range.
+
+        Every commit is compared with its first parent, so N commits cost N+1 evaluations at most.
+        The root commit has no parent to compare with, it is skipped.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param commit_range: Range of commits, e.g. `<from>..<to>`.
+        :return: Evergreen project configuration changes of every commit, oldest first.
+        """
+        commits = self.git_cli_proxy.rev_list(commit_range)
+        if not commits:
+            return []
+        first_parent = self.git_cli_proxy.resolve_commit(f"{commits[0]}^")
+        if first_parent is None:
+            LOGGER.warning(
+                "Skipped the root commit, it has no parent to compare with.", commit=commits[0]
+            )
+            first_parent, commits = commits[0], commits[1:]
+            if not commits:
+                return []
+        revisions = [first_parent] + commits
+        comparisons = [(i, i + 1) for i in range(len(commits))]
+        return self._get_changes(evg_project_yaml, revisions, comparisons)
+
+    def get_refs_changes(
+        self, evg_project_yaml: Path, refs: List[str], target_branch: str
+    ) -> List[EvgConfigChangesStep]:
+        """
+        Get evergreen project configuration changes of every ref against its merge-base.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param refs: Refs to verify.
+        :param target_branch: The branch that the refs will be merged into.
+        :return: Evergreen project configuration changes of every ref in the same order.
+        """
+        merge_bases = [self.git_cli_proxy.merge_base(target_branch, ref) for ref in refs]
+        revisions = merge_bases + list(refs)
+        comparisons = [(i, len(refs) + i) for i in range(len(refs))]
+        return self._get_changes(evg_project_yaml, revisions, comparisons)
+
+    def _get_changes(
+        self, evg_project_yaml: Path, revisions: List[str], comparisons: List[Tuple[int, int]]
+    ) -> List[EvgConfigChangesStep]:
+        """
+        Evaluate configuration at every revision once and compare pairs of revisions.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param revisions: Revisions to evaluate the configuration at.
+        :param comparisons: Positions of original and patched revisions to compare.
+        :return: Evergreen project configuration changes of every comparison in the same order.
+        """
+        configs = self.evg_config_service.evaluate_revisions(evg_project_yaml, revisions)
+        indexes: Dict[int, EvgConfigIndex] = {}
+        for config in configs:
+            if id(config) not in indexes:
+                indexes[id(config)] = EvgConfigIndex.create(config)
+
+        changes = {}
+        pending = []
+        for original, patched in comparisons:
+            if configs[original] is configs[patched]:
+                # Same include closure content, nothing to compare
+                changes[(original, patched)] = EvgConfigChanges.create_empty()
+            else:
+                pending.append((original, patched))
+
+        _EVALUATED_STATES[:] = [(config, indexes[id(config)]) for config in configs]
+        try:
+            for comparison, evg_config_changes in zip(pending, self._compare(pending)):
+                changes[comparison] = self.task_selection_service.select(
+                    _get_evaluated_states(*comparison), evg_config_changes
+                )
+        finally:
+            _EVALUATED_STATES.clear()
+
+        return [
+            EvgConfigChangesStep(
+                base_revision=revisions[original],
+                head_revision=revisions[patched],
+                changes=changes[(original, patched)],
+            )
+            for original, patched in comparisons
+        ]
+
+    @staticmethod
+    @PROFILER.profiled("check")
+    def _compare(comparisons: List[Tuple[int, int]]) -> List[EvgConfigChanges]:
+        """
+        Compare pairs of evaluated configurations, in forked worker processes if they are large.
+
+        Workers are forked under the same conditions as the ones comparing shards of a single
+        pair, see `get_shard_workers`, counting entries of all the patched configurations.
+
+        :param comparisons: Positions of original and patched configurations to compare.
+        :return: Evergreen project configuration changes in the same order.
+        """
+        size = sum(
+            _get_compared_entries(_EVALUATED_STATES[patched][0]) for _, patched in comparisons
+        )
+        max_workers = min(len(comparisons), get_shard_workers(size))
+        if max_workers < 2:
+            return [_compare_evaluated_states(*comparison) for comparison in comparisons]
+
+        LOGGER.debug("Comparing configurations in worker processes.", workers=max_workers)
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            originals, patched = zip(*comparisons)
+            return list(executor.map(_compare_evaluated_states, originals, patched))
@@ -1,23 +1,85 @@
-import logging
+"""Command line interface of evergreen project configuration changes verifier."""
+# Modules of the verifier and its heavy dependencies, e.g. inject, structlog, plumbum and yaml,
+# are imported by the commands that use them, so that `--help`, usage errors and daemon requests
+# do not pay for importing the orchestrators and every update check
+from __future__ import annotations
+
+import glob
+import json
 import sys
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type, TypeVar
 
 import click
-import inject as inject
-import structlog
-from structlog.stdlib import LoggerFactory
 
-from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
-from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
-from evg_config_changes_verifier.orchestrator import VerificationOrchestrator
+if TYPE_CHECKING:
+    import inject
+
+    from evg_config_changes_verifier.models.evg_models import EvgConfigChanges
+    from evg_config_changes_verifier.services.history_index import HistoryIndex
 
-LOGGER = structlog.get_logger(__name__)
+InstanceT = TypeVar("InstanceT")
 
 EXTERNAL_LOGGERS = [
     "inject",
 ]
 DEFAULT_EVG_PROJECT_CONFIG = "etc/evergreen.yml"
 DEFAULT_TARGET_BRANCH = "origin/master"
+CROSS_PRODUCT_OUTPUT_MODE = "cross-product"
+PER_VARIANT_OUTPUT_MODE = "per-variant"
+
+
+def get_logger() -> Any:
+    """Get logger of the command line interface."""
+    import structlog
+
+    return structlog.get_logger(__name__)
+
+
+def get_default_cache_dir() -> Path:
+    """Get default directory to cache evaluated original configurations in."""
+    from evg_config_changes_verifier.services.evg_config_cache import DEFAULT_CACHE_DIR
+
+    return DEFAULT_CACHE_DIR
+
+
+def get_default_poll_interval() -> float:
+    """Get default interval in seconds of checking configuration files for changes."""
+    from evg_config_changes_verifier.daemon_server import DEFAULT_POLL_INTERVAL_SECS
+
+    return DEFAULT_POLL_INTERVAL_SECS
+
+
+def get_instance(ctx: click.Context, cls: Type[InstanceT]) -> InstanceT:
+    """
+    Get an instance from the dependency injection, configure it on the first use.
+
+    :param ctx: Click context with the dependencies configuration made by `setup_command`.
+    :param cls: Class of the instance.
+    :return: Instance of the class.
+    """
+    import inject
+
+    inject.configure_once(ctx.obj["dependencies"])
+    return inject.instance(cls)
+
+
+def get_daemon_socket(daemon_socket: Optional[Path]) -> Path:
+    """
+    Get location of the daemon socket.
+
+    :param daemon_socket: Location given on the command line, if any.
+    :return: Location of the daemon socket, by default the one of the repository of the current
+        working directory.
+    """
+    if daemon_socket is not None:
+        return daemon_socket
+
+    from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+    from evg_config_changes_verifier.daemon_client import default_socket_path
+
+    return default_socket_path(GitCliProxy.create().show_toplevel())
 
 
 def configure_logging(verbose: bool) -> None:
@@ -26,6 +88,11 @@ def configure_logging(verbose: bool) -> None:
 
     :param verbose: Enable verbose logging.
     """
+    import logging
+
+    import structlog
+    from structlog.stdlib import LoggerFactory
+
     structlog.configure(logger_factory=LoggerFactory())
     level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(
@@ -37,12 +104,208 @@ def configure_logging(verbose: bool) -> None:
         logging.getLogger(log_name).setLevel(logging.WARNING)
 
 
-@click.command(context_settings=dict(max_content_width=100, show_default=True))
+def report_profile(print_summary: bool, trace_file: Optional[TextIO]) -> None:
+    """
+    Report the recorded profile.
+
+    :param print_summary: Print summary table to stderr.
+    :param trace_file: File to write the trace to.
+    """
+    from evg_config_changes_verifier.utils.profiler import PROFILER
+
+    if print_summary:
+        print(PROFILER.format_summary(), file=sys.stderr)
+    if trace_file is not None:
+        PROFILER.write_trace(trace_file)
+
+
+def setup_command(ctx: click.Context) -> None:
+    """
+    Validate options of `main` and configure logging, profiling and dependencies of a command.
+
+    Commands call it when they run rather than `main`, so that `--help` of the subcommands works
+    outside of a repository with the configuration files and does not import the verifier.
+
+    :param ctx: Click context of the running command, its `obj` is made by `main`.
+    """
+    if "dependencies" in ctx.obj:
+        return
+    task_selection = ctx.obj["task_selection"]
+    if task_selection["budget"] is not None and task_selection["task_durations_file"] is None:
+        raise click.UsageError("--budget requires --task-durations.")
+    evg_project_configs = resolve_evg_project_configs(ctx.obj["evg_project_config_patterns"])
+    configure_logging(ctx.obj["verbose"])
+    profile, profile_trace = ctx.obj["profile"], ctx.obj["profile_trace"]
+    if profile or profile_trace is not None:
+        from evg_config_changes_verifier.utils.profiler import PROFILER
+
+        PROFILER.enable()
+        ctx.find_root().call_on_close(lambda: report_profile(profile, profile_trace))
+
+    from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+
+    try:
+        task_selection_service = TaskSelectionService.create(**task_selection)
+    except ValueError as err:
+        raise click.BadParameter(str(err), param_hint="--task-durations")
+
+    native_evaluator = ctx.obj["native_evaluator"]
+    no_cache, cache_dir = ctx.obj["no_cache"], ctx.obj["cache_dir"]
+
+    def dependencies(binder: inject.Binder) -> None:
+        from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+        from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+        from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+        from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+
+        if native_evaluator:
+            binder.bind_to_constructor(EvgCliProxy, NativeEvgEvaluator.create)
+        else:
+            binder.bind_to_constructor(EvgCliProxy, EvgCliProxy.create)
+        binder.bind_to_constructor(GitCliProxy, GitCliProxy.create)
+        binder.bind_to_constructor(
+            EvgConfigCache,
+            lambda: EvgConfigCache.create(enabled=not no_cache, cache_dir=cache_dir),
+        )
+        binder.bind(TaskSelectionService, task_selection_service)
+
+    ctx.obj.update(dependencies=dependencies, evg_project_configs=evg_project_configs)
+
+
+def resolve_evg_project_configs(patterns: Tuple[str, ...]) -> List[Path]:
+    """
+    Resolve locations of evergreen project configurations.
+
+    :param patterns: Locations of configuration files or glob patterns matching them.
+    :return: Locations of the configuration files without duplicates, in the given order.
+    """
+    evg_project_configs: Dict[Path, None] = {}
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise click.BadParameter(
+                    f"No files match '{pattern}'.", param_hint="--evg-project-config"
+                )
+            evg_project_configs.update((Path(match), None) for match in matches)
+        elif not Path(pattern).is_file():
+            raise click.BadParameter(
+                f"File '{pattern}' does not exist.", param_hint="--evg-project-config"
+            )
+        else:
+            evg_project_configs[Path(pattern)] = None
+    return list(evg_project_configs)
+
+
+def print_evg_config_changes(
+    evg_config_changes: EvgConfigChanges,
+    output_mode: str,
+    patch_params_file: Optional[TextIO],
+    evg_project_config: Optional[Path] = None,
+) -> None:
+    """
+    Print evergreen patch command arguments to verify the changes with.
+
+    :param evg_config_changes: Evergreen project configuration changes.
+    :param output_mode: Print arguments of a single patch scheduling the cross product of changed
+        build variants and tasks, or of a patch per group of variants running the same tasks.
+    :param patch_params_file: File to write tasks to run on every build variant to.
+    :param evg_project_config: Location of the configuration to print with the arguments.
+    """
+    logger = get_logger()
+    if evg_project_config is not None:
+        logger = logger.bind(evg_project_config=str(evg_project_config))
+    pair_runs = evg_config_changes.get_pair_runs()
+    logger.info(
+        "Selected task runs.",
+        pairs=pair_runs,
+        cross_product=evg_config_changes.cross_product_runs,
+        saved=evg_config_changes.cross_product_runs - pair_runs,
+        estimated_cost=evg_config_changes.estimated_cost,
+    )
+    if evg_config_changes.represented_variants:
+        logger.info(
+            "Left out build variants equivalent to the representative ones.",
+            represented_by={
+                variant: sorted(representatives)
+                for variant, representatives in sorted(
+                    evg_config_changes.represented_variants.items()
+                )
+            },
+        )
+    if evg_config_changes.skipped_variant_tasks:
+        logger.info(
+            "Left out task runs over the budget.",
+            skipped={
+                variant: sorted(tasks_and_groups)
+                for variant, tasks_and_groups in sorted(
+                    evg_config_changes.skipped_variant_tasks.items()
+                )
+            },
+        )
+    print("---------------------------------------------------------------")
+    if evg_project_config is not None:
+        print(f"Evergreen project configuration: {evg_project_config}")
+    if output_mode == PER_VARIANT_OUTPUT_MODE:
+        print("Arguments to create evergreen patches with to verify the changes, one per line:")
+        for patch_args in evg_config_changes.as_per_variant_evg_patch_cmd_args():
+            print(patch_args)
+    else:
+        print("Arguments to create evergreen patch with to verify the changes:")
+        print(evg_config_changes.as_evg_patch_cmd_args())
+    if patch_params_file is not None:
+        json.dump(evg_config_changes.as_patch_params(), patch_params_file, indent=2)
+        patch_params_file.write("\n")
+
+
+def print_evg_config_changes_by_project(
+    changes_by_project: Dict[Path, EvgConfigChanges],
+    output_mode: str,
+    patch_params_file: Optional[TextIO],
+) -> None:
+    """
+    Print evergreen patch command arguments to verify changes of every configuration with.
+
+    Arguments of many configurations are printed one after another with their locations, the
+    patch parameters file then maps locations of the configurations to their parameters.
+
+    :param changes_by_project: Locations of configurations to their changes.
+    :param output_mode: Print arguments of a single patch scheduling the cross product of changed
+        build variants and tasks, or of a patch per group of variants running the same tasks.
+    :param patch_params_file: File to write tasks to run on every build variant to.
+    """
+    if len(changes_by_project) == 1:
+        (evg_config_changes,) = changes_by_project.values()
+        print_evg_config_changes(evg_config_changes, output_mode, patch_params_file)
+        return
+
+    for evg_project_config, evg_config_changes in changes_by_project.items():
+        print_evg_config_changes(evg_config_changes, output_mode, None, evg_project_config)
+    if patch_params_file is not None:
+        json.dump(
+            {
+                str(evg_project_config): evg_config_changes.as_patch_params()
+                for evg_project_config, evg_config_changes in changes_by_project.items()
+            },
+            patch_params_file,
+            indent=2,
+        )
+        patch_params_file.write("\n")
+
+
+@click.group(
+    context_settings=dict(max_content_width=100, show_default=True),
+    invoke_without_command=True,
+)
 @click.option(
     "--evg-project-config",
-    type=click.Path(exists=True),
-    default=DEFAULT_EVG_PROJECT_CONFIG,
-    help="Evergreen project configuration file.",
+    "evg_project_config_patterns",
+    type=str,
+    multiple=True,
+    default=[DEFAULT_EVG_PROJECT_CONFIG],
+    help="Evergreen project configuration file or glob pattern matching such files, can be given"
+    " multiple times. Configurations are verified against the same original checkout and"
+    " evaluated concurrently.",
 )
 @click.option(
     "--target-branch",
@@ -50,8 +313,135 @@ def configure_logging(verbose: bool) -> None:
     default=DEFAULT_TARGET_BRANCH,
     help="The branch that the current changes will be merged into.",
 )
+@click.option(
+    "--use-worktree",
+    is_flag=True,
+    default=False,
+    help="Evaluate the original configuration in a temporary checkout concurrently with the"
+    " patched one instead of reverse-applying the changes to the local working tree.",
+)
+@click.option(
+    "--baseline-snapshot",
+    type=click.Path(exists=True, path_type=Path),
+    default=None,
+    help="Baseline snapshot file, or directory of snapshot files, written by `snapshot` command to"
+    " load the original configuration from instead of evaluating it. Used only if it was taken"
+    " at the merge-base with the target branch.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=get_default_cache_dir,
+    show_default=False,
+    help="Directory to cache evaluated original configurations in, defaults to"
+    " `evg_config_changes_verifier` in `$XDG_CACHE_HOME` or `~/.cache`.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Do not use cached evaluated original configurations.",
+)
+@click.option(
+    "--native-evaluator",
+    is_flag=True,
+    default=False,
+    help="Experimental: evaluate configurations in-process instead of running `evergreen"
+    " evaluate`. Its output is not verified against recorded `evergreen evaluate` output yet.",
+)
+@click.option(
+    "--use-daemon",
+    is_flag=True,
+    default=False,
+    help="Ask the verifier daemon of the repository for the changes, see `daemon` command. Falls"
+    " back to verifying in-process if the daemon is not running.",
+)
+@click.option(
+    "--daemon-socket",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Location of the verifier daemon socket, defaults to a per-repository location.",
+)
+@click.option(
+    "--output-mode",
+    type=click.Choice([CROSS_PRODUCT_OUTPUT_MODE, PER_VARIANT_OUTPUT_MODE]),
+    default=CROSS_PRODUCT_OUTPUT_MODE,
+    help="Print arguments of a single patch with all changed build variants and tasks, which runs"
+    " their cross product, or of a patch per group of build variants running the same tasks,"
+    " which runs exactly the changed (variant, task) pairs.",
+)
+@click.option(
+    "--patch-params-file",
+    type=click.File("w"),
+    default=None,
+    help="Write changed tasks and task groups to run on every changed build variant as JSON to"
+    " the file.",
+)
+@click.option(
+    "--minimize-variants",
+    is_flag=True,
+    default=False,
+    help="Run changed tasks only on representatives of changed build variants that run on the"
+    " same distros with the same expansions.",
+)
+@click.option(
+    "--ignore-expansion",
+    "ignored_expansions",
+    type=str,
+    multiple=True,
+    help="Expansion that does not make build variants different for --minimize-variants, can be"
+    " given multiple times.",
+)
+@click.option(
+    "--task-durations",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="CSV or JSON file with historical durations in seconds of tasks on build variants, with"
+    " `variant`, `task` and `duration` columns or keys. Used to estimate cost of the task runs.",
+)
+@click.option(
+    "--budget",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Maximum estimated duration in seconds of the task runs, requires --task-durations. Task"
+    " runs of directly changed tasks are selected first, of indirectly affected ones after.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print time, CPU time, subprocess time and peak memory of every phase to stderr.",
+)
+@click.option(
+    "--profile-trace",
+    type=click.File("w"),
+    default=None,
+    help="Write time of every phase in Chrome trace event format to the file, it can be opened"
+    " in Perfetto UI or chrome://tracing.",
+)
 @click.option("--verbose", is_flag=True, default=False, help="Enable debug logging.")
-def main(evg_project_config: Path, target_branch: str, verbose: bool) -> None:
+@click.pass_context
+def main(
+    ctx: click.Context,
+    evg_project_config_patterns: Tuple[str, ...],
+    target_branch: str,
+    use_worktree: bool,
+    baseline_snapshot: Optional[Path],
+    cache_dir: Path,
+    no_cache: bool,
+    native_evaluator: bool,
+    use_daemon: bool,
+    daemon_socket: Optional[Path],
+    output_mode: str,
+    patch_params_file: Optional[TextIO],
+    minimize_variants: bool,
+    ignored_expansions: Tuple[str, ...],
+    task_durations: Optional[Path],
+    budget: Optional[float],
+    profile: bool,
+    profile_trace: Optional[TextIO],
+    verbose: bool,
+) -> None:
     """
     Evergreen project configuration changes verifier.
 
@@ -101,21 +491,363 @@ def main(evg_project_config: Path, target_branch: str, verbose: bool) -> None:
         -v linux-x86-dynamic-compile-required -v commit-queue -t lint_yaml
 
     Now those arguments can be used to create an evergreen patch.
+
+    Use `--output-mode per-variant` to run only the changed tasks on every changed build variant
+    instead of all changed tasks on all changed build variants.
+
+    Use `batch` command to verify many commits or branches at once.
+
+    Give `--evg-project-config` many times or as a glob pattern, e.g. `'etc/evergreen*.yml'`, to
+    verify several projects of the repository in one run.
+
+    Use `snapshot` command to write the original configuration to a file once and
+    `--baseline-snapshot` to load it instead of evaluating it on every run.
     """
-    configure_logging(verbose)
-    LOGGER.info("Comparing original and patched evergreen project configuration files.")
+    ctx.obj = dict(
+        evg_project_config_patterns=evg_project_config_patterns,
+        target_branch=target_branch,
+        daemon_socket=daemon_socket,
+        cache_dir=cache_dir,
+        no_cache=no_cache,
+        native_evaluator=native_evaluator,
+        task_selection=dict(
+            minimize_variants=minimize_variants,
+            ignored_expansions=list(ignored_expansions),
+            task_durations_file=str(task_durations.resolve()) if task_durations else None,
+            budget=budget,
+            cross_product=output_mode != PER_VARIANT_OUTPUT_MODE,
+        ),
+        profile=profile,
+        profile_trace=profile_trace,
+        verbose=verbose,
+    )
+    if ctx.invoked_subcommand is not None:
+        # Subcommands set up the command themselves, so that their `--help` is cheap
+        return
 
-    def dependencies(binder: inject.Binder) -> None:
-        binder.bind_to_constructor(EvgCliProxy, EvgCliProxy.create)
-        binder.bind_to_constructor(GitCliProxy, GitCliProxy.create)
+    setup_command(ctx)
+    evg_project_configs = ctx.obj["evg_project_configs"]
+    if use_daemon:
+        from plumbum import ProcessExecutionError
 
-    inject.configure(dependencies)
-    orchestrator = inject.instance(VerificationOrchestrator)
+        from evg_config_changes_verifier.daemon_client import (
+            DaemonError,
+            request_evg_config_changes,
+        )
+        from evg_config_changes_verifier.models.evg_models import EvgConfigChanges
 
-    evg_config_changes = orchestrator.get_evg_config_changes(evg_project_config, target_branch)
-    print("---------------------------------------------------------------")
-    print("Arguments to create evergreen patch with to verify the changes:")
-    print(evg_config_changes.as_evg_patch_cmd_args())
+        try:
+            socket_path = get_daemon_socket(daemon_socket)
+            changes_by_project = {
+                evg_project_config: EvgConfigChanges.from_dict(
+                    request_evg_config_changes(
+                        socket_path, evg_project_config, target_branch, ctx.obj["task_selection"]
+                    )
+                )
+                for evg_project_config in evg_project_configs
+            }
+        except (OSError, DaemonError, ProcessExecutionError) as err:
+            get_logger().warning("Could not get changes from the daemon.", error=str(err))
+        else:
+            print_evg_config_changes_by_project(changes_by_project, output_mode, patch_params_file)
+            return
+
+    from evg_config_changes_verifier.orchestrator import VerificationOrchestrator
+
+    get_logger().info("Comparing original and patched evergreen project configuration files.")
+    orchestrator = get_instance(ctx, VerificationOrchestrator)
+
+    changes_by_project = orchestrator.get_evg_config_changes_by_project(
+        evg_project_configs,
+        target_branch,
+        use_worktree=use_worktree,
+        baseline_snapshot=baseline_snapshot,
+    )
+    print_evg_config_changes_by_project(changes_by_project, output_mode, patch_params_file)
+
+
+@main.command()
+@click.option(
+    "--commit-range",
+    type=str,
+    default=None,
+    help="Range of commits to verify one by one against their first parents, e.g."
+    " `origin/master..HEAD`.",
+)
+@click.option(
+    "--ref",
+    "refs",
+    type=str,
+    multiple=True,
+    help="Ref to verify against its merge-base with the target branch, can be given multiple"
+    " times.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="File to write one JSON record per verified commit or ref and project configuration"
+    " to.",
+)
+@click.pass_context
+def batch(
+    ctx: click.Context, commit_range: Optional[str], refs: Tuple[str, ...], output: TextIO
+) -> None:
+    """
+    Verify evergreen project configuration changes of many commits or refs at once.
+
+    Configuration is evaluated once per distinct state and the comparisons run in parallel.
+    """
+    if (commit_range is None) == (len(refs) == 0):
+        raise click.UsageError("Exactly one of --commit-range or --ref should be specified.")
+    setup_command(ctx)
+
+    from evg_config_changes_verifier.batch_orchestrator import BatchVerificationOrchestrator
+
+    get_logger().info("Comparing evergreen project configuration files of many revisions.")
+    batch_orchestrator = get_instance(ctx, BatchVerificationOrchestrator)
+    for evg_project_config in ctx.obj["evg_project_configs"]:
+        if commit_range is not None:
+            steps = batch_orchestrator.get_commit_range_changes(evg_project_config, commit_range)
+        else:
+            steps = batch_orchestrator.get_refs_changes(
+                evg_project_config, list(refs), ctx.obj["target_branch"]
+            )
+
+        for step in steps:
+            record = {"project": str(evg_project_config), **step.as_dict()}
+            output.write(json.dumps(record) + "\n")
+
+
+@main.command()
+@click.option(
+    "--revision",
+    type=str,
+    default=None,
+    help="Revision to evaluate the configuration at, defaults to the merge-base of HEAD with the"
+    " target branch.",
+)
+@click.option(
+    "--output",
+    type=click.Path(path_type=Path),
+    required=True,
+    help="Snapshot file to write, or directory to write it to named by the commit SHA.",
+)
+@click.pass_context
+def snapshot(ctx: click.Context, revision: Optional[str], output: Path) -> None:
+    """
+    Write evaluated and indexed configuration at a commit to a baseline snapshot file.
+
+    Pass the snapshot to `--baseline-snapshot` to verify changes against it without evaluating
+    the original configuration, e.g. write a snapshot of the target branch head once per commit
+    to a shared directory.
+    """
+    from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+    from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+
+    setup_command(ctx)
+    evg_config_service = get_instance(ctx, EvgConfigService)
+    if revision is None:
+        revision = get_instance(ctx, GitCliProxy).merge_base(ctx.obj["target_branch"])
+
+    baseline_snapshot = evg_config_service.write_baseline_snapshot(
+        ctx.obj["evg_project_configs"], revision, output
+    )
+    print(baseline_snapshot.path)
+
+
+@main.group()
+@click.option(
+    "--index-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="SQLite history index file, defaults to one per repository and project configuration in"
+    " the cache directory.",
+)
+@click.pass_context
+def history(ctx: click.Context, index_file: Optional[Path]) -> None:
+    """
+    Index and query evergreen project configuration changes along first-parent history.
+
+    `history index` stores digests of every function, task, task group and build variant at
+    every commit of the target branch, `history changes` and `history first-change` answer
+    queries about indexed commits without evaluating the configuration.
+    """
+    ctx.obj["history_index_file"] = index_file
+
+
+def setup_history_command(ctx: click.Context) -> None:
+    """
+    Set up a history command, see `setup_command`.
+
+    :param ctx: Click context of the running history command.
+    """
+    setup_command(ctx)
+    if ctx.obj["history_index_file"] is not None and len(ctx.obj["evg_project_configs"]) > 1:
+        raise click.UsageError("--index-file can only be used with a single project configuration.")
+
+
+@contextmanager
+def open_history_index(ctx: click.Context, evg_project_config: Path) -> Iterator[HistoryIndex]:
+    """
+    Open the history index of a project configuration.
+
+    :param ctx: Click context of a history command.
+    :param evg_project_config: Location of Evergreen project configuration.
+    :return: History index instance.
+    """
+    from evg_config_changes_verifier.history_orchestrator import HistoryOrchestrator
+    from evg_config_changes_verifier.services.history_index import HistoryIndexError
+
+    history_orchestrator = get_instance(ctx, HistoryOrchestrator)
+    try:
+        history_index = history_orchestrator.open_index(
+            evg_project_config, ctx.obj["history_index_file"], ctx.obj["cache_dir"]
+        )
+        try:
+            yield history_index
+        finally:
+            history_index.close()
+    except HistoryIndexError as err:
+        raise click.ClickException(str(err))
+
+
+@history.command("index")
+@click.option(
+    "--branch",
+    type=str,
+    default=None,
+    help="Branch to index first-parent history of, defaults to the target branch.",
+)
+@click.option(
+    "--since",
+    type=str,
+    default=None,
+    help="First commit to index when the index is created, defaults to the root commit.",
+)
+@click.pass_context
+def history_index_command(ctx: click.Context, branch: Optional[str], since: Optional[str]) -> None:
+    """
+    Index commits of first-parent history that are not indexed yet.
+
+    Only new commits are evaluated on every run and commits with the same configuration files are
+    evaluated once.
+    """
+    setup_history_command(ctx)
+    from evg_config_changes_verifier.history_orchestrator import HistoryOrchestrator
+
+    history_orchestrator = get_instance(ctx, HistoryOrchestrator)
+    for evg_project_config in ctx.obj["evg_project_configs"]:
+        with open_history_index(ctx, evg_project_config) as history_index:
+            indexed = history_orchestrator.update_index(
+                history_index, evg_project_config, branch or ctx.obj["target_branch"], since
+            )
+            get_logger().info(
+                "Updated history index.",
+                evg_project_config=str(evg_project_config),
+                new_commits=indexed,
+                commits=history_index.size,
+                path=str(history_index.path),
+            )
+
+
+@history.command("changes")
+@click.option("--base", type=str, required=True, help="Indexed revision with the original state.")
+@click.option(
+    "--head",
+    type=str,
+    default=None,
+    help="Indexed revision with the patched state, defaults to the target branch.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="File to write a JSON record per project configuration to.",
+)
+@click.pass_context
+def history_changes(ctx: click.Context, base: str, head: Optional[str], output: TextIO) -> None:
+    """Get changes between two indexed commits without evaluating the configuration."""
+    setup_history_command(ctx)
+    from evg_config_changes_verifier.history_orchestrator import HistoryOrchestrator
+
+    history_orchestrator = get_instance(ctx, HistoryOrchestrator)
+    for evg_project_config in ctx.obj["evg_project_configs"]:
+        with open_history_index(ctx, evg_project_config) as history_index:
+            step = history_orchestrator.get_range_changes(
+                history_index, base, head or ctx.obj["target_branch"]
+            )
+        record = {"project": str(evg_project_config), **step.as_dict()}
+        output.write(json.dumps(record) + "\n")
+
+
+@history.command("first-change")
+@click.argument("name", type=str)
+@click.option("--base", type=str, required=True, help="Indexed revision to look for changes after.")
+@click.option(
+    "--head",
+    type=str,
+    default=None,
+    help="Last indexed revision to look for changes at, defaults to the target branch.",
+)
+@click.pass_context
+def history_first_change(ctx: click.Context, name: str, base: str, head: Optional[str]) -> None:
+    """
+    Find the first indexed commit that changed a function, task, task group or build variant.
+
+    Commits that changed the configuration are bisected, the entity is changed by a commit if it
+    is affected by the changes since the base commit, the same way as by a patch.
+    """
+    setup_history_command(ctx)
+    from evg_config_changes_verifier.history_orchestrator import HistoryOrchestrator
+
+    history_orchestrator = get_instance(ctx, HistoryOrchestrator)
+    for evg_project_config in ctx.obj["evg_project_configs"]:
+        with open_history_index(ctx, evg_project_config) as history_index:
+            commit = history_orchestrator.find_first_change(
+                history_index, name, base, head or ctx.obj["target_branch"]
+            )
+        record = {"project": str(evg_project_config), "name": name, "commit": commit}
+        print(json.dumps(record))
+
+
+@main.command()
+@click.option(
+    "--poll-interval",
+    type=float,
+    default=get_default_poll_interval,
+    show_default=False,
+    help="Interval in seconds of checking configuration files for changes, half a second by"
+    " default.",
+)
+@click.pass_context
+def daemon(ctx: click.Context, poll_interval: float) -> None:
+    """
+    Run the verifier daemon of the repository in the current working directory.
+
+    The daemon keeps evaluated original and patched configurations in memory, watches the
+    configuration files and re-evaluates only the patched configuration when they change.
+    Run `verify-evg-config-changes --use-daemon` to get the changes from it.
+    """
+    import signal
+
+    from evg_config_changes_verifier.daemon_server import (
+        VerificationDaemon,
+        VerificationDaemonServer,
+    )
+
+    setup_command(ctx)
+    server = VerificationDaemonServer(
+        get_daemon_socket(ctx.obj["daemon_socket"]),
+        get_instance(ctx, VerificationDaemon),
+        poll_interval,
+    )
+    # Stop gracefully on termination too, so that the socket is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        get_logger().info("Stopped the daemon.")
 
 
 if __name__ == "__main__":
@@ -1,19 +1,27 @@
 """Proxy for working with Evergreen CLI."""
 from __future__ import annotations
 
+import tempfile
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import IO, Iterator, List, Optional, Tuple
 
 import structlog
-from plumbum import local
+from plumbum import ProcessExecutionError, local
 from plumbum.machines.local import LocalCommand
 
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
 LOGGER = structlog.get_logger(__name__)
 
 
 class EvgCliProxy:
     """A proxy for interacting with Evergreen CLI."""
 
+    # Identifies evaluation results of this evaluator, e.g. in caches
+    evaluator_name = "evergreen-cli"
+
     def __init__(self, evg_cli: LocalCommand) -> None:
         """
         Initialize.
@@ -31,17 +39,89 @@ class EvgCliProxy:
         """
         return cls(local.cmd.evergreen)
 
+    @PROFILER.profiled("evaluate")
     def evaluate(
-        self, project_config_location: Path, output_file: Optional[Path] = None
+        self,
+        project_config_location: Path,
+        output_file: Optional[Path] = None,
+        cwd: Optional[Path] = None,
     ) -> Optional[str]:
         """
         Evaluate the given evergreen project configuration.
 
         :param project_config_location: Location of project configuration to evaluate.
         :param output_file: Write output to file.
+        :param cwd: Directory to run evaluation in, defaults to the current working directory.
         :return: Evaluated project configuration.
         """
         args = ["evaluate", "--path", project_config_location]
         if output_file is not None:
             args.append([">", output_file])
-        return self.evg_cli[args]()
+        return self.evg_cli[args](cwd=cwd)
+
+    @contextmanager
+    def evaluate_stream(
+        self, project_config_location: Path, cwd: Optional[Path] = None
+    ) -> Iterator[IO[bytes]]:
+        """
+        Evaluate the given evergreen project configuration and stream its output.
+
+        The output can be read while Evergreen CLI is still writing it. The process is waited for
+        when the context exits, its failure takes precedence over errors of reading the output.
+
+        :param project_config_location: Location of project configuration to evaluate.
+        :param cwd: Directory to run evaluation in, defaults to the current working directory.
+        :return: Binary stream of the evaluated project configuration.
+        """
+        command = self.evg_cli["evaluate", "--path", project_config_location]
+        # Stderr goes to a file, a pipe could fill up and block the process while stdout is read
+        with tempfile.TemporaryFile() as stderr:
+            process = command.popen(cwd=cwd, stderr=stderr)
+            try:
+                yield process.stdout
+            except BaseException:
+                # Closing the stream stops the process with SIGPIPE if it is still writing
+                process.stdout.close()
+                if process.wait() <= 0:
+                    raise
+                self._raise_evaluation_error(command, process.returncode, stderr)
+            process.stdout.close()
+            if process.wait() != 0:
+                self._raise_evaluation_error(command, process.returncode, stderr)
+
+    @staticmethod
+    def _raise_evaluation_error(command: LocalCommand, retcode: int, stderr: IO[bytes]) -> None:
+        """
+        Raise error of a failed evaluation.
+
+        :param command: Evaluation command.
+        :param retcode: Exit code of the evaluation.
+        :param stderr: File the evaluation wrote its stderr to.
+        """
+        stderr.seek(0)
+        raise ProcessExecutionError(
+            command.formulate(), retcode, "", stderr.read().decode(errors="replace")
+        )
+
+    @PROFILER.profiled("evaluate")
+    def evaluate_configs(
+        self, evaluations: List[Tuple[Path, Optional[Path]]]
+    ) -> List[CompactEvgConfig]:
+        """
+        Evaluate and parse the given evergreen project configurations.
+
+        Evergreen CLI processes run concurrently and their outputs are parsed from streams while
+        being produced into compact configurations, neither the output text nor its parsed tree is
+        ever kept in memory. Outputs are parsed one by one, meanwhile the other processes keep
+        evaluating until their output pipes are full.
+
+        :param evaluations: Locations of project configurations to evaluate and directories to run
+            evaluations in, None for the current working directory.
+        :return: Evaluated project configurations in the same order.
+        """
+        with ExitStack() as stack:
+            streams = [
+                stack.enter_context(self.evaluate_stream(project_config_location, cwd=cwd))
+                for project_config_location, cwd in evaluations
+            ]
+            return [CompactEvgConfig.load(stream) for stream in streams]
@@ -1,26 +1,42 @@
 """Proxy for working with Git CLI."""
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import structlog
 from plumbum import local
 from plumbum.machines.local import LocalCommand
 
+from evg_config_changes_verifier.clients.git_object_reader import (
+    GitObject,
+    GitObjectError,
+    GitObjectReader,
+    GitTreeEntry,
+    parse_tree,
+)
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
 LOGGER = structlog.get_logger(__name__)
 
 
 class GitCliProxy:
     """A proxy for interacting with Git CLI."""
 
-    def __init__(self, git_cli: LocalCommand) -> None:
+    def __init__(
+        self, git_cli: LocalCommand, object_reader: Optional[GitObjectReader] = None
+    ) -> None:
         """
         Initialize.
 
         :param git_cli: Object for executing cli command.
+        :param object_reader: Reader of git objects, defaults to one using the same git command.
         """
         self.git_cli = git_cli
+        self.object_reader = object_reader or GitObjectReader(git_cli)
+        self._merge_bases: Dict[Tuple[str, str], str] = {}
+        self._toplevels: Dict[str, Path] = {}
 
     @classmethod
     def create(cls) -> GitCliProxy:
@@ -31,11 +47,13 @@ class GitCliProxy:
         """
         return cls(local.cmd.git)
 
+    @PROFILER.profiled("git")
     def diff(
         self,
         no_pager: Optional[bool],
         target_branch: Optional[str],
         output_file: Optional[Path],
+        name_only: Optional[bool] = False,
     ) -> Optional[str]:
         """
         Run git-diff command.
@@ -43,18 +61,22 @@ class GitCliProxy:
         :param no_pager: Do not pipe Git output into a pager.
         :param target_branch: The branch that patch will be merged into.
         :param output_file: Output to a patch file that can be applied with git-apply.
+        :param name_only: Show only names of changed files.
         :return: Git-diff command output.
         """
         args = []
         if no_pager:
             args.append("--no-pager")
         args.append("diff")
+        if name_only:
+            args.append("--name-only")
         if target_branch is not None:
             args.extend(["--merge-base", target_branch])
         if output_file is not None:
             args.extend(["--output", output_file, "--binary"])
         return self.git_cli[args]()
 
+    @PROFILER.profiled("git")
     def apply(self, patch_file: Path, reverse: Optional[bool] = False) -> None:
         """
         Run git-apply command.
@@ -67,3 +89,126 @@ class GitCliProxy:
             args.append("--reverse")
         args.append(patch_file)
         self.git_cli[args]()
+
+    @PROFILER.profiled("git")
+    def merge_base(self, target_branch: str, commit: str = "HEAD") -> str:
+        """
+        Run git-merge-base command.
+
+        The merge-base of the same pair of commits is computed only once, refs are resolved to
+        commits through the object reader every time, so moved refs get a new merge-base.
+
+        :param target_branch: The branch that patch will be merged into.
+        :param commit: The commit to find the common ancestor with.
+        :return: Commit hash of the best common ancestor.
+        """
+        key = (self.resolve_commit(target_branch), self.resolve_commit(commit))
+        if key[0] is None or key[1] is None:
+            # Let git report the revision that cannot be resolved
+            return self.git_cli["merge-base", target_branch, commit]().strip()
+        if key not in self._merge_bases:
+            self._merge_bases[key] = self.git_cli["merge-base", *key]().strip()
+        return self._merge_bases[key]
+
+    def resolve_commit(self, revision: str) -> Optional[str]:
+        """
+        Resolve a revision to a commit hash without starting a git process.
+
+        :param revision: Revision to resolve.
+        :return: Commit hash, None if the revision does not name a commit.
+        """
+        git_object = self.object_reader.read(f"{revision}^{{commit}}")
+        return git_object.oid if git_object is not None else None
+
+    def read_blobs(self, revision: str, paths: List[str]) -> Dict[str, GitObject]:
+        """
+        Read many files at the given revision at once.
+
+        :param revision: Revision to read the files at.
+        :param paths: Paths of the files relative to the repository root.
+        :return: Paths of the files to their blob objects.
+        """
+        git_objects = self.object_reader.read_many([f"{revision}:{path}" for path in paths])
+        blobs = {}
+        for path, git_object in zip(paths, git_objects):
+            if git_object is None or git_object.type != "blob":
+                raise GitObjectError(f"'{path}' is not a file at {revision}.")
+            blobs[path] = git_object
+        return blobs
+
+    def read_tree(self, revision: str, path: str = "") -> List[GitTreeEntry]:
+        """
+        List a directory at the given revision.
+
+        :param revision: Revision to list the directory at.
+        :param path: Path of the directory relative to the repository root.
+        :return: Entries of the directory.
+        """
+        git_object = self.object_reader.read(f"{revision}:{path}")
+        if git_object is None or git_object.type != "tree":
+            raise GitObjectError(f"'{path}' is not a directory at {revision}.")
+        return parse_tree(git_object)
+
+    @PROFILER.profiled("git")
+    def rev_parse(self, *revisions: str) -> List[str]:
+        """
+        Run git-rev-parse command.
+
+        :param revisions: Revisions to resolve, e.g. `<rev>:<path>` for blob object names.
+        :return: Object names of the given revisions in the same order.
+        """
+        return self.git_cli["rev-parse", revisions]().split()
+
+    @PROFILER.profiled("git")
+    def rev_list(self, revision_range: str) -> List[str]:
+        """
+        List commits of the range following only the first parent, oldest first.
+
+        :param revision_range: Range of commits, e.g. `<from>..<to>`.
+        :return: Commit hashes.
+        """
+        return self.git_cli["rev-list", "--first-parent", "--reverse", revision_range]().split()
+
+    def cat_file_blob(self, revision: str, path: str) -> str:
+        """
+        Get the content of a file at the given revision.
+
+        :param revision: Revision to read the file at.
+        :param path: Path of the file relative to the repository root.
+        :return: Content of the file.
+        """
+        return self.read_blobs(revision, [path])[path].content.decode()
+
+    def show_toplevel(self) -> Path:
+        """
+        Get the top-level directory of the working tree of the current working directory.
+
+        :return: Absolute path of the top-level directory of the working tree.
+        """
+        cwd = os.getcwd()
+        if cwd not in self._toplevels:
+            self._toplevels[cwd] = Path(self.git_cli["rev-parse", "--show-toplevel"]().strip())
+        return self._toplevels[cwd]
+
+    @PROFILER.profiled("git")
+    def worktree_add(self, path: Path, commit: str) -> None:
+        """
+        Run git-worktree-add command with detached HEAD.
+
+        :param path: Location of the new working tree.
+        :param commit: The commit to check out in the new working tree.
+        """
+        self.git_cli["worktree", "add", "--detach", "--quiet", path, commit]()
+
+    @PROFILER.profiled("git")
+    def worktree_remove(self, path: Path) -> None:
+        """
+        Run git-worktree-remove command, discarding any changes in the working tree.
+
+        :param path: Location of the working tree to remove.
+        """
+        self.git_cli["worktree", "remove", "--force", path]()
+
+    def worktree_prune(self) -> None:
+        """Run git-worktree-prune command to clean up stale working tree information."""
+        self.git_cli["worktree", "prune"]()
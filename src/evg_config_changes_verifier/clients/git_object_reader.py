@@ -0,0 +1,250 @@
+"""Reader of git objects through a persistent `git cat-file --batch` process."""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Dict, List, NamedTuple, Optional
+
+import structlog
+from plumbum.machines.local import LocalCommand
+
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+LOGGER = structlog.get_logger(__name__)
+
+DEFAULT_MAX_CACHE_BYTES = 64 * 1024 * 1024
+# Number of objects requested before reading responses, keeps requests within the pipe buffer
+BATCH_SIZE = 64
+# Object names starting with a full object id always name the same object
+IMMUTABLE_NAME_PATTERN = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})(?::|$)")
+TREE_MODE = "40000"
+SUBMODULE_MODE = "160000"
+
+
+class GitObjectError(Exception):
+    """Error reading a git object."""
+
+
+class GitObject(NamedTuple):
+    """
+    Git object.
+
+    * oid: Object id.
+    * type: Object type, i.e. blob, tree, commit or tag.
+    * content: Raw object content.
+    """
+
+    oid: str
+    type: str
+    content: bytes
+
+
+class GitTreeEntry(NamedTuple):
+    """
+    Entry of a git tree object.
+
+    * mode: File mode, e.g. `100644` for files and `40000` for directories.
+    * name: Name of the file or directory.
+    * oid: Object id of the blob, tree or submodule commit.
+    """
+
+    mode: str
+    name: str
+    oid: str
+
+    @property
+    def type(self) -> str:
+        """Type of the object the entry points to."""
+        if self.mode == TREE_MODE:
+            return "tree"
+        if self.mode == SUBMODULE_MODE:
+            return "commit"
+        return "blob"
+
+
+def hash_blob(content: bytes) -> str:
+    """
+    Get object id a blob with the given content has in a SHA-1 repository, like `git hash-object`.
+
+    :param content: Content of the blob.
+    :return: Object id of the blob.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def parse_tree(tree: GitObject) -> List[GitTreeEntry]:
+    """
+    Parse entries of a tree object.
+
+    :param tree: Tree object.
+    :return: Entries of the tree in order.
+    """
+    # Entries are `<mode> <name>\0<raw object id>`, ids are as long as the tree id
+    oid_size = len(tree.oid) // 2
+    entries = []
+    position = 0
+    while position < len(tree.content):
+        separator = tree.content.index(b"\0", position)
+        mode, name = tree.content[position:separator].split(b" ", 1)
+        oid = tree.content[separator + 1 : separator + 1 + oid_size]
+        entries.append(GitTreeEntry(mode=mode.decode(), name=name.decode(), oid=oid.hex()))
+        position = separator + 1 + oid_size
+    return entries
+
+
+class GitObjectReader:
+    """
+    Reader of git objects through a persistent `git cat-file --batch` process.
+
+    Objects are looked up by names like `<rev>:<path>` through a pipe instead of starting a git
+    process for every lookup. Objects named by full object ids never change, they are kept in an
+    in-memory least recently used cache. The process is started on the first lookup and again in
+    forked processes, so that they never share the pipe.
+    """
+
+    def __init__(
+        self, git_cli: LocalCommand, max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES
+    ) -> None:
+        """
+        Initialize.
+
+        :param git_cli: Object for executing cli command.
+        :param max_cache_bytes: Maximum total size of the contents of cached objects.
+        """
+        self.git_cli = git_cli
+        self.max_cache_bytes = max_cache_bytes
+        self._process: Optional[subprocess.Popen] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, Optional[GitObject]] = OrderedDict()
+        self._cache_bytes = 0
+
+    def read(self, name: str) -> Optional[GitObject]:
+        """
+        Read a git object.
+
+        :param name: Object name, e.g. `<rev>:<path>`.
+        :return: Git object, None if it does not exist.
+        """
+        (git_object,) = self.read_many([name])
+        return git_object
+
+    @PROFILER.profiled("git")
+    def read_many(self, names: List[str]) -> List[Optional[GitObject]]:
+        """
+        Read many git objects, requests are sent in batches without waiting for every response.
+
+        :param names: Object names, e.g. `<rev>:<path>`.
+        :return: Git objects in the same order, None for the ones that do not exist.
+        """
+        if any("\n" in name for name in names):
+            raise GitObjectError("Git object names cannot contain new lines.")
+
+        with self._lock:
+            objects: Dict[str, Optional[GitObject]] = {}
+            pending = []
+            for name in names:
+                if name in self._cache:
+                    self._cache.move_to_end(name)
+                    objects[name] = self._cache[name]
+                elif name not in objects:
+                    objects[name] = None
+                    pending.append(name)
+
+            for start in range(0, len(pending), BATCH_SIZE):
+                batch = pending[start : start + BATCH_SIZE]
+                for name, git_object in zip(batch, self._request(batch)):
+                    objects[name] = git_object
+                    if IMMUTABLE_NAME_PATTERN.match(name):
+                        self._put(name, git_object)
+            return [objects[name] for name in names]
+
+    def _request(self, names: List[str]) -> List[Optional[GitObject]]:
+        """
+        Send object names to the process and read its responses.
+
+        :param names: Object names.
+        :return: Git objects in the same order, None for the ones that do not exist.
+        """
+        process = self._get_process()
+        assert process.stdin is not None and process.stdout is not None
+        try:
+            process.stdin.write("".join(f"{name}\n" for name in names).encode())
+            process.stdin.flush()
+            objects = []
+            for name in names:
+                header = process.stdout.readline().decode()
+                if not header:
+                    raise GitObjectError("`git cat-file --batch` exited unexpectedly.")
+                header = header.rstrip("\n")
+                # Names may contain spaces, so the response is matched by the name it repeats
+                if header in (f"{name} missing", f"{name} ambiguous"):
+                    LOGGER.debug("Could not read git object.", name=name, response=header)
+                    objects.append(None)
+                    continue
+                fields = header.split(" ")
+                if len(fields) != 3 or not fields[2].isdigit():
+                    raise GitObjectError(
+                        f"Unexpected response of `git cat-file --batch` for '{name}': {header}"
+                    )
+                oid, object_type, size = fields
+                content = process.stdout.read(int(size))
+                if len(content) != int(size) or process.stdout.read(1) != b"\n":
+                    raise GitObjectError(f"Truncated content of git object '{name}'.")
+                objects.append(GitObject(oid=oid, type=object_type, content=content))
+            return objects
+        except BaseException:
+            # The responses cannot be matched with the requests anymore
+            self.close()
+            raise
+
+    def _get_process(self) -> subprocess.Popen:
+        """
+        Get the `git cat-file --batch` process of the current process, start it if needed.
+
+        :return: Running process.
+        """
+        if self._process is None or self._pid != os.getpid() or self._process.poll() is not None:
+            self._process = self.git_cli["cat-file", "--batch"].popen(
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            self._pid = os.getpid()
+        return self._process
+
+    def _put(self, name: str, git_object: Optional[GitObject]) -> None:
+        """
+        Cache a git object, evicting the least recently used ones if the cache is full.
+
+        :param name: Object name.
+        :param git_object: Git object, None if it does not exist.
+        """
+        size = len(git_object.content) if git_object is not None else 0
+        if size > self.max_cache_bytes:
+            return
+        self._cache[name] = git_object
+        self._cache_bytes += size
+        while self._cache_bytes > self.max_cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted.content) if evicted is not None else 0
+
+    def close(self) -> None:
+        """Stop the `git cat-file --batch` process."""
+        process, self._process = self._process, None
+        if process is None or self._pid != os.getpid():
+            return
+        if process.stdin is not None:
+            with suppress(OSError):
+                process.stdin.close()
+        # Unread responses of a failed request would block the process writing them
+        if process.stdout is not None:
+            process.stdout.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
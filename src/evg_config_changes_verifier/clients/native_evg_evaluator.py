@@ -0,0 +1,242 @@
+"""In-process evaluator of evergreen project configurations."""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+import yaml
+from plumbum import ProcessExecutionError
+
+from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.utils.config_hasher import ConfigHasher
+from evg_config_changes_verifier.utils.profiler import PROFILER
+from evg_config_changes_verifier.utils.yaml_utils import load_yaml
+
+LOGGER = structlog.get_logger(__name__)
+
+BUILD_VARIANTS_KEY = "buildvariants"
+INCLUDE_KEY = "include"
+# Build variant keys that can be extended by a definition of the same variant in another file
+MERGEABLE_VARIANT_KEYS = ("tasks", "display_tasks")
+
+
+class EvgEvaluationError(Exception):
+    """Error evaluating evergreen project configuration."""
+
+
+def _merge_build_variants(
+    merged_variants: List[Dict[str, Any]], variants: List[Dict[str, Any]], source: str
+) -> None:
+    """
+    Merge build variants into the list of already merged ones.
+
+    A build variant defined in several files has its task lists concatenated, all its other
+    keys must be defined only once.
+
+    :param merged_variants: Already merged build variants, updated in place.
+    :param variants: Build variants to merge.
+    :param source: Name of the file the build variants come from.
+    """
+    variants_by_name = {variant["name"]: i for i, variant in enumerate(merged_variants)}
+    for variant in variants:
+        index = variants_by_name.get(variant["name"])
+        if index is None:
+            variants_by_name[variant["name"]] = len(merged_variants)
+            merged_variants.append(variant)
+            continue
+
+        # Copy, parsed files are shared between evaluations and must not be modified
+        merged_variant = dict(merged_variants[index])
+        for key, value in variant.items():
+            if key in MERGEABLE_VARIANT_KEYS:
+                merged_variant[key] = list(merged_variant.get(key) or []) + list(value or [])
+            elif key in merged_variant and merged_variant[key] != value:
+                raise EvgEvaluationError(
+                    f"Build variant '{variant['name']}' redefines '{key}' in '{source}'."
+                )
+            else:
+                merged_variant[key] = value
+        merged_variants[index] = merged_variant
+
+
+def merge_config(merged: Dict[str, Any], config: Dict[str, Any], source: str) -> None:
+    """
+    Merge a parsed project configuration file into the already merged configuration.
+
+    Lists are concatenated, mappings are merged by keys and all other values must be defined
+    only once.
+
+    :param merged: Already merged configuration, updated in place.
+    :param config: Parsed configuration file to merge.
+    :param source: Name of the configuration file.
+    """
+    for key, value in config.items():
+        if key == INCLUDE_KEY:
+            continue
+        if key not in merged or merged[key] is None:
+            merged[key] = list(value) if isinstance(value, list) else value
+        elif key == BUILD_VARIANTS_KEY:
+            _merge_build_variants(merged[key], value or [], source)
+        elif isinstance(merged[key], list) and isinstance(value, list):
+            merged[key].extend(value)
+        elif isinstance(merged[key], dict) and isinstance(value, dict):
+            duplicates = [k for k in value if k in merged[key] and merged[key][k] != value[k]]
+            if duplicates:
+                raise EvgEvaluationError(f"'{source}' redefines {key}: {', '.join(duplicates)}.")
+            merged[key] = {**merged[key], **value}
+        elif value is not None and merged[key] != value:
+            raise EvgEvaluationError(f"'{source}' redefines '{key}'.")
+
+
+class NativeEvgEvaluator(EvgCliProxy):
+    """
+    In-process replacement of `evergreen evaluate`.
+
+    Resolves `include` files relative to the repository root, merges their sections and expands
+    YAML anchors and aliases. Parsed files are cached by their content, so files that are the same
+    in several evaluated configurations are parsed only once and the evaluated configurations
+    share their objects.
+
+    It is experimental and used only with `--native-evaluator`: its output is tested against
+    expected outputs written by hand, not yet against recorded `evergreen evaluate` output.
+    """
+
+    evaluator_name = "native"
+
+    def __init__(self, git_cli_proxy: Optional[GitCliProxy] = None) -> None:
+        """
+        Initialize.
+
+        :param git_cli_proxy: Proxy for interacting with Git CLI to find the repository root with,
+            included files are resolved relative to the evaluation directory without it.
+        """
+        self.git_cli_proxy = git_cli_proxy
+        self._parsed_files: Dict[bytes, Dict[str, Any]] = {}
+
+    @classmethod
+    def create(cls) -> NativeEvgEvaluator:
+        """
+        Create native evaluator instance.
+
+        :return: Native evaluator instance.
+        """
+        return cls(GitCliProxy.create())
+
+    def evaluate(
+        self,
+        project_config_location: Path,
+        output_file: Optional[Path] = None,
+        cwd: Optional[Path] = None,
+    ) -> Optional[str]:
+        """
+        Evaluate the given evergreen project configuration.
+
+        :param project_config_location: Location of project configuration to evaluate.
+        :param output_file: Write output to file.
+        :param cwd: Directory to run evaluation in, defaults to the current working directory.
+        :return: Evaluated project configuration.
+        """
+        evaluated = yaml.dump(
+            self.evaluate_config(project_config_location, cwd), Dumper=yaml.SafeDumper
+        )
+        if output_file is not None:
+            Path(output_file).write_text(evaluated)
+        return evaluated
+
+    def evaluate_configs(
+        self, evaluations: List[Tuple[Path, Optional[Path]]]
+    ) -> List[CompactEvgConfig]:
+        """
+        Evaluate the given evergreen project configurations.
+
+        :param evaluations: Locations of project configurations to evaluate and directories to run
+            evaluations in, None for the current working directory.
+        :return: Evaluated project configurations in the same order.
+        """
+        # Evaluated configurations share objects of the same files, those are hashed only once
+        hasher = ConfigHasher()
+        return [
+            CompactEvgConfig.from_dict(self.evaluate_config(project_config_location, cwd), hasher)
+            for project_config_location, cwd in evaluations
+        ]
+
+    @PROFILER.profiled("evaluate")
+    def evaluate_config(
+        self, project_config_location: Path, cwd: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the given evergreen project configuration.
+
+        :param project_config_location: Location of project configuration to evaluate.
+        :param cwd: Directory to resolve project configuration path against, defaults to the
+            current working directory. Checkouts match the current working directory, included
+            files are resolved relative to the root of the checkout.
+        :return: Evaluated project configuration.
+        """
+        base_dir = Path.cwd() if cwd is None else Path(cwd)
+        repo_root = self._get_repo_root(base_dir)
+        root_path = base_dir / project_config_location
+        try:
+            # Included files may include the root file by its path relative to the repository root
+            root_file = root_path.resolve().relative_to(repo_root.resolve()).as_posix()
+        except ValueError:
+            root_file = root_path.as_posix()
+        root_config = self._load_file(repo_root, root_file)
+
+        evaluated: Dict[str, Any] = {}
+        pending = [(root_file, root_config)]
+        seen = {root_file}
+        while pending:
+            source, config = pending.pop(0)
+            for include in config.get(INCLUDE_KEY) or []:
+                if include.get("module") is not None:
+                    raise EvgEvaluationError(
+                        f"Files from modules are not supported: {include['filename']}."
+                    )
+                filename = include["filename"]
+                if filename not in seen:
+                    seen.add(filename)
+                    pending.append((filename, self._load_file(repo_root, filename)))
+            merge_config(evaluated, config, source)
+
+        LOGGER.debug("Evaluated project configuration.", files=len(seen))
+        return evaluated
+
+    def _get_repo_root(self, base_dir: Path) -> Path:
+        """
+        Get the root of the repository or of the checkout the evaluation runs in.
+
+        :param base_dir: Directory the evaluation runs in, matching the current working directory.
+        :return: Directory to resolve included files against.
+        """
+        if self.git_cli_proxy is None:
+            return base_dir
+        try:
+            repo_root = self.git_cli_proxy.show_toplevel()
+        except ProcessExecutionError:
+            LOGGER.debug("Not in a git repository, resolving included files against evaluation.")
+            return base_dir
+        relative_cwd = Path.cwd().resolve().relative_to(repo_root.resolve())
+        for _ in relative_cwd.parts:
+            base_dir = base_dir.parent
+        return base_dir
+
+    def _load_file(self, base_dir: Path, filename: str) -> Dict[str, Any]:
+        """
+        Load project configuration file, reusing parsed files with the same content.
+
+        :param base_dir: Directory to resolve the file path against.
+        :param filename: Path of the file.
+        :return: Parsed file.
+        """
+        content = (base_dir / filename).read_bytes()
+        content_hash = hashlib.sha1(content).digest()
+        parsed = self._parsed_files.get(content_hash)
+        if parsed is None:
+            parsed = load_yaml(content) or {}
+            self._parsed_files[content_hash] = parsed
+        return parsed
@@ -0,0 +1,77 @@
+"""Client of the evergreen config changes verifier daemon."""
+import getpass
+import hashlib
+import json
+import socket
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+RECEIVE_BUFFER_SIZE = 64 * 1024
+
+
+class DaemonError(Exception):
+    """Error reported by the verifier daemon."""
+
+
+def default_socket_path(repo_root: Path) -> Path:
+    """
+    Get default location of the daemon socket for a repository.
+
+    :param repo_root: Top-level directory of the working tree of the repository, the same for
+        every directory within it.
+    :return: Location of the daemon socket.
+    """
+    repo_hash = hashlib.sha1(str(repo_root.resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"evg-config-verifier-{getpass.getuser()}-{repo_hash}.sock"
+
+
+def send_request(socket_path: Path, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a request to the daemon and wait for the response.
+
+    :param socket_path: Location of the daemon socket.
+    :param request: Request to send.
+    :return: Response of the daemon.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall(json.dumps(request).encode() + b"\n")
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(RECEIVE_BUFFER_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    response = json.loads(b"".join(chunks))
+    if "error" in response:
+        raise DaemonError(response["error"])
+    return response
+
+
+def request_evg_config_changes(
+    socket_path: Path,
+    evg_project_config: Path,
+    target_branch: str,
+    task_selection: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Request evergreen project configuration changes from the daemon.
+
+    :param socket_path: Location of the daemon socket.
+    :param evg_project_config: Location of Evergreen project configuration.
+    :param target_branch: The branch that the current changes will be merged into.
+    :param task_selection: Options of selecting task runs that verify the changes.
+    :return: Changed entity names and `evergreen patch` arguments under "evg_patch_args" key.
+    """
+    return send_request(
+        socket_path,
+        {
+            "cwd": str(Path.cwd().resolve()),
+            "evg_project_config": str(Path(evg_project_config).resolve()),
+            "target_branch": target_branch,
+            "task_selection": task_selection or {},
+        },
+    )
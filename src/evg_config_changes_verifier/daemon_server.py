@@ -0,0 +1,285 @@
+"""Long-running daemon that keeps evaluated configuration states in memory."""
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import inject
+import structlog
+
+from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+
+LOGGER = structlog.get_logger(__name__)
+
+DEFAULT_POLL_INTERVAL_SECS = 0.5
+
+FileStamps = Dict[str, Tuple[int, int]]
+
+
+class EvaluatedState(NamedTuple):
+    """
+    Evaluated configuration state kept in memory.
+
+    * version: Key identifying the state, merge-base commit or file stamps.
+    * evg_config: Evaluated configuration.
+    * index: Reverse dependency index of the configuration.
+    """
+
+    version: Any
+    evg_config: CompactEvgConfig
+    index: EvgConfigIndex
+
+    @classmethod
+    def create(cls, version: Any, evg_config: CompactEvgConfig) -> EvaluatedState:
+        """
+        Create evaluated configuration state with its index.
+
+        :param version: Key identifying the state.
+        :param evg_config: Evaluated configuration.
+        :return: Evaluated configuration state.
+        """
+        return cls(version=version, evg_config=evg_config, index=EvgConfigIndex.create(evg_config))
+
+
+class VerificationDaemon:
+    """
+    Keeps evaluated original and patched configuration states of a repository in memory.
+
+    The original state is re-evaluated only when the merge-base changes, the patched one only when
+    any file in the include closure of the project configuration changes in the working tree.
+    """
+
+    @inject.autoparams()
+    def __init__(
+        self,
+        evg_config_service: EvgConfigService,
+        evg_include_service: EvgIncludeService,
+        evg_cli_proxy: EvgCliProxy,
+        git_cli_proxy: GitCliProxy,
+    ) -> None:
+        """
+        Initialize.
+
+        :param evg_config_service: Service for working with evergreen project configurations.
+        :param evg_include_service: Service for discovering included configuration files.
+        :param evg_cli_proxy: Proxy for interacting with Evergreen CLI.
+        :param git_cli_proxy: Proxy for interacting with Git CLI.
+        """
+        self.evg_config_service = evg_config_service
+        self.evg_include_service = evg_include_service
+        self.evg_cli_proxy = evg_cli_proxy
+        self.git_cli_proxy = git_cli_proxy
+        self.repo_root = git_cli_proxy.show_toplevel().resolve()
+        self._lock = threading.Lock()
+        self._original_states: Dict[Tuple[str, str], EvaluatedState] = {}
+        self._patched_states: Dict[str, EvaluatedState] = {}
+        self._changes: Dict[Tuple[str, str], Tuple[Any, Any, EvgConfigChanges]] = {}
+
+    def get_evg_config_changes(
+        self,
+        evg_project_yaml: Path,
+        target_branch: str,
+        task_selection_service: Optional[TaskSelectionService] = None,
+    ) -> EvgConfigChanges:
+        """
+        Get evergreen project configuration changes using the states kept in memory.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param target_branch: The branch that patch will be merged into.
+        :param task_selection_service: Service for selecting task runs that verify the changes.
+        :return: Evergreen project configuration changes.
+        """
+        with self._lock:
+            if not self.evg_config_service.has_config_changes(evg_project_yaml, target_branch):
+                return EvgConfigChanges.create_empty()
+
+            original = self._get_original_state(evg_project_yaml, target_branch)
+            patched = self._get_patched_state(evg_project_yaml)
+            evg_config_states = EvgConfigStates(
+                original_config=original.evg_config,
+                patched_config=patched.evg_config,
+                original_index=original.index,
+                patched_index=patched.index,
+            )
+            changes_key = (str(evg_project_yaml), target_branch)
+            cached = self._changes.get(changes_key)
+            if (
+                cached is not None
+                and patched.version is not None
+                and cached[:2] == (original.version, patched.version)
+            ):
+                evg_config_changes = cached[2]
+            else:
+                evg_config_changes = find_evg_config_changes(evg_config_states)
+                self._changes[changes_key] = (
+                    original.version,
+                    patched.version,
+                    evg_config_changes,
+                )
+
+            if task_selection_service is None:
+                return evg_config_changes
+            return task_selection_service.select(evg_config_states, evg_config_changes)
+
+    def refresh(self) -> None:
+        """Re-evaluate patched states of configurations whose files changed in the working tree."""
+        with self._lock:
+            for evg_project_yaml, state in list(self._patched_states.items()):
+                if state.version is None:
+                    # Files of the configuration are unknown, it is re-evaluated on every request
+                    continue
+                try:
+                    self._get_patched_state(Path(evg_project_yaml))
+                except Exception as err:
+                    # The files may be in the middle of editing, report on the next request
+                    LOGGER.warning("Failed to re-evaluate patched configuration.", error=str(err))
+                    del self._patched_states[evg_project_yaml]
+
+    def _get_original_state(self, evg_project_yaml: Path, target_branch: str) -> EvaluatedState:
+        """
+        Get evaluated original state, re-evaluating it if the merge-base changed.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param target_branch: The branch that patch will be merged into.
+        :return: Evaluated original state.
+        """
+        merge_base = self.git_cli_proxy.merge_base(target_branch)
+        key = (str(evg_project_yaml), target_branch)
+        state = self._original_states.get(key)
+        if state is None or state.version != merge_base:
+            (evg_config,) = self.evg_config_service.evaluate_revisions(
+                evg_project_yaml, [merge_base]
+            )
+            state = EvaluatedState.create(merge_base, evg_config)
+            self._original_states[key] = state
+            LOGGER.info("Evaluated original configuration.", merge_base=merge_base)
+        return state
+
+    def _get_patched_state(self, evg_project_yaml: Path) -> EvaluatedState:
+        """
+        Get evaluated patched state, re-evaluating it if any of its files changed.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :return: Evaluated patched state.
+        """
+        key = str(evg_project_yaml)
+        state = self._patched_states.get(key)
+        if state is not None and state.version is not None:
+            if self._get_file_stamps(state.version) == state.version:
+                return state
+
+        closure = self.evg_include_service.get_include_closure_files(evg_project_yaml)
+        stamps = self._get_file_stamps(closure) if closure is not None else None
+        (evg_config,) = self.evg_cli_proxy.evaluate_configs([(evg_project_yaml, None)])
+        state = EvaluatedState.create(stamps, evg_config)
+        self._patched_states[key] = state
+        LOGGER.info("Evaluated patched configuration.")
+        return state
+
+    def _get_file_stamps(self, files: Iterable[str]) -> FileStamps:
+        """
+        Get modification stamps of files in the working tree.
+
+        :param files: Paths of files relative to the repository root.
+        :return: Map of file paths to their modification times and sizes.
+        """
+        stamps = {}
+        for path in files:
+            try:
+                stat = (self.repo_root / path).stat()
+            except FileNotFoundError:
+                stamps[path] = (-1, -1)
+                continue
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handler of a single JSON request to the daemon."""
+
+    server: VerificationDaemonServer
+
+    def handle(self) -> None:
+        """Handle the request."""
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.handle_request_data(request)
+        except Exception as err:
+            LOGGER.exception("Failed to handle request.")
+            response = {"error": str(err)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class VerificationDaemonServer(socketserver.UnixStreamServer):
+    """Unix socket server answering verification requests of a single repository."""
+
+    def __init__(
+        self,
+        socket_path: Path,
+        daemon: VerificationDaemon,
+        poll_interval_secs: float = DEFAULT_POLL_INTERVAL_SECS,
+    ) -> None:
+        """
+        Initialize.
+
+        :param socket_path: Location of the socket to listen on.
+        :param daemon: Daemon keeping configuration states in memory.
+        :param poll_interval_secs: Interval of checking configuration files for changes.
+        """
+        if socket_path.exists():
+            socket_path.unlink()
+        super().__init__(str(socket_path), _RequestHandler)
+        self.socket_path = socket_path
+        self.daemon = daemon
+        self.poll_interval_secs = poll_interval_secs
+        self._stopped = threading.Event()
+
+    def handle_request_data(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a verification request.
+
+        :param request: Request with "cwd", "evg_project_config" and "target_branch" keys and
+            optional "task_selection" key with task selection options.
+        :return: Changed entity names and `evergreen patch` arguments.
+        """
+        cwd = Path(request["cwd"]).resolve()
+        if cwd != self.daemon.repo_root and self.daemon.repo_root not in cwd.parents:
+            return {"error": f"The daemon serves '{self.daemon.repo_root}' repository only."}
+        evg_config_changes = self.daemon.get_evg_config_changes(
+            Path(request["evg_project_config"]),
+            request["target_branch"],
+            TaskSelectionService.create(**request.get("task_selection", {})),
+        )
+        return {
+            **evg_config_changes.as_dict(),
+            "evg_patch_args": evg_config_changes.as_evg_patch_cmd_args(),
+        }
+
+    def serve(self) -> None:
+        """Serve requests and watch configuration files until interrupted."""
+        watcher = threading.Thread(target=self._watch, name="evg-config-watcher", daemon=True)
+        watcher.start()
+        LOGGER.info("Serving requests.", socket=str(self.socket_path), pid=os.getpid())
+        try:
+            self.serve_forever()
+        finally:
+            self._stopped.set()
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+
+    def _watch(self) -> None:
+        """Re-evaluate patched states in the background when their files change."""
+        while not self._stopped.wait(self.poll_interval_secs):
+            self.daemon.refresh()
@@ -0,0 +1,278 @@
+"""Orchestrator for indexing and querying evergreen config changes along first-parent history."""
+from pathlib import Path
+from typing import List, Optional
+
+import inject
+import structlog
+import yaml
+from plumbum import ProcessExecutionError
+
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.git_object_reader import GitObjectError
+from evg_config_changes_verifier.clients.native_evg_evaluator import EvgEvaluationError
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.models.evg_models import (
+    EvgConfigChanges,
+    EvgConfigChangesStep,
+    EvgConfigStates,
+)
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.history_index import (
+    HistoryIndex,
+    HistoryIndexError,
+    default_history_index_path,
+)
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+LOGGER = structlog.get_logger(__name__)
+
+# Number of commits evaluated and stored at once, an interrupted indexing resumes after the last
+# stored chunk
+INDEX_CHUNK_SIZE = 100
+# Errors evaluating the configuration at a commit, e.g. of invalid YAML in old history
+EVALUATION_ERRORS = (
+    OSError,
+    UnicodeDecodeError,
+    yaml.YAMLError,
+    GitObjectError,
+    EvgEvaluationError,
+    ProcessExecutionError,
+)
+
+
+def is_changed(evg_config_changes: EvgConfigChanges, name: str) -> bool:
+    """
+    Check whether a function, task, task group or build variant changed.
+
+    :param evg_config_changes: Evergreen project configuration changes.
+    :param name: Name of the function, task, task group or build variant.
+    :return: Whether the entity changed itself or is affected by other changes.
+    """
+    return (
+        name in evg_config_changes.functions
+        or name in evg_config_changes.tasks_and_groups
+        or name in evg_config_changes.variants
+    )
+
+
+class HistoryOrchestrator:
+    """Orchestrator for indexing and querying evergreen config changes along history."""
+
+    @inject.autoparams()
+    def __init__(
+        self,
+        evg_config_service: EvgConfigService,
+        git_cli_proxy: GitCliProxy,
+        task_selection_service: TaskSelectionService,
+    ) -> None:
+        """
+        Initialize.
+
+        :param evg_config_service: Service for working with evergreen project configurations.
+        :param git_cli_proxy: Proxy for interacting with Git CLI.
+        :param task_selection_service: Service for selecting task runs that verify the changes.
+        """
+        self.evg_config_service = evg_config_service
+        self.git_cli_proxy = git_cli_proxy
+        self.task_selection_service = task_selection_service
+
+    def open_index(
+        self, evg_project_yaml: Path, path: Optional[Path], cache_dir: Path
+    ) -> HistoryIndex:
+        """
+        Open the history index of a project configuration.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param path: Location of the index database, None for the default one of the repository.
+        :param cache_dir: Cache directory the default index database is kept in.
+        :return: History index instance.
+        """
+        root_file = self.evg_config_service.evg_include_service.get_repo_relative_path(
+            evg_project_yaml
+        )
+        if path is None:
+            path = default_history_index_path(
+                cache_dir, self.git_cli_proxy.show_toplevel(), root_file
+            )
+        return HistoryIndex.open(
+            path, root_file, self.evg_config_service.evg_cli_proxy.evaluator_name
+        )
+
+    @PROFILER.profiled("orchestrator")
+    def update_index(
+        self,
+        history_index: HistoryIndex,
+        evg_project_yaml: Path,
+        branch: str,
+        since: Optional[str] = None,
+    ) -> int:
+        """
+        Index commits of first-parent history of a branch that are not indexed yet.
+
+        Commits the configuration cannot be evaluated at are indexed as unevaluable.
+
+        :param history_index: History index to update.
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param branch: Branch to index the history of.
+        :param since: First commit to index if the index is empty, defaults to the root commit.
+        :return: Number of newly indexed commits.
+        """
+        tip = history_index.tip
+        if tip is not None:
+            commits = self.git_cli_proxy.rev_list(f"{tip}..{branch}")
+            if commits and self.git_cli_proxy.rev_parse(f"{commits[0]}^") != [tip]:
+                raise HistoryIndexError(
+                    f"Last indexed commit {tip} is not in first-parent history of {branch}, the"
+                    f" history was rewritten. Remove '{history_index.path}' to index it again."
+                )
+        elif since is not None:
+            commits = self.git_cli_proxy.rev_parse(f"{since}^{{commit}}")
+            commits += self.git_cli_proxy.rev_list(f"{since}..{branch}")
+        else:
+            commits = self.git_cli_proxy.rev_list(branch)
+
+        for start in range(0, len(commits), INDEX_CHUNK_SIZE):
+            chunk = commits[start : start + INDEX_CHUNK_SIZE]
+            history_index.append(chunk, self._evaluate_commits(evg_project_yaml, chunk))
+            LOGGER.info(
+                "Indexed commits.", indexed=start + len(chunk), total=len(commits), tip=chunk[-1]
+            )
+        return len(commits)
+
+    def _evaluate_commits(
+        self, evg_project_yaml: Path, commits: List[str]
+    ) -> List[Optional[CompactEvgConfig]]:
+        """
+        Evaluate Evergreen project configuration at commits.
+
+        The commits are evaluated together, one by one only if that fails.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param commits: SHAs of the commits.
+        :return: Evaluated configurations in the same order as commits, None for commits the
+            configuration cannot be evaluated at.
+        """
+        try:
+            return self.evg_config_service.evaluate_revisions(evg_project_yaml, commits)
+        except EVALUATION_ERRORS as err:
+            if len(commits) == 1:
+                LOGGER.warning(
+                    "Indexing commit the configuration cannot be evaluated at.",
+                    commit=commits[0],
+                    error=str(err),
+                )
+                return [None]
+
+        evg_configs: List[Optional[CompactEvgConfig]] = []
+        for commit in commits:
+            evg_configs.extend(self._evaluate_commits(evg_project_yaml, [commit]))
+        return evg_configs
+
+    @PROFILER.profiled("orchestrator")
+    def get_range_changes(
+        self, history_index: HistoryIndex, base_revision: str, head_revision: str
+    ) -> EvgConfigChangesStep:
+        """
+        Get evergreen project configuration changes between two indexed commits.
+
+        :param history_index: History index.
+        :param base_revision: Revision with the original state.
+        :param head_revision: Revision with the patched state.
+        :return: Evergreen project configuration changes.
+        """
+        base, head = self._get_positions(history_index, base_revision, head_revision)
+        if not history_index.get_change_positions(min(base, head), max(base, head)):
+            changes = EvgConfigChanges.create_empty()
+        else:
+            evg_config_states = EvgConfigStates.create(
+                original_config=history_index.get_config(base),
+                patched_config=history_index.get_config(head),
+            )
+            changes = self.task_selection_service.select(
+                evg_config_states, find_evg_config_changes(evg_config_states)
+            )
+        return EvgConfigChangesStep(
+            base_revision=history_index.get_commit(base),
+            head_revision=history_index.get_commit(head),
+            changes=changes,
+        )
+
+    @PROFILER.profiled("orchestrator")
+    def find_first_change(
+        self, history_index: HistoryIndex, name: str, base_revision: str, head_revision: str
+    ) -> Optional[str]:
+        """
+        Find the first commit after the base one that changed a function, task or build variant.
+
+        Only commits that changed any entity are candidates, they are bisected by comparing the
+        configuration at the base commit with the configuration at a candidate. Like with
+        `git bisect`, a change reverted before the head commit may be missed. Changes made by
+        commits the configuration cannot be evaluated at are found at the next commit it can be.
+
+        :param history_index: History index.
+        :param name: Name of the function, task, task group or build variant.
+        :param base_revision: Revision to look for changes after.
+        :param head_revision: Last revision to look for changes at.
+        :return: SHA of the first commit that changed the entity, None if it did not change.
+        """
+        base, head = self._get_positions(history_index, base_revision, head_revision)
+        candidates = history_index.get_change_positions(base, head)
+        base_config = history_index.get_config(base)
+        base_index = EvgConfigIndex.create(base_config)
+
+        low, high = 0, len(candidates)
+        while low < high:
+            middle = (low + high) // 2
+            if self._is_changed_at(
+                base_config, base_index, history_index, candidates[middle], name
+            ):
+                high = middle
+            else:
+                low = middle + 1
+        LOGGER.info("Bisected history.", name=name, candidates=len(candidates))
+        return history_index.get_commit(candidates[low]) if low < len(candidates) else None
+
+    @staticmethod
+    def _is_changed_at(
+        base_config: CompactEvgConfig,
+        base_index: EvgConfigIndex,
+        history_index: HistoryIndex,
+        position: int,
+        name: str,
+    ) -> bool:
+        """
+        Check whether an entity changed between the base configuration and a commit.
+
+        :param base_config: Configuration at the base commit.
+        :param base_index: Index of the configuration at the base commit.
+        :param history_index: History index.
+        :param position: Position of the commit in the history.
+        :param name: Name of the function, task, task group or build variant.
+        :return: Whether the entity changed.
+        """
+        evg_config_states = EvgConfigStates.create(
+            original_config=base_config,
+            patched_config=history_index.get_config(position),
+            original_index=base_index,
+        )
+        return is_changed(find_evg_config_changes(evg_config_states), name)
+
+    def _get_positions(self, history_index: HistoryIndex, *revisions: str) -> List[int]:
+        """
+        Get positions of indexed revisions the configuration could be evaluated at.
+
+        :param history_index: History index.
+        :param revisions: Revisions to resolve.
+        :return: Positions of the commits in the history in the same order.
+        """
+        commits = self.git_cli_proxy.rev_parse(
+            *(f"{revision}^{{commit}}" for revision in revisions)
+        )
+        positions = [history_index.get_position(commit) for commit in commits]
+        for commit, position in zip(commits, positions):
+            if not history_index.is_evaluated(position):
+                raise HistoryIndexError(f"The configuration could not be evaluated at {commit}.")
+        return positions
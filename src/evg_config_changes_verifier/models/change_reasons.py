@@ -0,0 +1,83 @@
+"""Reasons evergreen project configuration entities are found changed."""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, NamedTuple, Tuple
+
+NEW = "new"
+REMOVED = "removed"
+DEFINITION_CHANGED = "definition_changed"
+CALLS_CHANGED_FUNCTIONS = "calls_changed_functions"
+PROJECT_COMMANDS_CHANGED = "project_commands_changed"
+READS_CHANGED_PARAMETERS = "reads_changed_parameters"
+CONTAINS_CHANGED_TASKS = "contains_changed_tasks"
+RUN_ON_CHANGED = "run_on_changed"
+MODULES_CHANGED = "modules_changed"
+EXPANSIONS_CHANGED = "expansions_changed"
+TASK_ENTRIES_CHANGED = "task_entries_changed"
+DISPLAY_TASKS_CHANGED = "display_tasks_changed"
+LISTS_CHANGED_TASKS = "lists_changed_tasks"
+RUNS_ON_CHANGED_VARIANTS = "runs_on_changed_variants"
+
+REASON_DESCRIPTIONS = {
+    NEW: "is new",
+    REMOVED: "is removed",
+    DEFINITION_CHANGED: "definition is changed",
+    CALLS_CHANGED_FUNCTIONS: "calls changed functions",
+    PROJECT_COMMANDS_CHANGED: "runs changed project-level commands",
+    READS_CHANGED_PARAMETERS: "reads changed parameters",
+    CONTAINS_CHANGED_TASKS: "contains changed tasks",
+    RUN_ON_CHANGED: "runs on changed distros",
+    MODULES_CHANGED: "checks out changed modules",
+    EXPANSIONS_CHANGED: "has changed expansions its tasks read",
+    TASK_ENTRIES_CHANGED: "has changed task entries",
+    DISPLAY_TASKS_CHANGED: "has changed display tasks",
+    LISTS_CHANGED_TASKS: "lists changed tasks",
+    RUNS_ON_CHANGED_VARIANTS: "runs on changed build variants",
+}
+
+# Kinds of changed entities, named like the fields of `EvgConfigChanges` holding them
+CHANGE_KINDS = (
+    "functions",
+    "project_commands",
+    "parameters",
+    "modules",
+    "tasks_and_groups",
+    "variants",
+)
+
+ChangeReasons = Dict[str, Dict[str, Tuple["ChangeReason", ...]]]
+
+
+class ChangeReason(NamedTuple):
+    """
+    Reason an entity is found changed.
+
+    * code: Reason code, e.g. `calls_changed_functions`.
+    * related: Names of the entities the reason refers to, e.g. the changed functions the task
+      calls, sorted.
+    """
+
+    code: str
+    related: Tuple[str, ...] = ()
+
+    @classmethod
+    def create(cls, code: str, related: Iterable[str] = ()) -> ChangeReason:
+        """
+        Create change reason.
+
+        :param code: Reason code.
+        :param related: Names of the entities the reason refers to.
+        :return: Change reason.
+        """
+        return cls(code=code, related=tuple(sorted(related)))
+
+    def describe(self) -> str:
+        """Describe the reason in words."""
+        description = REASON_DESCRIPTIONS.get(self.code, self.code)
+        if not self.related:
+            return description
+        return f"{description}: {', '.join(self.related)}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Make JSON serializable dictionary of the reason."""
+        return {"code": self.code, "related": list(self.related)}
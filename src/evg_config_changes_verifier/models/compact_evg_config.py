@@ -0,0 +1,464 @@
+"""Compact representation of evaluated evergreen project configurations."""
+from __future__ import annotations
+
+import re
+import sys
+from typing import IO, Any, Dict, FrozenSet, Iterable, NamedTuple, Optional, Set, Tuple, Union
+
+from evg_config_changes_verifier.utils.config_hasher import ConfigHasher
+from evg_config_changes_verifier.utils.yaml_events import YamlEventLoader
+
+FUNCTIONS_KEY = "functions"
+TASKS_KEY = "tasks"
+TASK_GROUPS_KEY = "task_groups"
+BUILD_VARIANTS_KEY = "buildvariants"
+MODULES_KEY = "modules"
+PARAMETERS_KEY = "parameters"
+TASK_GROUP_COMMAND_BLOCKS = (
+    "setup_group",
+    "teardown_group",
+    "setup_task",
+    "teardown_task",
+    "timeout",
+)
+PROJECT_COMMAND_BLOCKS = ("pre", "post", "timeout")
+# Commands that set or expose expansions at runtime, which expansions they read is not known
+DYNAMIC_EXPANSION_COMMANDS = frozenset(("expansions.update", "expansions.write"))
+# `${name}`, `${name|default}` or `${name|*fallback_name}` expansion reference
+EXPANSION_REFERENCE = re.compile(r"\$\{([^}|]+)(?:\|(\*?)([^}]*))?\}")
+
+# Names of expansions read by commands, None if the commands may read any expansion
+ExpansionReferences = Optional[FrozenSet[str]]
+
+# Digest of a missing value, e.g. of a top-level section that is not defined
+NONE_DIGEST = ConfigHasher().digest(None)
+
+
+def get_called_functions(commands: Any) -> FrozenSet[str]:
+    """
+    Get names of functions called in a list of commands.
+
+    :param commands: List of commands.
+    :return: Names of called functions.
+    """
+    if not commands:
+        return frozenset()
+    return frozenset(
+        sys.intern(command["func"])
+        for command in commands
+        if isinstance(command, dict) and "func" in command
+    )
+
+
+def get_expansion_references(value: Any) -> ExpansionReferences:
+    """
+    Get names of expansions a definition refers to.
+
+    Commands that update or write out expansions, or expose all of them to the environment of a
+    script, may read any expansion.
+
+    :param value: Definition, e.g. of a function, task or task group.
+    :return: Names of referenced expansions, None if the definition may read any expansion.
+    """
+    names = set()
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            if "${" in item:
+                for name, fallback_marker, default in EXPANSION_REFERENCE.findall(item):
+                    names.add(name.strip())
+                    if fallback_marker:
+                        names.add(default.strip())
+        elif isinstance(item, dict):
+            if item.get("command") in DYNAMIC_EXPANSION_COMMANDS:
+                return None
+            params = item.get("params")
+            if isinstance(params, dict):
+                if params.get("add_expansions_to_env"):
+                    return None
+                included = params.get("include_expansions_in_env")
+                if isinstance(included, list):
+                    names.update(str(name) for name in included)
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, list):
+            pending.extend(item)
+    return frozenset(sys.intern(name) for name in names)
+
+
+def union_expansion_references(*references: ExpansionReferences) -> ExpansionReferences:
+    """
+    Unite names of expansions read by many definitions.
+
+    :param references: Names of expansions read by every definition.
+    :return: Names of expansions read by any of them, None if any of them may read any expansion.
+    """
+    if any(names is None for names in references):
+        return None
+    return frozenset().union(*references)
+
+
+def _intern_names(names: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Intern entity names, the same names are repeated across many entities.
+
+    :param names: Entity names.
+    :return: Interned entity names.
+    """
+    return tuple(sys.intern(name) for name in names or ())
+
+
+class FunctionRecord(NamedTuple):
+    """
+    Function of evaluated configuration.
+
+    * digest: Canonical digest of the function definition.
+    * expansions: Names of expansions the function refers to, None if it may read any expansion.
+    """
+
+    digest: bytes
+    expansions: ExpansionReferences
+
+    @classmethod
+    def create(cls, function: Any, hasher: ConfigHasher) -> FunctionRecord:
+        """
+        Create function record.
+
+        :param function: Function definition.
+        :param hasher: Canonical hasher.
+        :return: Function record.
+        """
+        return cls(digest=hasher.digest(function), expansions=get_expansion_references(function))
+
+
+class TaskRecord(NamedTuple):
+    """
+    Task of evaluated configuration.
+
+    * digest: Canonical digest of the whole task definition.
+    * funcs: Names of functions the task calls.
+    * expansions: Names of expansions the task definition refers to, excluding the called
+      functions, None if it may read any expansion.
+    """
+
+    digest: bytes
+    funcs: FrozenSet[str]
+    expansions: ExpansionReferences
+
+    @classmethod
+    def create(cls, task: Dict[str, Any], hasher: ConfigHasher) -> TaskRecord:
+        """
+        Create task record.
+
+        :param task: Task definition.
+        :param hasher: Canonical hasher.
+        :return: Task record.
+        """
+        return cls(
+            digest=hasher.digest(task),
+            funcs=get_called_functions(task.get("commands")),
+            expansions=get_expansion_references(task),
+        )
+
+
+class TaskGroupRecord(NamedTuple):
+    """
+    Task group of evaluated configuration.
+
+    * digest: Canonical digest of the whole task group definition.
+    * funcs: Names of functions the task group calls in its setup, teardown and timeout blocks.
+    * tasks: Names of tasks in the task group.
+    * expansions: Names of expansions the task group definition refers to, excluding the called
+      functions and the tasks, None if it may read any expansion.
+    """
+
+    digest: bytes
+    funcs: FrozenSet[str]
+    tasks: Tuple[str, ...]
+    expansions: ExpansionReferences
+
+    @classmethod
+    def create(cls, task_group: Dict[str, Any], hasher: ConfigHasher) -> TaskGroupRecord:
+        """
+        Create task group record.
+
+        :param task_group: Task group definition.
+        :param hasher: Canonical hasher.
+        :return: Task group record.
+        """
+        funcs = frozenset().union(
+            *(get_called_functions(task_group.get(key)) for key in TASK_GROUP_COMMAND_BLOCKS)
+        )
+        return cls(
+            digest=hasher.digest(task_group),
+            funcs=funcs,
+            tasks=_intern_names(task_group.get("tasks")),
+            expansions=get_expansion_references(task_group),
+        )
+
+
+class DisplayTaskRecord(NamedTuple):
+    """
+    Display task of a build variant.
+
+    * digest: Canonical digest of the whole display task definition.
+    * execution_tasks: Names of tasks the display task groups.
+    """
+
+    digest: bytes
+    execution_tasks: Tuple[str, ...]
+
+
+class VariantRecord(NamedTuple):
+    """
+    Build variant of evaluated configuration.
+
+    * expansions: Names of the build variant expansions to canonical digests of their values.
+    * run_on_digest: Canonical digest of the distros the build variant runs on.
+    * tasks: Names of listed tasks and task groups to canonical digests of their entries.
+    * display_tasks: Names of display tasks to their records.
+    * expansion_references: Names of the build variant expansions whose values refer to other
+      expansions to the names of those.
+    * modules: Names of the modules the build variant checks out.
+    """
+
+    expansions: Dict[str, bytes]
+    run_on_digest: bytes
+    tasks: Dict[str, bytes]
+    display_tasks: Dict[str, DisplayTaskRecord]
+    expansion_references: Dict[str, FrozenSet[str]]
+    modules: Tuple[str, ...]
+
+    @classmethod
+    def create(cls, variant: Dict[str, Any], hasher: ConfigHasher) -> VariantRecord:
+        """
+        Create build variant record.
+
+        :param variant: Build variant definition.
+        :param hasher: Canonical hasher.
+        :return: Build variant record.
+        """
+        expansions = variant.get("expansions") or {}
+        expansion_references = {}
+        for name, value in expansions.items():
+            references = get_expansion_references(value)
+            if references:
+                expansion_references[sys.intern(str(name))] = references
+        return cls(
+            expansions={
+                sys.intern(str(name)): hasher.digest(value) for name, value in expansions.items()
+            },
+            run_on_digest=hasher.digest(variant.get("run_on", [])),
+            tasks={
+                sys.intern(task["name"]): hasher.digest(task) for task in variant.get("tasks", [])
+            },
+            display_tasks={
+                sys.intern(display_task["name"]): DisplayTaskRecord(
+                    digest=hasher.digest(display_task),
+                    execution_tasks=_intern_names(display_task.get("execution_tasks")),
+                )
+                for display_task in variant.get("display_tasks") or []
+            },
+            expansion_references=expansion_references,
+            modules=_intern_names(variant.get("modules")),
+        )
+
+    def get_changed_expansions(self, original_variant: VariantRecord) -> Set[str]:
+        """
+        Get names of expansions changed since the original build variant.
+
+        Expansions whose values refer to changed expansions are changed too.
+
+        :param original_variant: Original build variant record.
+        :return: Names of added, removed and changed expansions.
+        """
+        changed = {
+            name
+            for name in self.expansions.keys() | original_variant.expansions.keys()
+            if self.expansions.get(name) != original_variant.expansions.get(name)
+        }
+        while True:
+            referring = {
+                name
+                for name, references in self.expansion_references.items()
+                if name not in changed and not references.isdisjoint(changed)
+            }
+            if not referring:
+                return changed
+            changed.update(referring)
+
+
+class CompactEvgConfig(NamedTuple):
+    """
+    Compact representation of evaluated evergreen project configuration.
+
+    Only what the update checks inspect is kept: names of entities, references between them and
+    canonical digests of the definitions they compare. Definitions are not kept.
+
+    * functions: Function names to function records.
+    * tasks: Task names to task records.
+    * task_groups: Task group names to task group records.
+    * variants: Build variant names to build variant records.
+    * modules: Module names to canonical digests of their definitions.
+    * parameters: Parameter keys to canonical digests of their definitions.
+    * sections: Names of all the other top-level sections to canonical digests of their values.
+    * project_funcs: Names of defined project-level pre, post and timeout blocks to names of
+      functions they call.
+    * project_expansions: Names of expansions project-level pre, post and timeout blocks refer to,
+      excluding the called functions, None if they may read any expansion.
+    """
+
+    functions: Dict[str, FunctionRecord]
+    tasks: Dict[str, TaskRecord]
+    task_groups: Dict[str, TaskGroupRecord]
+    variants: Dict[str, VariantRecord]
+    modules: Dict[str, bytes]
+    parameters: Dict[str, bytes]
+    sections: Dict[str, bytes]
+    project_funcs: Dict[str, FrozenSet[str]]
+    project_expansions: ExpansionReferences
+
+    @classmethod
+    def load(cls, document: Union[str, bytes, IO[bytes]]) -> CompactEvgConfig:
+        """
+        Build compact configuration from evaluated configuration YAML document.
+
+        Entities are constructed from YAML events one at a time and dropped once their records are
+        made, so neither the whole document nor its parsed tree is ever kept in memory. All of them
+        share a hasher, which keeps the digests of anchored sub-trees, so the sub-trees aliases
+        share between entities are hashed only once.
+
+        :param document: Evaluated configuration YAML document or a stream to read it from.
+        :return: Compact configuration.
+        """
+        loader = YamlEventLoader(document)
+        builder = _CompactEvgConfigBuilder()
+        hasher = ConfigHasher()
+        for key, event in loader.iter_root_mapping():
+            if key in _CompactEvgConfigBuilder.ENTITY_SECTIONS:
+                builder.start_section(key)
+                for item in loader.iter_items(event):
+                    builder.add_entity(key, item, hasher)
+                    # Other sub-trees of the entity are never hashed again, they are dropped
+                    hasher.retain(loader.anchored_values)
+            else:
+                builder.add_section(key, loader.construct(event), hasher)
+                hasher.retain(loader.anchored_values)
+        return builder.build()
+
+    @classmethod
+    def from_dict(
+        cls, evg_config: Dict[str, Any], hasher: Optional[ConfigHasher] = None
+    ) -> CompactEvgConfig:
+        """
+        Build compact configuration from parsed evaluated configuration.
+
+        :param evg_config: Parsed evaluated configuration.
+        :param hasher: Canonical hasher, sharing it between configurations that share sub-trees
+            hashes them only once.
+        :return: Compact configuration.
+        """
+        hasher = hasher or ConfigHasher()
+        builder = _CompactEvgConfigBuilder()
+        for key, value in (evg_config or {}).items():
+            if key in _CompactEvgConfigBuilder.ENTITY_SECTIONS:
+                builder.start_section(key)
+                items = value.items() if isinstance(value, dict) else value or []
+                for item in items:
+                    builder.add_entity(key, item, hasher)
+            else:
+                builder.add_section(key, value, hasher)
+        return builder.build()
+
+    def get_section_digest(self, key: str) -> bytes:
+        """
+        Get canonical digest of a top-level section that is not made of entities.
+
+        :param key: Name of the section.
+        :return: Canonical digest of the section value, of None if it is not defined.
+        """
+        return self.sections.get(key, NONE_DIGEST)
+
+
+class _CompactEvgConfigBuilder:
+    """Collects records of entities into a compact configuration."""
+
+    ENTITY_SECTIONS = (
+        FUNCTIONS_KEY,
+        TASKS_KEY,
+        TASK_GROUPS_KEY,
+        BUILD_VARIANTS_KEY,
+        MODULES_KEY,
+        PARAMETERS_KEY,
+    )
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.entities: Dict[str, Dict[str, Any]] = {key: {} for key in self.ENTITY_SECTIONS}
+        self.sections: Dict[str, bytes] = {}
+        self.project_funcs: Dict[str, FrozenSet[str]] = {}
+        self.project_expansions: ExpansionReferences = frozenset()
+
+    def start_section(self, key: str) -> None:
+        """
+        Start collecting entities of a section, a redefined section replaces the earlier one.
+
+        :param key: Name of the section.
+        """
+        self.entities[key] = {}
+
+    def add_entity(self, key: str, item: Any, hasher: ConfigHasher) -> None:
+        """
+        Add entity of a section.
+
+        :param key: Name of the section.
+        :param item: Function name and definition pair for functions, definition otherwise.
+        :param hasher: Canonical hasher.
+        """
+        if key == FUNCTIONS_KEY:
+            name, definition = item
+            self.entities[key][sys.intern(name)] = FunctionRecord.create(definition, hasher)
+        elif key == TASKS_KEY:
+            self.entities[key][sys.intern(item["name"])] = TaskRecord.create(item, hasher)
+        elif key == TASK_GROUPS_KEY:
+            self.entities[key][sys.intern(item["name"])] = TaskGroupRecord.create(item, hasher)
+        elif key == MODULES_KEY:
+            self.entities[key][sys.intern(item["name"])] = hasher.digest(item)
+        elif key == PARAMETERS_KEY:
+            self.entities[key][sys.intern(item["key"])] = hasher.digest(item)
+        else:
+            self.entities[key][sys.intern(item["name"])] = VariantRecord.create(item, hasher)
+
+    def add_section(self, key: str, value: Any, hasher: ConfigHasher) -> None:
+        """
+        Add a top-level section that is not made of entities.
+
+        :param key: Name of the section.
+        :param value: Value of the section.
+        :param hasher: Canonical hasher.
+        """
+        self.sections[key] = hasher.digest(value)
+        if key in PROJECT_COMMAND_BLOCKS:
+            self.project_funcs[key] = get_called_functions(value)
+            self.project_expansions = union_expansion_references(
+                self.project_expansions, get_expansion_references(value)
+            )
+
+    def build(self) -> CompactEvgConfig:
+        """
+        Build compact configuration.
+
+        :return: Compact configuration.
+        """
+        return CompactEvgConfig(
+            functions=self.entities[FUNCTIONS_KEY],
+            tasks=self.entities[TASKS_KEY],
+            task_groups=self.entities[TASK_GROUPS_KEY],
+            variants=self.entities[BUILD_VARIANTS_KEY],
+            modules=self.entities[MODULES_KEY],
+            parameters=self.entities[PARAMETERS_KEY],
+            sections=self.sections,
+            project_funcs=self.project_funcs,
+            project_expansions=self.project_expansions,
+        )
@@ -0,0 +1,195 @@
+"""Reverse dependency index of evergreen project configuration entities."""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Set
+
+from evg_config_changes_verifier.models.compact_evg_config import (
+    CompactEvgConfig,
+    ExpansionReferences,
+    union_expansion_references,
+)
+
+
+def _collect(references: Dict[str, Set[str]], names: Iterable[str]) -> Set[str]:
+    """
+    Collect entities referencing any of the given entities.
+
+    :param references: Reverse references map.
+    :param names: Names of referenced entities.
+    :return: Names of referencing entities.
+    """
+    referencing = set()
+    for name in names:
+        referencing.update(references.get(name, ()))
+    return referencing
+
+
+class EvgConfigIndex(NamedTuple):
+    """
+    Reverse dependency index of evergreen project configuration entities.
+
+    * func_to_tasks: Function name to names of tasks that call it.
+    * func_to_task_groups: Function name to names of task groups that call it.
+    * task_to_task_groups: Task name to names of task groups that contain it.
+    * task_or_group_to_variants: Task or task group name to names of build variants that list it
+      directly or as an execution task of a display task.
+    * project_funcs: Names of functions called in project-level pre, post and timeout blocks.
+    * standalone_tasks: Names of tasks that build variants list outside of task groups, those run
+      project-level pre, post and timeout blocks.
+    * task_or_group_expansions: Task or task group name to names of expansions its commands read
+      when a build variant lists it, including the called functions, the tasks of task groups and
+      project-level blocks of standalone tasks. None if the commands may read any expansion.
+    """
+
+    func_to_tasks: Dict[str, Set[str]]
+    func_to_task_groups: Dict[str, Set[str]]
+    task_to_task_groups: Dict[str, Set[str]]
+    task_or_group_to_variants: Dict[str, Set[str]]
+    project_funcs: Set[str]
+    standalone_tasks: Set[str]
+    task_or_group_expansions: Dict[str, ExpansionReferences]
+
+    @classmethod
+    def create(cls, evg_config: CompactEvgConfig) -> EvgConfigIndex:
+        """
+        Build reverse dependency index of an evaluated evergreen project configuration.
+
+        :param evg_config: Compact evaluated evergreen project configuration.
+        :return: Reverse dependency index.
+        """
+        func_to_tasks = defaultdict(set)
+        for task_name, task in evg_config.tasks.items():
+            for func in task.funcs:
+                func_to_tasks[func].add(task_name)
+
+        func_to_task_groups = defaultdict(set)
+        task_to_task_groups = defaultdict(set)
+        for task_group_name, task_group in evg_config.task_groups.items():
+            for func in task_group.funcs:
+                func_to_task_groups[func].add(task_group_name)
+            for task_name in task_group.tasks:
+                task_to_task_groups[task_name].add(task_group_name)
+
+        task_or_group_to_variants = defaultdict(set)
+        standalone_tasks = set()
+        for variant_name, variant in evg_config.variants.items():
+            for task_name in variant.tasks:
+                task_or_group_to_variants[task_name].add(variant_name)
+                if task_name in evg_config.tasks:
+                    standalone_tasks.add(task_name)
+            for display_task in variant.display_tasks.values():
+                for task_name in display_task.execution_tasks:
+                    task_or_group_to_variants[task_name].add(variant_name)
+
+        return cls(
+            func_to_tasks=dict(func_to_tasks),
+            func_to_task_groups=dict(func_to_task_groups),
+            task_to_task_groups=dict(task_to_task_groups),
+            task_or_group_to_variants=dict(task_or_group_to_variants),
+            project_funcs=set().union(*evg_config.project_funcs.values()),
+            standalone_tasks=standalone_tasks,
+            task_or_group_expansions=cls._resolve_expansions(evg_config),
+        )
+
+    @staticmethod
+    def _resolve_expansions(evg_config: CompactEvgConfig) -> Dict[str, ExpansionReferences]:
+        """
+        Resolve names of expansions every task and task group reads when a build variant lists it.
+
+        :param evg_config: Compact evaluated evergreen project configuration.
+        :return: Task or task group name to names of expansions it reads.
+        """
+
+        def get_commands_expansions(
+            expansions: ExpansionReferences, funcs: Iterable[str]
+        ) -> ExpansionReferences:
+            return union_expansion_references(
+                expansions,
+                *(
+                    evg_config.functions[func].expansions if func in evg_config.functions else None
+                    for func in funcs
+                ),
+            )
+
+        project_expansions = get_commands_expansions(
+            evg_config.project_expansions, set().union(*evg_config.project_funcs.values())
+        )
+        tasks_expansions = {
+            task_name: get_commands_expansions(task.expansions, task.funcs)
+            for task_name, task in evg_config.tasks.items()
+        }
+
+        resolved = {
+            task_name: union_expansion_references(expansions, project_expansions)
+            for task_name, expansions in tasks_expansions.items()
+        }
+        for task_group_name, task_group in evg_config.task_groups.items():
+            resolved[task_group_name] = union_expansion_references(
+                get_commands_expansions(task_group.expansions, task_group.funcs),
+                # Unknown tasks of the task group may read anything
+                *(tasks_expansions.get(task_name) for task_name in task_group.tasks),
+            )
+        return resolved
+
+    def get_tasks_calling(self, funcs: Iterable[str]) -> Set[str]:
+        """
+        Get names of tasks that call any of the given functions.
+
+        :param funcs: Names of functions.
+        :return: Names of tasks.
+        """
+        return _collect(self.func_to_tasks, funcs)
+
+    def get_task_groups_affected_by(self, funcs: Iterable[str], tasks: Iterable[str]) -> Set[str]:
+        """
+        Get names of task groups that call any of the given functions or contain any of the tasks.
+
+        :param funcs: Names of functions.
+        :param tasks: Names of tasks.
+        :return: Names of task groups.
+        """
+        return _collect(self.func_to_task_groups, funcs) | _collect(self.task_to_task_groups, tasks)
+
+    def get_listed_tasks_by_variant(self, tasks_and_groups: Iterable[str]) -> Dict[str, Set[str]]:
+        """
+        Get build variants that list any of the given tasks or task groups with the ones they list.
+
+        :param tasks_and_groups: Names of tasks and task groups.
+        :return: Names of build variants to names of the given tasks and task groups they list.
+        """
+        listed_tasks = defaultdict(set)
+        for task_name in tasks_and_groups:
+            for variant_name in self.task_or_group_to_variants.get(task_name, ()):
+                listed_tasks[variant_name].add(task_name)
+        return dict(listed_tasks)
+
+    def get_tasks_reading(self, tasks_and_groups: Iterable[str], expansions: Set[str]) -> Set[str]:
+        """
+        Get names of tasks and task groups that may read any of the given expansions.
+
+        :param tasks_and_groups: Names of tasks and task groups to check.
+        :param expansions: Names of expansions.
+        :return: Names of tasks and task groups reading any of the expansions, including unknown
+            ones and ones that may read any expansion.
+        """
+        reading = set()
+        for task_name in tasks_and_groups:
+            read_expansions = self.task_or_group_expansions.get(task_name)
+            if read_expansions is None or not read_expansions.isdisjoint(expansions):
+                reading.add(task_name)
+        return reading
+
+    def get_expansions_read_by(self, task_or_group: str, expansions: Set[str]) -> Set[str]:
+        """
+        Get the given expansions a task or task group may read.
+
+        :param task_or_group: Name of the task or task group.
+        :param expansions: Names of expansions.
+        :return: Names of the expansions it may read, all of them for unknown tasks and task groups
+            and ones that may read any expansion.
+        """
+        read_expansions = self.task_or_group_expansions.get(task_or_group)
+        if read_expansions is None:
+            return set(expansions)
+        return read_expansions.intersection(expansions)
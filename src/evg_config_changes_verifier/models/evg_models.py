@@ -1,19 +1,107 @@
 """Models for working with Evergreen."""
 from __future__ import annotations
 
-from typing import Any, Dict, NamedTuple, Set
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from evg_config_changes_verifier.models.change_reasons import (
+    CHANGE_KINDS,
+    ChangeReason,
+    ChangeReasons,
+)
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+
+class EvgInclude(NamedTuple):
+    """
+    Evergreen project configuration include entry.
+
+    * filename: Path of the included file relative to the project repository root.
+    * module: Name of the module the file comes from, if any.
+    """
+
+    filename: str
+    module: Optional[str] = None
+
+
+class EvgIncludeClosure(NamedTuple):
+    """
+    Evergreen project configuration file and all the files it includes at some revision.
+
+    * root_file: Path of the project configuration file relative to the repository root.
+    * contents: Map of file paths relative to the repository root to file contents.
+    * blob_hashes: Map of file paths relative to the repository root to git blob hashes.
+    """
+
+    root_file: str
+    contents: Dict[str, str]
+    blob_hashes: Dict[str, str]
 
 
 class EvgConfigStates(NamedTuple):
     """
     Evergreen project configuration states.
 
-    * original_yaml: Original state.
-    * patched_yaml: Patched state.
+    * original_config: Original state.
+    * patched_config: Patched state.
+    * original_index: Reverse dependency index of original state.
+    * patched_index: Reverse dependency index of patched state.
+    """
+
+    original_config: CompactEvgConfig
+    patched_config: CompactEvgConfig
+    original_index: EvgConfigIndex
+    patched_index: EvgConfigIndex
+
+    @classmethod
+    def create(
+        cls,
+        original_config: CompactEvgConfig,
+        patched_config: CompactEvgConfig,
+        original_index: Optional[EvgConfigIndex] = None,
+    ) -> EvgConfigStates:
+        """
+        Create Evergreen project configuration states instance.
+
+        :param original_config: Original state.
+        :param patched_config: Patched state.
+        :param original_index: Reverse dependency index of original state, if already built.
+        :return: Evergreen project configuration states instance.
+        """
+        with PROFILER.span("EvgConfigStates.create", "index") as span:
+            span.set(
+                functions=len(patched_config.functions),
+                tasks=len(patched_config.tasks),
+                task_groups=len(patched_config.task_groups),
+                variants=len(patched_config.variants),
+            )
+            return cls(
+                original_config=original_config,
+                patched_config=patched_config,
+                original_index=original_index or EvgConfigIndex.create(original_config),
+                patched_index=EvgConfigIndex.create(patched_config),
+            )
+
+
+def _to_sorted_lists(names_map: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+    """
+    Make JSON serializable copy of a map of names to sets of names.
+
+    :param names_map: Map of names to sets of names.
+    :return: Map of names to sorted lists of names, sorted by key.
     """
+    return {name: sorted(names) for name, names in sorted(names_map.items())}
 
-    original_yaml: Dict[str, Any]
-    patched_yaml: Dict[str, Any]
+
+def _to_sets(names_map: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """
+    Make map of names to sets of names from its JSON serializable copy.
+
+    :param names_map: Map of names to lists of names.
+    :return: Map of names to sets of names.
+    """
+    return {name: set(names) for name, names in names_map.items()}
 
 
 class EvgConfigChanges(NamedTuple):
@@ -21,13 +109,41 @@ class EvgConfigChanges(NamedTuple):
     Evergreen project configuration changes.
 
     * functions: Set of changed function names.
+    * project_commands: Set of changed project-level pre, post and timeout block names.
+    * parameters: Set of changed parameter keys.
+    * modules: Set of changed module names.
     * tasks_and_groups: Set of changed task and task group names.
     * variants: Set of changed build variant names.
+    * variant_tasks: Changed build variant names to names of changed tasks and task groups that
+      need to run on them, i.e. the (variant, task) pairs that verify the changes.
+    * direct_variant_tasks: Subset of the pairs changed themselves: the task or task group
+      definition, the entry of the build variant listing it or the whole build variant is new.
+      Other pairs are affected by changed functions, project commands or build variant expansions
+      and distros.
+    * represented_variants: Names of changed build variants left out in favour of equivalent ones
+      to names of the build variants that run their changed tasks instead.
+    * skipped_variant_tasks: Pairs left out to keep within the budget.
+    * reasons: Kinds of changed entities, i.e. the names of the fields holding them, to names of
+      the entities to reason codes to names of the entities the reasons refer to, recorded by the
+      checks finding the entities changed.
+    * cross_product_runs: Number of task runs the cross product of changed build variants and
+      changed tasks schedules, i.e. of changed tasks and task groups listed on changed variants.
+    * estimated_cost: Estimated duration in seconds of the selected task runs, if known.
     """
 
     functions: Set[str]
+    project_commands: Set[str]
+    parameters: Set[str]
+    modules: Set[str]
     tasks_and_groups: Set[str]
     variants: Set[str]
+    variant_tasks: Dict[str, Set[str]]
+    direct_variant_tasks: Dict[str, Set[str]]
+    represented_variants: Dict[str, Set[str]]
+    skipped_variant_tasks: Dict[str, Set[str]]
+    reasons: Dict[str, Dict[str, Dict[str, Set[str]]]]
+    cross_product_runs: int = 0
+    estimated_cost: Optional[float] = None
 
     @classmethod
     def create_empty(cls) -> EvgConfigChanges:
@@ -38,12 +154,221 @@ class EvgConfigChanges(NamedTuple):
         """
         return cls(
             functions=set(),
+            project_commands=set(),
+            parameters=set(),
+            modules=set(),
             tasks_and_groups=set(),
             variants=set(),
+            variant_tasks={},
+            direct_variant_tasks={},
+            represented_variants={},
+            skipped_variant_tasks={},
+            reasons={},
         )
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> EvgConfigChanges:
+        """
+        Create Evergreen project configuration changes instance from its dictionary.
+
+        :param data: Dictionary made with `as_dict`.
+        :return: Evergreen project configuration changes instance.
+        """
+        return cls(
+            functions=set(data["functions"]),
+            project_commands=set(data["project_commands"]),
+            parameters=set(data["parameters"]),
+            modules=set(data["modules"]),
+            tasks_and_groups=set(data["tasks_and_groups"]),
+            variants=set(data["variants"]),
+            variant_tasks=_to_sets(data["variant_tasks"]),
+            direct_variant_tasks=_to_sets(data["direct_variant_tasks"]),
+            represented_variants=_to_sets(data["represented_variants"]),
+            skipped_variant_tasks=_to_sets(data["skipped_variant_tasks"]),
+            reasons={
+                kind: {
+                    name: {reason["code"]: set(reason["related"]) for reason in reasons}
+                    for name, reasons in reasons_by_name.items()
+                }
+                for kind, reasons_by_name in data["reasons"].items()
+                if reasons_by_name
+            },
+            cross_product_runs=data["task_runs"]["cross_product"],
+            estimated_cost=data["task_runs"]["estimated_cost"],
+        )
+
+    def add_variant_tasks(
+        self, variant: str, tasks_and_groups: Iterable[str], direct: bool = False
+    ) -> None:
+        """
+        Add tasks and task groups that need to run on a build variant.
+
+        :param variant: Build variant name.
+        :param tasks_and_groups: Names of tasks and task groups.
+        :param direct: Whether the pairs changed themselves.
+        """
+        tasks_and_groups = set(tasks_and_groups)
+        if not tasks_and_groups:
+            return
+        self.variant_tasks.setdefault(variant, set()).update(tasks_and_groups)
+        if direct:
+            self.direct_variant_tasks.setdefault(variant, set()).update(tasks_and_groups)
+
+    def add_reason(self, kind: str, name: str, code: str, related: Iterable[str] = ()) -> None:
+        """
+        Record a reason an entity is found changed.
+
+        Names of the entities the same reason of the entity refers to are united.
+
+        :param kind: Kind of the entity, i.e. the name of the field holding it, e.g. `variants`.
+        :param name: Name of the entity.
+        :param code: Reason code, e.g. `calls_changed_functions`.
+        :param related: Names of the entities the reason refers to.
+        """
+        self.reasons.setdefault(kind, {}).setdefault(name, {}).setdefault(code, set()).update(
+            related
+        )
+
+    def get_reasons(self) -> ChangeReasons:
+        """
+        Get reasons the changed entities are found changed.
+
+        :return: Kinds of entities to names of the changed entities to their reasons.
+        """
+        return {
+            kind: {
+                name: tuple(
+                    ChangeReason.create(code, related)
+                    for code, related in self.reasons[kind][name].items()
+                )
+                for name in sorted(getattr(self, kind))
+                if name in self.reasons.get(kind, {})
+            }
+            for kind in CHANGE_KINDS
+        }
+
+    def merge(self, other: EvgConfigChanges) -> None:
+        """
+        Add changes found by another check.
+
+        Selection results and task run counts are not merged, those are made once all the changes
+        are found.
+
+        :param other: Evergreen project configuration changes.
+        """
+        self.functions.update(other.functions)
+        self.project_commands.update(other.project_commands)
+        self.parameters.update(other.parameters)
+        self.modules.update(other.modules)
+        self.tasks_and_groups.update(other.tasks_and_groups)
+        self.variants.update(other.variants)
+        for variant, tasks_and_groups in other.variant_tasks.items():
+            self.add_variant_tasks(variant, tasks_and_groups)
+        for variant, tasks_and_groups in other.direct_variant_tasks.items():
+            self.add_variant_tasks(variant, tasks_and_groups, direct=True)
+        for kind, reasons_by_name in other.reasons.items():
+            for name, reasons in reasons_by_name.items():
+                for code, related in reasons.items():
+                    self.add_reason(kind, name, code, related)
+
+    def get_pair_runs(self) -> int:
+        """Get number of task runs that cover exactly the (variant, task) pairs."""
+        return sum(len(tasks) for tasks in self.variant_tasks.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Make JSON serializable dictionary of changed entity names and their reasons."""
+        return {
+            "functions": sorted(self.functions),
+            "project_commands": sorted(self.project_commands),
+            "parameters": sorted(self.parameters),
+            "modules": sorted(self.modules),
+            "tasks_and_groups": sorted(self.tasks_and_groups),
+            "variants": sorted(self.variants),
+            "variant_tasks": _to_sorted_lists(self.variant_tasks),
+            "direct_variant_tasks": _to_sorted_lists(self.direct_variant_tasks),
+            "represented_variants": _to_sorted_lists(self.represented_variants),
+            "skipped_variant_tasks": _to_sorted_lists(self.skipped_variant_tasks),
+            "task_runs": {
+                "pairs": self.get_pair_runs(),
+                "cross_product": self.cross_product_runs,
+                "estimated_cost": self.estimated_cost,
+            },
+            "reasons": {
+                kind: {
+                    name: [reason.as_dict() for reason in reasons]
+                    for name, reasons in reasons_by_name.items()
+                }
+                for kind, reasons_by_name in self.get_reasons().items()
+            },
+        }
+
+    def get_cross_product(self) -> Tuple[Set[str], Set[str]]:
+        """
+        Get build variants and tasks a single patch of the selected task runs lists.
+
+        Build variants left out in favour of equivalent ones and build variants and tasks with
+        all their pairs left out to keep within the budget are not listed.
+
+        :return: Names of the build variants and names of the tasks and task groups.
+        """
+        left_out_variants = self.represented_variants.keys() | (
+            self.skipped_variant_tasks.keys() - self.variant_tasks.keys()
+        )
+        selected_tasks = set().union(*self.variant_tasks.values())
+        skipped_tasks = set().union(*self.skipped_variant_tasks.values()) - selected_tasks
+        return self.variants - left_out_variants, self.tasks_and_groups - skipped_tasks
+
     def as_evg_patch_cmd_args(self) -> str:
         """Make evergreen patch command arguments string."""
-        variant_args_str = " ".join(f"-v {v}" for v in self.variants)
-        task_args_str = " ".join(f"-t {t}" for t in self.tasks_and_groups)
+        variants, tasks = self.get_cross_product()
+        variant_args_str = " ".join(f"-v {v}" for v in self.variants if v in variants)
+        task_args_str = " ".join(f"-t {t}" for t in self.tasks_and_groups if t in tasks)
         return f"{variant_args_str} {task_args_str}"
+
+    def as_per_variant_evg_patch_cmd_args(self) -> List[str]:
+        """
+        Make evergreen patch commands arguments strings scheduling exactly the changed pairs.
+
+        Build variants that need to run the same tasks share a command.
+
+        :return: Arguments string of every evergreen patch command to run.
+        """
+        variants_by_tasks: Dict[FrozenSet[str], List[str]] = {}
+        for variant, tasks in sorted(self.variant_tasks.items()):
+            variants_by_tasks.setdefault(frozenset(tasks), []).append(variant)
+        return [
+            " ".join([*(f"-v {v}" for v in variants), *(f"-t {t}" for t in sorted(tasks))])
+            for tasks, variants in variants_by_tasks.items()
+        ]
+
+    def as_patch_params(self) -> Dict[str, Any]:
+        """Make JSON serializable patch parameters listing tasks to run on every build variant."""
+        return {
+            "variants_tasks": [
+                {"variant": variant, "tasks": sorted(tasks)}
+                for variant, tasks in sorted(self.variant_tasks.items())
+            ]
+        }
+
+
+class EvgConfigChangesStep(NamedTuple):
+    """
+    Evergreen project configuration changes between two revisions.
+
+    * base_revision: Revision with the original state.
+    * head_revision: Revision with the patched state.
+    * changes: Evergreen project configuration changes.
+    """
+
+    base_revision: str
+    head_revision: str
+    changes: EvgConfigChanges
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Make JSON serializable dictionary of the changes."""
+        return {
+            "base": self.base_revision,
+            "head": self.head_revision,
+            **self.changes.as_dict(),
+            "evg_patch_args": self.changes.as_evg_patch_cmd_args(),
+        }
@@ -0,0 +1,93 @@
+"""Historical durations of evergreen tasks."""
+from __future__ import annotations
+
+import csv
+import json
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+VARIANT_FIELD = "variant"
+TASK_FIELD = "task"
+DURATION_FIELD = "duration"
+
+
+class TaskDurations(NamedTuple):
+    """
+    Historical durations of evergreen tasks.
+
+    * variant_tasks: Build variant and task names to mean duration in seconds.
+    * tasks: Task names to mean duration in seconds on any build variant.
+    * default: Median of the durations of all (variant, task) pairs, for tasks with no history.
+    """
+
+    variant_tasks: Dict[Tuple[str, str], float]
+    tasks: Dict[str, float]
+    default: float
+
+    @classmethod
+    def create(cls, samples: Iterable[Tuple[str, str, float]]) -> TaskDurations:
+        """
+        Create historical task durations from recorded runs.
+
+        :param samples: Build variant name, task name and duration in seconds of every run.
+        :return: Historical task durations.
+        """
+        variant_task_samples: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        task_samples: Dict[str, List[float]] = defaultdict(list)
+        for variant, task, duration in samples:
+            variant_task_samples[(variant, task)].append(duration)
+            task_samples[task].append(duration)
+
+        variant_tasks = {
+            pair: statistics.fmean(durations) for pair, durations in variant_task_samples.items()
+        }
+        return cls(
+            variant_tasks=variant_tasks,
+            tasks={task: statistics.fmean(durations) for task, durations in task_samples.items()},
+            default=statistics.median(variant_tasks.values()) if variant_tasks else 0.0,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> TaskDurations:
+        """
+        Load historical task durations from a CSV or JSON file.
+
+        CSV file should have a header with "variant", "task" and "duration" columns, JSON file
+        should contain a list of objects with those keys. Durations are in seconds, a pair may be
+        recorded many times.
+
+        :param path: Location of the file.
+        :return: Historical task durations.
+        """
+        with open(path, newline="") as durations_file:
+            if path.suffix.lower() == ".json":
+                records: Iterable[Dict[str, Any]] = json.load(durations_file)
+            else:
+                records = csv.DictReader(durations_file)
+            try:
+                return cls.create(
+                    (
+                        str(record[VARIANT_FIELD]),
+                        str(record[TASK_FIELD]),
+                        float(record[DURATION_FIELD]),
+                    )
+                    for record in records
+                )
+            except (KeyError, TypeError, ValueError) as err:
+                raise ValueError(f"Invalid task durations in '{path}': {err!r}") from err
+
+    def get(self, variant: str, task: str) -> Optional[float]:
+        """
+        Get duration of a task on a build variant.
+
+        :param variant: Build variant name.
+        :param task: Task name.
+        :return: Mean duration in seconds on the build variant, or on any build variant if the
+            task never ran on this one, None if the task never ran.
+        """
+        duration = self.variant_tasks.get((variant, task))
+        if duration is None:
+            duration = self.tasks.get(task)
+        return duration
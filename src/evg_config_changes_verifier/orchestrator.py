@@ -1,53 +1,144 @@
 """Orchestrator for evergreen config changes verifier."""
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import inject as inject
 import structlog
 
-from evg_config_changes_verifier.models.evg_models import EvgConfigChanges
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
-from evg_config_changes_verifier.update_checks.functions_check import FunctionsCheck
-from evg_config_changes_verifier.update_checks.task_groups_check import TaskGroupsCheck
-from evg_config_changes_verifier.update_checks.tasks_check import TasksCheck
-from evg_config_changes_verifier.update_checks.variants_check import VariantsCheck
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+from evg_config_changes_verifier.update_checks.scheduler import UpdatesCheckScheduler
+from evg_config_changes_verifier.utils.profiler import PROFILER
 
 LOGGER = structlog.get_logger(__name__)
 
-UPDATE_CHECKS = (
-    # Order matters
-    FunctionsCheck(),
-    TasksCheck(),
-    TaskGroupsCheck(),
-    VariantsCheck(),
-)
+UPDATE_CHECKS_SCHEDULER = UpdatesCheckScheduler.create()
+
+
+def find_evg_config_changes(evg_config_states: EvgConfigStates) -> EvgConfigChanges:
+    """
+    Run all registered update checks on evergreen project configuration states.
+
+    :param evg_config_states: Original and patched Evergreen project configuration states.
+    :return: Evergreen project configuration changes.
+    """
+    evg_config_changes = UPDATE_CHECKS_SCHEDULER.run(evg_config_states)
+    return evg_config_changes._replace(
+        cross_product_runs=count_cross_product_runs(evg_config_states, evg_config_changes)
+    )
+
+
+def count_cross_product_runs(
+    evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+) -> int:
+    """
+    Count task runs `evergreen patch` schedules for all changed build variants and tasks.
+
+    Evergreen runs a task on a build variant only if the variant lists it, so those are the
+    changed tasks and task groups listed on changed build variants.
+
+    :param evg_config_states: Original and patched Evergreen project configuration states.
+    :param evg_config_changes: Evergreen project configuration changes.
+    :return: Number of task runs.
+    """
+    listed_tasks = evg_config_states.patched_index.get_listed_tasks_by_variant(
+        evg_config_changes.tasks_and_groups
+    )
+    return sum(
+        len(tasks_and_groups)
+        for variant_name, tasks_and_groups in listed_tasks.items()
+        if variant_name in evg_config_changes.variants
+    )
 
 
 class VerificationOrchestrator:
     """Orchestrator for evergreen config changes verifier."""
 
     @inject.autoparams()
-    def __init__(self, evg_config_service: EvgConfigService) -> None:
+    def __init__(
+        self, evg_config_service: EvgConfigService, task_selection_service: TaskSelectionService
+    ) -> None:
         """
         Initialize.
 
         :param evg_config_service: Service for working with evergreen project configurations.
+        :param task_selection_service: Service for selecting task runs that verify the changes.
         """
         self.evg_config_service = evg_config_service
+        self.task_selection_service = task_selection_service
 
     def get_evg_config_changes(
-        self, evg_project_yaml: Path, target_branch: str
+        self,
+        evg_project_yaml: Path,
+        target_branch: str,
+        use_worktree: bool = False,
+        baseline_snapshot: Optional[Path] = None,
     ) -> EvgConfigChanges:
         """
         Get evergreen project configuration changes.
 
         :param evg_project_yaml: Location of Evergreen project configuration.
         :param target_branch: The branch that patch will be merged into.
+        :param use_worktree: Evaluate the original state in a separate git worktree.
+        :param baseline_snapshot: Baseline snapshot file or directory to load the original state
+            from.
         :return: Evergreen project configuration changes.
         """
-        evg_config_states = self.evg_config_service.get_evg_config_states(
-            evg_project_yaml, target_branch
+        changes_by_project = self.get_evg_config_changes_by_project(
+            [evg_project_yaml],
+            target_branch,
+            use_worktree=use_worktree,
+            baseline_snapshot=baseline_snapshot,
+        )
+        return changes_by_project[evg_project_yaml]
+
+    @PROFILER.profiled("orchestrator")
+    def get_evg_config_changes_by_project(
+        self,
+        evg_project_yamls: List[Path],
+        target_branch: str,
+        use_worktree: bool = False,
+        baseline_snapshot: Optional[Path] = None,
+    ) -> Dict[Path, EvgConfigChanges]:
+        """
+        Get changes of many evergreen project configurations of the repository.
+
+        The configurations share the diff and the checkout of the original state, and are
+        evaluated concurrently.
+
+        :param evg_project_yamls: Locations of Evergreen project configurations.
+        :param target_branch: The branch that patch will be merged into.
+        :param use_worktree: Evaluate the original states in a separate git worktree.
+        :param baseline_snapshot: Baseline snapshot file or directory to load the original states
+            from.
+        :return: Locations of the configurations to their changes.
+        """
+        changes_by_project = {
+            evg_project_yaml: EvgConfigChanges.create_empty()
+            for evg_project_yaml in evg_project_yamls
+        }
+        changed_configs = self.evg_config_service.get_changed_configs(
+            evg_project_yamls, target_branch
+        )
+        for evg_project_yaml in evg_project_yamls:
+            if evg_project_yaml not in changed_configs:
+                LOGGER.info(
+                    "No changes in evergreen project configuration files.",
+                    evg_project_config=str(evg_project_yaml),
+                )
+        if not changed_configs:
+            return changes_by_project
+
+        states_by_project = self.evg_config_service.get_evg_config_states_by_project(
+            changed_configs,
+            target_branch,
+            use_worktree=use_worktree,
+            baseline_snapshot=baseline_snapshot,
         )
-        evg_config_changes = EvgConfigChanges.create_empty()
-        for update in UPDATE_CHECKS:
-            update.check(evg_config_states, evg_config_changes)
-        return evg_config_changes
+        for evg_project_yaml, evg_config_states in states_by_project.items():
+            evg_config_changes = find_evg_config_changes(evg_config_states)
+            changes_by_project[evg_project_yaml] = self.task_selection_service.select(
+                evg_config_states, evg_config_changes
+            )
+        return changes_by_project
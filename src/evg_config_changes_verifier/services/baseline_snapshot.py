@@ -0,0 +1,446 @@
+"""Snapshot files of evaluated and indexed original evergreen project configurations."""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+
+from evg_config_changes_verifier.models.compact_evg_config import (
+    CompactEvgConfig,
+    DisplayTaskRecord,
+    ExpansionReferences,
+    FunctionRecord,
+    TaskGroupRecord,
+    TaskRecord,
+    VariantRecord,
+)
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+LOGGER = structlog.get_logger(__name__)
+
+SNAPSHOT_MAGIC = b"EVGSNAP\0"
+# Bump together with changes of the serialized models, like the cache format version
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_SUFFIX = ".evgsnap"
+# Magic bytes, format version and length of the JSON header that follows
+PREAMBLE = struct.Struct("<8sII")
+
+
+class BaselineSnapshotError(Exception):
+    """Error reading a baseline snapshot file."""
+
+
+def _encode_digests(digests: Dict[str, bytes]) -> Dict[str, str]:
+    """
+    Encode names to digests as JSON serializable map.
+
+    :param digests: Names to canonical digests.
+    :return: Names to hex encoded digests.
+    """
+    return {name: digest.hex() for name, digest in digests.items()}
+
+
+def _decode_digests(digests: Dict[str, str]) -> Dict[str, bytes]:
+    """
+    Decode names to digests from JSON.
+
+    :param digests: Names to hex encoded digests.
+    :return: Names to canonical digests.
+    """
+    return {sys.intern(name): bytes.fromhex(digest) for name, digest in digests.items()}
+
+
+def _decode_names(names: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Decode entity names from JSON, interning them like the records do.
+
+    :param names: Entity names.
+    :return: Interned entity names.
+    """
+    return tuple(sys.intern(name) for name in names)
+
+
+def _encode_references(references: ExpansionReferences) -> Optional[List[str]]:
+    """
+    Encode names of expansions read by commands as JSON serializable list.
+
+    :param references: Names of expansions, None if the commands may read any expansion.
+    :return: Sorted names of expansions, None if the commands may read any expansion.
+    """
+    return None if references is None else sorted(references)
+
+
+def _decode_references(references: Optional[List[str]]) -> ExpansionReferences:
+    """
+    Decode names of expansions read by commands from JSON.
+
+    :param references: Names of expansions, None if the commands may read any expansion.
+    :return: Names of expansions, None if the commands may read any expansion.
+    """
+    return None if references is None else frozenset(_decode_names(references))
+
+
+def _encode_name_sets(name_sets: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    Encode names to sets of names as JSON serializable map.
+
+    :param name_sets: Names to sets of names.
+    :return: Names to sorted lists of names.
+    """
+    return {name: sorted(names) for name, names in name_sets.items()}
+
+
+def _decode_name_sets(name_sets: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """
+    Decode names to sets of names from JSON.
+
+    :param name_sets: Names to lists of names.
+    :return: Names to sets of names.
+    """
+    return {sys.intern(name): set(_decode_names(names)) for name, names in name_sets.items()}
+
+
+def encode_state(evg_config: CompactEvgConfig, index: EvgConfigIndex) -> Dict[str, Any]:
+    """
+    Encode evaluated configuration and its index as JSON serializable data.
+
+    :param evg_config: Compact evaluated configuration.
+    :param index: Index of the configuration.
+    :return: JSON serializable data.
+    """
+    return {
+        "config": {
+            "functions": {
+                name: [function.digest.hex(), _encode_references(function.expansions)]
+                for name, function in evg_config.functions.items()
+            },
+            "tasks": {
+                name: [task.digest.hex(), sorted(task.funcs), _encode_references(task.expansions)]
+                for name, task in evg_config.tasks.items()
+            },
+            "task_groups": {
+                name: [
+                    task_group.digest.hex(),
+                    sorted(task_group.funcs),
+                    list(task_group.tasks),
+                    _encode_references(task_group.expansions),
+                ]
+                for name, task_group in evg_config.task_groups.items()
+            },
+            "variants": {
+                name: {
+                    "expansions": _encode_digests(variant.expansions),
+                    "run_on_digest": variant.run_on_digest.hex(),
+                    "tasks": _encode_digests(variant.tasks),
+                    "display_tasks": {
+                        display_task_name: [
+                            display_task.digest.hex(),
+                            list(display_task.execution_tasks),
+                        ]
+                        for display_task_name, display_task in variant.display_tasks.items()
+                    },
+                    "expansion_references": _encode_name_sets(variant.expansion_references),
+                    "modules": list(variant.modules),
+                }
+                for name, variant in evg_config.variants.items()
+            },
+            "modules": _encode_digests(evg_config.modules),
+            "parameters": _encode_digests(evg_config.parameters),
+            "sections": _encode_digests(evg_config.sections),
+            "project_funcs": _encode_name_sets(evg_config.project_funcs),
+            "project_expansions": _encode_references(evg_config.project_expansions),
+        },
+        "index": {
+            "func_to_tasks": _encode_name_sets(index.func_to_tasks),
+            "func_to_task_groups": _encode_name_sets(index.func_to_task_groups),
+            "task_to_task_groups": _encode_name_sets(index.task_to_task_groups),
+            "task_or_group_to_variants": _encode_name_sets(index.task_or_group_to_variants),
+            "project_funcs": sorted(index.project_funcs),
+            "standalone_tasks": sorted(index.standalone_tasks),
+            "task_or_group_expansions": {
+                name: _encode_references(expansions)
+                for name, expansions in index.task_or_group_expansions.items()
+            },
+        },
+    }
+
+
+def decode_state(data: Dict[str, Any]) -> Tuple[CompactEvgConfig, EvgConfigIndex]:
+    """
+    Rebuild evaluated configuration and its index from JSON data.
+
+    :param data: Data made by `encode_state`.
+    :return: Compact evaluated configuration and its index.
+    """
+    config = data["config"]
+    evg_config = CompactEvgConfig(
+        functions={
+            sys.intern(name): FunctionRecord(
+                digest=bytes.fromhex(digest), expansions=_decode_references(expansions)
+            )
+            for name, (digest, expansions) in config["functions"].items()
+        },
+        tasks={
+            sys.intern(name): TaskRecord(
+                digest=bytes.fromhex(digest),
+                funcs=frozenset(_decode_names(funcs)),
+                expansions=_decode_references(expansions),
+            )
+            for name, (digest, funcs, expansions) in config["tasks"].items()
+        },
+        task_groups={
+            sys.intern(name): TaskGroupRecord(
+                digest=bytes.fromhex(digest),
+                funcs=frozenset(_decode_names(funcs)),
+                tasks=_decode_names(tasks),
+                expansions=_decode_references(expansions),
+            )
+            for name, (digest, funcs, tasks, expansions) in config["task_groups"].items()
+        },
+        variants={
+            sys.intern(name): VariantRecord(
+                expansions=_decode_digests(variant["expansions"]),
+                run_on_digest=bytes.fromhex(variant["run_on_digest"]),
+                tasks=_decode_digests(variant["tasks"]),
+                display_tasks={
+                    sys.intern(display_task_name): DisplayTaskRecord(
+                        digest=bytes.fromhex(digest), execution_tasks=_decode_names(execution_tasks)
+                    )
+                    for display_task_name, (digest, execution_tasks) in variant[
+                        "display_tasks"
+                    ].items()
+                },
+                expansion_references={
+                    sys.intern(expansion): frozenset(_decode_names(references))
+                    for expansion, references in variant["expansion_references"].items()
+                },
+                modules=_decode_names(variant["modules"]),
+            )
+            for name, variant in config["variants"].items()
+        },
+        modules=_decode_digests(config["modules"]),
+        parameters=_decode_digests(config["parameters"]),
+        sections=_decode_digests(config["sections"]),
+        project_funcs={
+            block: frozenset(_decode_names(funcs))
+            for block, funcs in config["project_funcs"].items()
+        },
+        project_expansions=_decode_references(config["project_expansions"]),
+    )
+
+    index = data["index"]
+    return evg_config, EvgConfigIndex(
+        func_to_tasks=_decode_name_sets(index["func_to_tasks"]),
+        func_to_task_groups=_decode_name_sets(index["func_to_task_groups"]),
+        task_to_task_groups=_decode_name_sets(index["task_to_task_groups"]),
+        task_or_group_to_variants=_decode_name_sets(index["task_or_group_to_variants"]),
+        project_funcs=set(_decode_names(index["project_funcs"])),
+        standalone_tasks=set(_decode_names(index["standalone_tasks"])),
+        task_or_group_expansions={
+            sys.intern(name): _decode_references(expansions)
+            for name, expansions in index["task_or_group_expansions"].items()
+        },
+    )
+
+
+def _is_valid_header(header: Any) -> bool:
+    """
+    Check whether a decoded snapshot header has the expected shape.
+
+    :param header: Decoded JSON header.
+    :return: Whether it has the revision, the evaluator name and offsets and lengths of entries.
+    """
+
+    def is_size(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+    return (
+        isinstance(header, dict)
+        and isinstance(header.get("revision"), str)
+        and isinstance(header.get("evaluator"), str)
+        and isinstance(header.get("entries"), dict)
+        and all(
+            isinstance(entry, list) and len(entry) == 2 and all(is_size(v) for v in entry)
+            for entry in header["entries"].values()
+        )
+    )
+
+
+class BaselineSnapshot:
+    """
+    Snapshot file of evaluated and indexed project configurations at a single commit.
+
+    The file starts with a preamble and a JSON header with the commit SHA, the name of the
+    evaluator and locations of the entries relative to the end of the header, followed by a JSON
+    entry with a configuration and its index for every project configuration file. The file is
+    memory-mapped when read and only entries of the requested configurations are decoded.
+
+    Snapshots are shared between developers, so they hold only data: names, hex encoded digests
+    and references between entities. Records are rebuilt from it when loaded, reading a snapshot
+    never runs code from it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        revision: str,
+        evaluator_name: str,
+        entries: Dict[str, Tuple[int, int]],
+    ) -> None:
+        """
+        Initialize.
+
+        :param path: Location of the snapshot file.
+        :param revision: SHA of the commit the configurations were evaluated at.
+        :param evaluator_name: Name of the evaluator that produced the configurations.
+        :param entries: Paths of project configuration files relative to the repository root to
+            offsets in the file and lengths of their entries.
+        """
+        self.path = path
+        self.revision = revision
+        self.evaluator_name = evaluator_name
+        self.entries = entries
+
+    @staticmethod
+    def get_path(path: Path, revision: str) -> Path:
+        """
+        Get location of a snapshot file.
+
+        :param path: Location of the snapshot file, or of a directory with snapshot files named by
+            commit SHAs.
+        :param revision: Commit SHA of the snapshot.
+        :return: Location of the snapshot file.
+        """
+        if path.is_dir():
+            return path / f"{revision}{SNAPSHOT_SUFFIX}"
+        return path
+
+    @classmethod
+    def open(cls, path: Path) -> BaselineSnapshot:
+        """
+        Read the header of a snapshot file.
+
+        :param path: Location of the snapshot file.
+        :return: Snapshot instance.
+        """
+        with open(path, "rb") as snapshot_file:
+            preamble = snapshot_file.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise BaselineSnapshotError(f"'{path}' is not a baseline snapshot.")
+            magic, version, header_length = PREAMBLE.unpack(preamble)
+            if magic != SNAPSHOT_MAGIC:
+                raise BaselineSnapshotError(f"'{path}' is not a baseline snapshot.")
+            if version != SNAPSHOT_FORMAT_VERSION:
+                raise BaselineSnapshotError(
+                    f"'{path}' has format version {version}, {SNAPSHOT_FORMAT_VERSION} is"
+                    " supported."
+                )
+            try:
+                header = json.loads(snapshot_file.read(header_length))
+            except ValueError as err:
+                raise BaselineSnapshotError(f"'{path}' has an invalid header: {err!r}") from err
+        if not _is_valid_header(header):
+            raise BaselineSnapshotError(f"'{path}' has an invalid header.")
+        data_offset = PREAMBLE.size + header_length
+        return cls(
+            path=path,
+            revision=header["revision"],
+            evaluator_name=header["evaluator"],
+            entries={
+                root_file: (data_offset + offset, length)
+                for root_file, (offset, length) in header["entries"].items()
+            },
+        )
+
+    @classmethod
+    @PROFILER.profiled("snapshot")
+    def write(
+        cls,
+        path: Path,
+        revision: str,
+        evaluator_name: str,
+        evg_configs: Dict[str, CompactEvgConfig],
+    ) -> BaselineSnapshot:
+        """
+        Index configurations and write them to a snapshot file.
+
+        :param path: Location of the snapshot file, or of a directory to write it to named by the
+            commit SHA.
+        :param revision: SHA of the commit the configurations were evaluated at.
+        :param evaluator_name: Name of the evaluator that produced the configurations.
+        :param evg_configs: Paths of project configuration files relative to the repository root
+            to their evaluated configurations.
+        :return: Snapshot instance.
+        """
+        payloads = {
+            root_file: json.dumps(
+                encode_state(evg_config, EvgConfigIndex.create(evg_config)),
+                separators=(",", ":"),
+            ).encode()
+            for root_file, evg_config in evg_configs.items()
+        }
+
+        relative_entries = {}
+        position = 0
+        for root_file, payload in payloads.items():
+            relative_entries[root_file] = (position, len(payload))
+            position += len(payload)
+        header = json.dumps(
+            {"revision": revision, "evaluator": evaluator_name, "entries": relative_entries}
+        ).encode()
+
+        path = cls.get_path(path, revision)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that readers never see partial snapshots
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            # Snapshots are meant to be shared, temporary files are private by default
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+                tmp_file.write(header)
+                for payload in payloads.values():
+                    tmp_file.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        LOGGER.info(
+            "Wrote baseline snapshot.", path=str(path), revision=revision, configs=len(payloads)
+        )
+        return cls.open(path)
+
+    @PROFILER.profiled("snapshot")
+    def get(self, root_file: str) -> Optional[Tuple[CompactEvgConfig, EvgConfigIndex]]:
+        """
+        Load evaluated configuration and its index from the snapshot.
+
+        :param root_file: Path of the project configuration file relative to the repository root.
+        :return: Evaluated configuration and its index, None if the snapshot does not have them.
+        """
+        entry = self.entries.get(root_file)
+        if entry is None:
+            return None
+        offset, length = entry
+        with open(self.path, "rb") as snapshot_file:
+            with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if offset + length > len(mapped):
+                    raise BaselineSnapshotError(f"'{self.path}' is truncated.")
+                # Views must be released before the mapping is closed
+                with memoryview(mapped) as view, view[offset : offset + length] as entry_view:
+                    payload = bytes(entry_view)
+        try:
+            return decode_state(json.loads(payload))
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            raise BaselineSnapshotError(
+                f"'{self.path}' has an invalid entry of '{root_file}': {err!r}"
+            ) from err
@@ -0,0 +1,171 @@
+"""Persistent cache of evaluated evergreen project configurations."""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import structlog
+
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+LOGGER = structlog.get_logger(__name__)
+
+CACHE_FORMAT_VERSION = 5
+CACHE_ENTRY_SUFFIX = ".pickle"
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "evg_config_changes_verifier"
+)
+DEFAULT_MAX_SIZE_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_AGE = timedelta(days=30)
+
+
+class EvgConfigCache:
+    """
+    Content-addressed on-disk cache of evaluated evergreen project configurations.
+
+    Entries are keyed by the git blob hashes of the project configuration file and all the files
+    it includes, so they never go stale. Least recently used entries are evicted when the cache
+    grows beyond its size limit or when they were not used for longer than the maximum age.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path],
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+        max_age: timedelta = DEFAULT_MAX_AGE,
+    ) -> None:
+        """
+        Initialize.
+
+        :param cache_dir: Directory to store cache entries in, None to disable the cache.
+        :param max_size_bytes: Maximum total size of cache entries.
+        :param max_age: Maximum time since the last use of a cache entry.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.max_age = max_age
+
+    @classmethod
+    def create(cls, enabled: bool = True, cache_dir: Path = DEFAULT_CACHE_DIR) -> EvgConfigCache:
+        """
+        Create evaluated configurations cache instance.
+
+        :param enabled: Whether the cache should be used.
+        :param cache_dir: Directory to store cache entries in.
+        :return: Evaluated configurations cache instance.
+        """
+        return cls(cache_dir if enabled else None)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is used."""
+        return self.cache_dir is not None
+
+    @staticmethod
+    def make_key(root_file: str, blob_hashes: Dict[str, str], evaluator_name: str) -> str:
+        """
+        Make a cache key for an evaluated evergreen project configuration.
+
+        :param root_file: Path of the project configuration file relative to the repository root.
+        :param blob_hashes: Git blob hashes of all files in the include closure.
+        :param evaluator_name: Name of the evaluator that produced the configuration.
+        :return: Cache key.
+        """
+        key_hash = hashlib.sha256(
+            f"v{CACHE_FORMAT_VERSION}\0{evaluator_name}\0{root_file}\0".encode()
+        )
+        for path, blob_hash in sorted(blob_hashes.items()):
+            key_hash.update(f"{path}\0{blob_hash}\0".encode())
+        return key_hash.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        """
+        Get location of a cache entry.
+
+        :param key: Cache key.
+        :return: Location of the cache entry.
+        """
+        return self.cache_dir / f"{key}{CACHE_ENTRY_SUFFIX}"
+
+    @PROFILER.profiled("cache")
+    def get(self, key: str) -> Optional[CompactEvgConfig]:
+        """
+        Get evaluated configuration from the cache.
+
+        :param key: Cache key.
+        :return: Evaluated configuration, None if there is no such entry.
+        """
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                evg_config = pickle.load(entry_file)
+            # Modification time tracks the last use for LRU eviction
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as err:
+            LOGGER.warning(
+                "Dropping unreadable cache entry.", entry=str(entry_path), error=str(err)
+            )
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        LOGGER.debug("Found evaluated configuration in cache.", key=key)
+        return evg_config
+
+    @PROFILER.profiled("cache")
+    def put(self, key: str, evg_config: CompactEvgConfig) -> None:
+        """
+        Store evaluated configuration in the cache and evict stale entries.
+
+        :param key: Cache key.
+        :param evg_config: Evaluated configuration.
+        """
+        if not self.enabled:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that concurrent runs never read partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                pickle.dump(evg_config, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        LOGGER.debug("Stored evaluated configuration in cache.", key=key)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove entries that are too old and least recently used entries beyond size limit."""
+        if not self.enabled or not self.cache_dir.exists():
+            return
+
+        entries = []
+        for entry_path in self.cache_dir.glob(f"*{CACHE_ENTRY_SUFFIX}"):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        min_mtime = time.time() - self.max_age.total_seconds()
+        total_size = sum(size for _, size, _ in entries)
+        for mtime, size, entry_path in sorted(entries):
+            if mtime >= min_mtime and total_size <= self.max_size_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+            LOGGER.debug("Evicted cache entry.", entry=str(entry_path))
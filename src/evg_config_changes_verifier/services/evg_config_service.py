@@ -1,53 +1,544 @@
 """Service for working with evergreen project configurations."""
+import os
 import tempfile
+from contextlib import ExitStack, contextmanager
+from functools import partial
 from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
 
 import inject
 import structlog
-import yaml
 
 from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
 from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
-from evg_config_changes_verifier.models.evg_models import EvgConfigStates
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+from evg_config_changes_verifier.models.evg_models import EvgConfigStates, EvgIncludeClosure
+from evg_config_changes_verifier.services.baseline_snapshot import (
+    BaselineSnapshot,
+    BaselineSnapshotError,
+)
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.utils.profiler import PROFILER
 
 LOGGER = structlog.get_logger(__name__)
 
+# Maximum number of checkouts that exist, and of evaluations that run, at the same time
+MAX_CONCURRENT_EVALUATIONS = os.cpu_count() or 1
+
 
 class EvgConfigService:
     """Service for working with evergreen project configurations."""
 
     @inject.autoparams()
-    def __init__(self, git_cli_proxy: GitCliProxy, evg_cli_proxy: EvgCliProxy) -> None:
+    def __init__(
+        self,
+        git_cli_proxy: GitCliProxy,
+        evg_cli_proxy: EvgCliProxy,
+        evg_include_service: EvgIncludeService,
+        evg_config_cache: EvgConfigCache,
+    ) -> None:
         """
         Initialize.
 
         :param git_cli_proxy: Proxy for interacting with Git CLI.
         :param evg_cli_proxy: Proxy for interacting with Evergreen CLI.
+        :param evg_include_service: Service for discovering included configuration files.
+        :param evg_config_cache: Cache of evaluated configurations.
         """
         self.git_cli_proxy = git_cli_proxy
         self.evg_cli_proxy = evg_cli_proxy
+        self.evg_include_service = evg_include_service
+        self.evg_config_cache = evg_config_cache
+
+    def has_config_changes(self, evg_project_yaml: Path, target_branch: str) -> bool:
+        """
+        Check whether local changes touch any file of the Evergreen project configuration.
+
+        Only the `include` sections of the configuration files are read, nothing is evaluated.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param target_branch: The branch that patch will be merged into.
+        :return: Whether any file in the include closure of the configuration is changed, True
+            if the include closure could not be resolved.
+        """
+        return len(self.get_changed_configs([evg_project_yaml], target_branch)) > 0
+
+    @PROFILER.profiled("service")
+    def get_changed_configs(self, evg_project_yamls: List[Path], target_branch: str) -> List[Path]:
+        """
+        Get Evergreen project configurations with any of their files touched by local changes.
+
+        Changed files are listed once for all the configurations.
+
+        :param evg_project_yamls: Locations of Evergreen project configurations.
+        :param target_branch: The branch that patch will be merged into.
+        :return: Locations of changed configurations and of the ones whose include closure could
+            not be resolved, in the given order.
+        """
+        changed_files = set(
+            self.git_cli_proxy.diff(
+                no_pager=True, target_branch=target_branch, output_file=None, name_only=True
+            ).splitlines()
+        )
+        changed_configs = []
+        for evg_project_yaml in evg_project_yamls:
+            closure = self.evg_include_service.get_include_closure_files(evg_project_yaml)
+            if closure is None or not changed_files.isdisjoint(closure):
+                changed_configs.append(evg_project_yaml)
+        return changed_configs
 
-    def get_evg_config_states(self, evg_project_yaml: Path, target_branch: str) -> EvgConfigStates:
+    def get_evg_config_states(
+        self,
+        evg_project_yaml: Path,
+        target_branch: str,
+        use_worktree: bool = False,
+        baseline_snapshot: Optional[Path] = None,
+    ) -> EvgConfigStates:
         """
         Get evaluated original and patched Evergreen project configuration states.
 
         :param evg_project_yaml: Location of Evergreen project configuration.
         :param target_branch: The branch that patch will be merged into.
+        :param use_worktree: Evaluate the original state in a separate checkout.
+        :param baseline_snapshot: Location of a snapshot file, or of a directory of snapshot files,
+            to load the original state from.
         :return: Original and patched Evergreen project configuration states.
         """
+        states = self.get_evg_config_states_by_project(
+            [evg_project_yaml],
+            target_branch,
+            use_worktree=use_worktree,
+            baseline_snapshot=baseline_snapshot,
+        )
+        return states[evg_project_yaml]
+
+    @PROFILER.profiled("service")
+    def get_evg_config_states_by_project(
+        self,
+        evg_project_yamls: List[Path],
+        target_branch: str,
+        use_worktree: bool = False,
+        baseline_snapshot: Optional[Path] = None,
+    ) -> Dict[Path, EvgConfigStates]:
+        """
+        Get evaluated original and patched states of many Evergreen project configurations.
+
+        Original states are loaded from the baseline snapshot of the merge-base if there is one,
+        the other ones are taken from a single checkout of the merge-base, all the evaluations
+        that are not cached run concurrently.
+
+        :param evg_project_yamls: Locations of Evergreen project configurations.
+        :param target_branch: The branch that patch will be merged into.
+        :param use_worktree: Evaluate the original states in a separate checkout.
+        :param baseline_snapshot: Location of a snapshot file, or of a directory of snapshot files,
+            to load the original states from.
+        :return: Locations of the configurations to their original and patched states.
+        """
+        merge_base = self.git_cli_proxy.merge_base(target_branch)
+        closures: Dict[Path, Optional[EvgIncludeClosure]] = {}
+        cache_keys: Dict[Path, Optional[str]] = {}
+        original_configs: Dict[Path, CompactEvgConfig] = {}
+        original_indexes: Dict[Path, EvgConfigIndex] = {}
+        if baseline_snapshot is not None:
+            for evg_project_yaml, (original_config, original_index) in self._load_baseline_snapshot(
+                baseline_snapshot, evg_project_yamls, merge_base
+            ).items():
+                original_configs[evg_project_yaml] = original_config
+                original_indexes[evg_project_yaml] = original_index
+        from_snapshot = len(original_configs)
+
+        for evg_project_yaml in evg_project_yamls:
+            if evg_project_yaml in original_configs:
+                continue
+            closure = None
+            if self.evg_config_cache.enabled or use_worktree:
+                closure = self.evg_include_service.get_include_closure(evg_project_yaml, merge_base)
+            closures[evg_project_yaml] = closure
+            cache_key = self._get_cache_key(closure)
+            cache_keys[evg_project_yaml] = cache_key
+            original_config = (
+                self.evg_config_cache.get(cache_key) if cache_key is not None else None
+            )
+            if original_config is not None:
+                original_configs[evg_project_yaml] = original_config
+
+        missing = [path for path in evg_project_yamls if path not in original_configs]
+        if not missing:
+            patched_configs = self.evg_cli_proxy.evaluate_configs(
+                [(evg_project_yaml, None) for evg_project_yaml in evg_project_yamls]
+            )
+        elif use_worktree:
+            closure = self._merge_closures([closures[path] for path in missing])
+            with self._checkout_revision(merge_base, closure) as original_cwd:
+                evaluated = self.evg_cli_proxy.evaluate_configs(
+                    [
+                        (self._get_checkout_location(evg_project_yaml), original_cwd)
+                        for evg_project_yaml in missing
+                    ]
+                    + [(evg_project_yaml, None) for evg_project_yaml in evg_project_yamls]
+                )
+            original_configs.update(zip(missing, evaluated[: len(missing)]))
+            patched_configs = evaluated[len(missing) :]
+        else:
+            evaluated_originals, patched_configs = self._evaluate_with_reversed_patch(
+                missing, evg_project_yamls, merge_base
+            )
+            original_configs.update(zip(missing, evaluated_originals))
+        LOGGER.info(
+            "Evaluated original and patched evergreen project configuration files.",
+            merge_base=merge_base,
+            configs=len(evg_project_yamls),
+            originals_from_snapshot=from_snapshot,
+            originals_from_cache=len(evg_project_yamls) - len(missing) - from_snapshot,
+        )
+
+        for evg_project_yaml in missing:
+            cache_key = cache_keys[evg_project_yaml]
+            if cache_key is not None:
+                self.evg_config_cache.put(cache_key, original_configs[evg_project_yaml])
+
+        return {
+            evg_project_yaml: EvgConfigStates.create(
+                original_config=original_configs[evg_project_yaml],
+                patched_config=patched_config,
+                original_index=original_indexes.get(evg_project_yaml),
+            )
+            for evg_project_yaml, patched_config in zip(evg_project_yamls, patched_configs)
+        }
+
+    def _load_baseline_snapshot(
+        self, baseline_snapshot: Path, evg_project_yamls: List[Path], merge_base: str
+    ) -> Dict[Path, Tuple[CompactEvgConfig, EvgConfigIndex]]:
+        """
+        Load original states of configurations from a baseline snapshot of the merge-base.
+
+        Snapshots of other commits or made by another evaluator are not used, the original states
+        are evaluated then.
+
+        :param baseline_snapshot: Location of a snapshot file, or of a directory of snapshot files
+            named by commit SHAs.
+        :param evg_project_yamls: Locations of Evergreen project configurations.
+        :param merge_base: Merge-base commit the original states are taken from.
+        :return: Locations of the configurations in the snapshot to their original states and
+            indexes.
+        """
+        snapshot_path = BaselineSnapshot.get_path(baseline_snapshot, merge_base)
+        try:
+            snapshot = BaselineSnapshot.open(snapshot_path)
+        except (OSError, ValueError, KeyError, BaselineSnapshotError) as err:
+            LOGGER.warning(
+                "Could not read baseline snapshot.", path=str(snapshot_path), error=str(err)
+            )
+            return {}
+        if snapshot.revision != merge_base:
+            LOGGER.warning(
+                "Baseline snapshot is of another commit than the merge-base.",
+                snapshot_revision=snapshot.revision,
+                merge_base=merge_base,
+            )
+            return {}
+        if snapshot.evaluator_name != self.evg_cli_proxy.evaluator_name:
+            LOGGER.warning(
+                "Baseline snapshot is made by another evaluator.",
+                snapshot_evaluator=snapshot.evaluator_name,
+                evaluator=self.evg_cli_proxy.evaluator_name,
+            )
+            return {}
+
+        states = {}
+        for evg_project_yaml in evg_project_yamls:
+            root_file = self.evg_include_service.get_repo_relative_path(evg_project_yaml)
+            try:
+                state = snapshot.get(root_file)
+            except (OSError, BaselineSnapshotError) as err:
+                LOGGER.warning(
+                    "Could not read baseline snapshot entry.",
+                    path=str(snapshot_path),
+                    root_file=root_file,
+                    error=str(err),
+                )
+                continue
+            if state is not None:
+                states[evg_project_yaml] = state
+        return states
+
+    @PROFILER.profiled("service")
+    def write_baseline_snapshot(
+        self, evg_project_yamls: List[Path], revision: str, output: Path
+    ) -> BaselineSnapshot:
+        """
+        Evaluate configurations at a commit and write them to a baseline snapshot.
+
+        :param evg_project_yamls: Locations of Evergreen project configurations.
+        :param revision: Revision to evaluate the configurations at.
+        :param output: Location of the snapshot file, or of a directory to write it to named by
+            the commit SHA.
+        :return: Written snapshot.
+        """
+        (commit,) = self.git_cli_proxy.rev_parse(f"{revision}^{{commit}}")
+        evg_configs = {}
+        for evg_project_yaml in evg_project_yamls:
+            (
+                evg_configs[self.evg_include_service.get_repo_relative_path(evg_project_yaml)],
+            ) = self.evaluate_revisions(evg_project_yaml, [commit])
+        return BaselineSnapshot.write(
+            output, commit, self.evg_cli_proxy.evaluator_name, evg_configs
+        )
+
+    @staticmethod
+    def _merge_closures(closures: List[Optional[EvgIncludeClosure]]) -> Optional[EvgIncludeClosure]:
+        """
+        Merge include closures of configurations at the same revision.
+
+        :param closures: Include closures of the configurations.
+        :return: Include closure with the files of all of them, None if any of them is unknown.
+        """
+        if any(closure is None for closure in closures):
+            return None
+        contents: Dict[str, str] = {}
+        blob_hashes: Dict[str, str] = {}
+        for closure in closures:
+            contents.update(closure.contents)
+            blob_hashes.update(closure.blob_hashes)
+        return EvgIncludeClosure(
+            root_file=closures[0].root_file, contents=contents, blob_hashes=blob_hashes
+        )
+
+    @PROFILER.profiled("service")
+    def evaluate_revisions(
+        self, evg_project_yaml: Path, revisions: List[str]
+    ) -> List[CompactEvgConfig]:
+        """
+        Evaluate Evergreen project configuration at the given revisions.
+
+        Revisions with the same include closure content are evaluated only once and get the same
+        configuration object, the evaluations that are not cached run concurrently in windows of
+        `MAX_CONCURRENT_EVALUATIONS` checkouts.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param revisions: Revisions to evaluate the configuration at.
+        :return: Evaluated configurations in the same order as revisions.
+        """
+        state_keys = []
+        closures: Dict[str, Tuple[str, Optional[EvgIncludeClosure]]] = {}
+        for revision in revisions:
+            closure = self.evg_include_service.get_include_closure(evg_project_yaml, revision)
+            state_key = self.get_state_key(closure) if closure is not None else revision
+            state_keys.append(state_key)
+            closures.setdefault(state_key, (revision, closure))
+
+        configs = {}
+        missing = []
+        for state_key, (revision, closure) in closures.items():
+            cache_key = self._get_cache_key(closure)
+            config = self.evg_config_cache.get(cache_key) if cache_key is not None else None
+            if config is None:
+                missing.append((state_key, cache_key, revision, closure))
+            else:
+                configs[state_key] = config
+
+        if missing:
+            evaluated = self._evaluate_checkouts(
+                evg_project_yaml,
+                [
+                    partial(self._checkout_revision, revision, closure)
+                    for _, _, revision, closure in missing
+                ],
+            )
+            for (state_key, cache_key, _, _), config in zip(missing, evaluated):
+                configs[state_key] = config
+                if cache_key is not None:
+                    self.evg_config_cache.put(cache_key, config)
+
+        LOGGER.info(
+            "Evaluated evergreen project configuration at revisions.",
+            revisions=len(revisions),
+            distinct_states=len(closures),
+            evaluated=len(missing),
+        )
+        return [configs[state_key] for state_key in state_keys]
+
+    @PROFILER.profiled("service")
+    def evaluate_closures(
+        self, evg_project_yaml: Path, closures: List[EvgIncludeClosure]
+    ) -> List[CompactEvgConfig]:
+        """
+        Evaluate Evergreen project configuration with the files of the given include closures.
+
+        The closures may have files that are not committed anywhere, e.g. edited in memory, they
+        are evaluated in temporary checkouts concurrently, a window of them at a time, and cached
+        by their content.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param closures: Include closures to evaluate the configuration with.
+        :return: Evaluated configurations in the same order as closures.
+        """
+        configs = {}
+        missing = []
+        for position, closure in enumerate(closures):
+            cache_key = self._get_cache_key(closure)
+            config = self.evg_config_cache.get(cache_key) if cache_key is not None else None
+            if config is None:
+                missing.append((position, cache_key, closure))
+            else:
+                configs[position] = config
+
+        if missing:
+            evaluated = self._evaluate_checkouts(
+                evg_project_yaml,
+                [partial(self._checkout_closure, closure) for _, _, closure in missing],
+            )
+            for (position, cache_key, _), config in zip(missing, evaluated):
+                configs[position] = config
+                if cache_key is not None:
+                    self.evg_config_cache.put(cache_key, config)
+        return [configs[position] for position in range(len(closures))]
+
+    def _evaluate_checkouts(
+        self, evg_project_yaml: Path, checkouts: List[Callable[[], ContextManager[Path]]]
+    ) -> List[CompactEvgConfig]:
+        """
+        Evaluate Evergreen project configuration in checkouts, a window of them at a time.
+
+        At most `MAX_CONCURRENT_EVALUATIONS` checkouts exist and are evaluated concurrently, the
+        checkouts of a window are removed before the next window is checked out.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param checkouts: Functions creating checkouts, each returning a context manager of the
+            directory within the checkout that matches the current working directory.
+        :return: Evaluated configurations in the same order as checkouts.
+        """
+        checkout_location = self._get_checkout_location(evg_project_yaml)
+        evaluated = []
+        for start in range(0, len(checkouts), MAX_CONCURRENT_EVALUATIONS):
+            with ExitStack() as stack:
+                cwds = [
+                    stack.enter_context(checkout())
+                    for checkout in checkouts[start : start + MAX_CONCURRENT_EVALUATIONS]
+                ]
+                evaluated.extend(
+                    self.evg_cli_proxy.evaluate_configs([(checkout_location, cwd) for cwd in cwds])
+                )
+        return evaluated
+
+    def get_state_key(self, closure: EvgIncludeClosure) -> str:
+        """
+        Get key that identifies the evaluated configuration of an include closure.
+
+        :param closure: Include closure of the configuration.
+        :return: Configuration state key.
+        """
+        return self.evg_config_cache.make_key(
+            closure.root_file, closure.blob_hashes, self.evg_cli_proxy.evaluator_name
+        )
+
+    def _get_cache_key(self, closure: Optional[EvgIncludeClosure]) -> Optional[str]:
+        """
+        Get cache key of an evaluated configuration.
+
+        :param closure: Include closure of the configuration.
+        :return: Cache key, None if the cache is disabled or the configuration cannot be cached.
+        """
+        if not self.evg_config_cache.enabled or closure is None:
+            return None
+        return self.get_state_key(closure)
+
+    @PROFILER.profiled("service")
+    def _evaluate_with_reversed_patch(
+        self, original_yamls: List[Path], patched_yamls: List[Path], merge_base: str
+    ) -> Tuple[List[CompactEvgConfig], List[CompactEvgConfig]]:
+        """
+        Evaluate original states by temporarily reverse-applying changes to the working tree.
+
+        Changes are reverse-applied once for all the configurations.
+
+        :param original_yamls: Locations of Evergreen project configurations to evaluate the
+            original states of.
+        :param patched_yamls: Locations of Evergreen project configurations to evaluate the
+            patched states of.
+        :param merge_base: Merge-base commit the original states are taken from.
+        :return: Evaluated original and patched configurations in the given orders.
+        """
         with tempfile.NamedTemporaryFile() as tf:
             patch_file_path = Path(tf.name)
             self.git_cli_proxy.diff(
-                no_pager=True, target_branch=target_branch, output_file=patch_file_path
+                no_pager=True, target_branch=merge_base, output_file=patch_file_path
             )
             self.git_cli_proxy.apply(patch_file=patch_file_path, reverse=True)
             try:
-                original_yaml = yaml.safe_load(self.evg_cli_proxy.evaluate(evg_project_yaml))
+                original_configs = self.evg_cli_proxy.evaluate_configs(
+                    [(evg_project_yaml, None) for evg_project_yaml in original_yamls]
+                )
             finally:
                 # Make sure that we don't mess up local git repo state
                 self.git_cli_proxy.apply(patch_file=patch_file_path)
 
-        patched_yaml = yaml.safe_load(self.evg_cli_proxy.evaluate(evg_project_yaml))
-        LOGGER.info("Evaluated original and patched evergreen project configuration files.")
+        patched_configs = self.evg_cli_proxy.evaluate_configs(
+            [(evg_project_yaml, None) for evg_project_yaml in patched_yamls]
+        )
+        return original_configs, patched_configs
+
+    @staticmethod
+    def _get_checkout_location(evg_project_yaml: Path) -> Path:
+        """
+        Get location of a configuration to evaluate it at in a checkout.
+
+        Checkouts match the current working directory, an absolute location would point to the
+        file in the working tree instead of the one in the checkout.
 
-        return EvgConfigStates(original_yaml=original_yaml, patched_yaml=patched_yaml)
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :return: Location relative to the current working directory.
+        """
+        return Path(os.path.relpath(evg_project_yaml, Path.cwd()))
+
+    @contextmanager
+    def _checkout_revision(
+        self, revision: str, closure: Optional[EvgIncludeClosure]
+    ) -> Iterator[Path]:
+        """
+        Check out configuration files at the given revision into a temporary directory.
+
+        Only the include closure files are written if it is known, otherwise the whole revision is
+        checked out into a temporary git worktree.
+
+        :param revision: Revision to check out.
+        :param closure: Include closure of the configuration at the revision.
+        :return: Directory within the checkout that matches the current working directory.
+        """
+        if closure is not None:
+            with self._checkout_closure(closure) as cwd:
+                yield cwd
+            return
+
+        repo_root = self.git_cli_proxy.show_toplevel()
+        relative_cwd = Path.cwd().resolve().relative_to(repo_root.resolve())
+        with tempfile.TemporaryDirectory(prefix="evg-config-") as tmp_dir:
+            checkout_path = Path(tmp_dir) / "checkout"
+            # Clean up worktrees left behind by runs that were killed
+            self.git_cli_proxy.worktree_prune()
+            self.git_cli_proxy.worktree_add(checkout_path, revision)
+            try:
+                yield checkout_path / relative_cwd
+            finally:
+                self.git_cli_proxy.worktree_remove(checkout_path)
+
+    @contextmanager
+    def _checkout_closure(self, closure: EvgIncludeClosure) -> Iterator[Path]:
+        """
+        Write files of an include closure into a temporary directory.
+
+        :param closure: Include closure of the configuration.
+        :return: Directory within the checkout that matches the current working directory.
+        """
+        repo_root = self.git_cli_proxy.show_toplevel()
+        relative_cwd = Path.cwd().resolve().relative_to(repo_root.resolve())
+        with tempfile.TemporaryDirectory(prefix="evg-config-") as tmp_dir:
+            checkout_path = Path(tmp_dir) / "checkout"
+            for path, content in closure.contents.items():
+                file_path = checkout_path / path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_text(content)
+            (checkout_path / relative_cwd).mkdir(parents=True, exist_ok=True)
+            yield checkout_path / relative_cwd
@@ -0,0 +1,225 @@
+"""Service for discovering files included by evergreen project configurations."""
+import functools
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import inject
+import structlog
+import yaml
+
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.git_object_reader import GitObjectError, hash_blob
+from evg_config_changes_verifier.models.evg_models import EvgInclude, EvgIncludeClosure
+from evg_config_changes_verifier.utils.profiler import PROFILER
+from evg_config_changes_verifier.utils.yaml_utils import SafeLoader
+
+LOGGER = structlog.get_logger(__name__)
+
+INCLUDE_KEY_PATTERN = re.compile(r"^include\s*:", re.MULTILINE)
+
+
+def _read_plain_value(events: Iterator[yaml.Event], event: yaml.Event) -> Any:
+    """
+    Read a node from YAML events as plain python objects with string scalars.
+
+    :param events: YAML events following the given event.
+    :param event: First event of the node.
+    :return: Node value.
+    """
+    if isinstance(event, yaml.ScalarEvent):
+        return event.value
+    if isinstance(event, yaml.SequenceStartEvent):
+        items = []
+        for item_event in events:
+            if isinstance(item_event, yaml.SequenceEndEvent):
+                return items
+            items.append(_read_plain_value(events, item_event))
+    if isinstance(event, yaml.MappingStartEvent):
+        mapping = {}
+        for key_event in events:
+            if isinstance(key_event, yaml.MappingEndEvent):
+                return mapping
+            key = _read_plain_value(events, key_event)
+            mapping[key] = _read_plain_value(events, next(events))
+    return None
+
+
+def _skip_value(events: Iterator[yaml.Event], event: yaml.Event) -> None:
+    """
+    Skip a node in YAML events without constructing it.
+
+    :param events: YAML events following the given event.
+    :param event: First event of the node.
+    """
+    if not isinstance(event, yaml.CollectionStartEvent):
+        return
+    depth = 1
+    for nested_event in events:
+        if isinstance(nested_event, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(nested_event, yaml.CollectionEndEvent):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+@functools.lru_cache(maxsize=256)
+def parse_includes(config_text: str) -> Tuple[EvgInclude, ...]:
+    """
+    Find files included by an evergreen project configuration file.
+
+    Only the top-level `include` section is read from the YAML event stream, the rest of the
+    document is skipped without constructing it. Results are cached, files included by many
+    project configurations are parsed once.
+
+    :param config_text: Content of evergreen project configuration file.
+    :return: Included files.
+    """
+    if not INCLUDE_KEY_PATTERN.search(config_text):
+        return ()
+
+    events = yaml.parse(config_text, Loader=SafeLoader)
+    for event in events:
+        if isinstance(event, yaml.MappingStartEvent):
+            break
+    else:
+        return ()
+
+    for key_event in events:
+        if isinstance(key_event, yaml.MappingEndEvent):
+            break
+        key = _read_plain_value(events, key_event)
+        value_event = next(events)
+        if key == "include":
+            include_entries = _read_plain_value(events, value_event) or []
+            return tuple(
+                EvgInclude(filename=entry["filename"], module=entry.get("module"))
+                for entry in include_entries
+                if isinstance(entry, dict) and "filename" in entry
+            )
+        _skip_value(events, value_event)
+    return ()
+
+
+def read_include_closure(
+    root_file: str, read_files: Callable[[List[str]], Dict[str, str]]
+) -> Optional[Dict[str, str]]:
+    """
+    Read the evergreen project configuration file and all the files it includes recursively.
+
+    Files are read a level of includes at a time.
+
+    :param root_file: Path of the project configuration file relative to the repository root.
+    :param read_files: Function to read files by the paths relative to the repository root.
+    :return: Map of paths of all the files in the include closure to their contents, None if the
+        closure includes files from modules that cannot be resolved locally.
+    """
+    contents: Dict[str, str] = {}
+    pending = [root_file]
+    while pending:
+        contents.update(read_files(pending))
+        included = []
+        for filename in pending:
+            for include in parse_includes(contents[filename]):
+                if include.module is not None:
+                    LOGGER.debug("Include closure contains module files.", include=include)
+                    return None
+                if include.filename not in contents and include.filename not in included:
+                    included.append(include.filename)
+        pending = included
+    return contents
+
+
+class EvgIncludeService:
+    """Service for discovering files included by evergreen project configurations."""
+
+    @inject.autoparams()
+    def __init__(self, git_cli_proxy: GitCliProxy) -> None:
+        """
+        Initialize.
+
+        :param git_cli_proxy: Proxy for interacting with Git CLI.
+        """
+        self.git_cli_proxy = git_cli_proxy
+
+    def get_repo_relative_path(self, evg_project_yaml: Path) -> str:
+        """
+        Get location of the evergreen project configuration relative to the repository root.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :return: Path relative to the repository root.
+        """
+        repo_root = self.git_cli_proxy.show_toplevel().resolve()
+        return Path(evg_project_yaml).resolve().relative_to(repo_root).as_posix()
+
+    @PROFILER.profiled("include")
+    def get_include_closure_files(self, evg_project_yaml: Path) -> Optional[List[str]]:
+        """
+        Get the project configuration and all its included files in the local working tree.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :return: Paths of the files relative to the repository root, None if the include closure
+            could not be resolved, e.g. because a file is not valid YAML.
+        """
+        repo_root = self.git_cli_proxy.show_toplevel()
+        root_file = self.get_repo_relative_path(evg_project_yaml)
+        try:
+            contents = read_include_closure(
+                root_file, lambda paths: {path: (repo_root / path).read_text() for path in paths}
+            )
+        except (OSError, UnicodeDecodeError, yaml.YAMLError) as err:
+            LOGGER.debug("Could not resolve include closure.", error=str(err))
+            return None
+        return list(contents) if contents is not None else None
+
+    @PROFILER.profiled("include")
+    def get_include_closure(
+        self,
+        evg_project_yaml: Path,
+        revision: Optional[str],
+        overrides: Optional[Dict[str, str]] = None,
+    ) -> Optional[EvgIncludeClosure]:
+        """
+        Read the project configuration and all its included files at the given revision.
+
+        Files of the working tree and overridden files get the blob hashes git would give them.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param revision: Revision to read the files at, None for the local working tree.
+        :param overrides: Paths of files relative to the repository root to contents to use
+            instead of the ones at the revision.
+        :return: Include closure, None if it could not be resolved, e.g. because a file is not
+            valid YAML.
+        """
+        root_file = self.get_repo_relative_path(evg_project_yaml)
+        repo_root = self.git_cli_proxy.show_toplevel()
+        overrides = overrides or {}
+        blob_hashes = {}
+
+        def read_files(paths: List[str]) -> Dict[str, str]:
+            files = {path: overrides[path] for path in paths if path in overrides}
+            pending = [path for path in paths if path not in files]
+            if revision is None:
+                files.update((path, (repo_root / path).read_bytes().decode()) for path in pending)
+            elif pending:
+                blobs = self.git_cli_proxy.read_blobs(revision, pending)
+                blob_hashes.update((path, blob.oid) for path, blob in blobs.items())
+                files.update((path, blob.content.decode()) for path, blob in blobs.items())
+            for path, content in files.items():
+                if path not in blob_hashes:
+                    blob_hashes[path] = hash_blob(content.encode())
+            return files
+
+        try:
+            contents = read_include_closure(root_file, read_files)
+        except (OSError, GitObjectError, UnicodeDecodeError, yaml.YAMLError) as err:
+            LOGGER.debug("Could not resolve include closure.", revision=revision, error=str(err))
+            return None
+        if contents is None:
+            return None
+        return EvgIncludeClosure(
+            root_file=root_file,
+            contents=contents,
+            blob_hashes={path: blob_hashes[path] for path in contents},
+        )
@@ -0,0 +1,401 @@
+"""SQLite index of evergreen project configuration entities along first-parent history."""
+from __future__ import annotations
+
+import hashlib
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+from evg_config_changes_verifier.models.compact_evg_config import (
+    CompactEvgConfig,
+    FunctionRecord,
+    TaskGroupRecord,
+    TaskRecord,
+)
+from evg_config_changes_verifier.services.evg_config_cache import CACHE_FORMAT_VERSION
+from evg_config_changes_verifier.utils.config_hasher import ConfigHasher
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+LOGGER = structlog.get_logger(__name__)
+
+# Bump together with changes of the schema, changes of the indexed records bump the cache format
+HISTORY_FORMAT_VERSION = f"2.{CACHE_FORMAT_VERSION}"
+HISTORY_INDEX_SUFFIX = ".sqlite"
+# Kinds of indexed entities, named after the compact configuration fields they are kept in
+ENTITY_KINDS = (
+    "functions",
+    "tasks",
+    "task_groups",
+    "variants",
+    "modules",
+    "parameters",
+    "sections",
+    "project_funcs",
+)
+# Kind of the single entity with expansions referenced by project-level blocks
+PROJECT_EXPANSIONS_KIND = "project_expansions"
+
+TABLES = ("meta", "commits", "records", "versions")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+    position INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    evaluated INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (kind, digest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS versions (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    first_position INTEGER NOT NULL,
+    last_position INTEGER
+);
+CREATE INDEX IF NOT EXISTS versions_by_name ON versions (kind, name, last_position);
+CREATE INDEX IF NOT EXISTS versions_by_first ON versions (first_position);
+CREATE INDEX IF NOT EXISTS versions_by_last ON versions (last_position);
+"""
+
+# Entity kind and name
+EntityKey = Tuple[str, str]
+
+
+class HistoryIndexError(Exception):
+    """Error using the history index."""
+
+
+def default_history_index_path(cache_dir: Path, repo_dir: Path, root_file: str) -> Path:
+    """
+    Get default location of the history index of a project configuration of a repository.
+
+    :param cache_dir: Cache directory of the verifier.
+    :param repo_dir: Top-level directory of the repository.
+    :param root_file: Path of the project configuration file relative to the repository root.
+    :return: Location of the history index.
+    """
+    key = hashlib.sha1(f"{repo_dir.resolve()}\0{root_file}".encode()).hexdigest()[:16]
+    return cache_dir / "history" / f"{key}{HISTORY_INDEX_SUFFIX}"
+
+
+def _canonicalize(value: Any) -> Any:
+    """
+    Convert an entity record into a structure with a canonical digest.
+
+    :param value: Entity record or a part of it.
+    :return: Structure made of mappings, lists and scalars.
+    """
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {key: _canonicalize(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: _canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, tuple):
+        return [_canonicalize(item) for item in value]
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def get_entity_digest(record: Any) -> bytes:
+    """
+    Get canonical digest of an entity record.
+
+    :param record: Entity record.
+    :return: Canonical digest.
+    """
+    # These records are made from the definitions their digests are of and nothing else
+    if isinstance(record, (FunctionRecord, TaskRecord, TaskGroupRecord)):
+        return record.digest
+    if isinstance(record, bytes):
+        return record
+    return ConfigHasher().digest(_canonicalize(record))
+
+
+def get_entities(evg_config: CompactEvgConfig) -> Dict[EntityKey, Any]:
+    """
+    Get all entity records of a configuration.
+
+    Besides functions, tasks, task groups, build variants, modules and parameters, digests of the
+    other top-level sections and functions called by project-level blocks are entities too, so the
+    configuration can be rebuilt from them.
+
+    :param evg_config: Compact configuration.
+    :return: Entity kinds and names to their records.
+    """
+    entities: Dict[EntityKey, Any] = {}
+    for kind in ENTITY_KINDS:
+        for name, record in getattr(evg_config, kind).items():
+            entities[(kind, name)] = record
+    entities[(PROJECT_EXPANSIONS_KIND, "")] = evg_config.project_expansions
+    return entities
+
+
+def build_config(entities: Dict[EntityKey, Any]) -> CompactEvgConfig:
+    """
+    Build a configuration from its entity records.
+
+    :param entities: Entity kinds and names to their records.
+    :return: Compact configuration.
+    """
+    fields: Dict[str, Any] = {kind: {} for kind in ENTITY_KINDS}
+    project_expansions = frozenset()
+    for (kind, name), record in entities.items():
+        if kind == PROJECT_EXPANSIONS_KIND:
+            project_expansions = record
+        else:
+            fields[kind][name] = record
+    return CompactEvgConfig(**fields, project_expansions=project_expansions)
+
+
+class HistoryIndex:
+    """
+    SQLite index of evaluated configuration entities at every commit of first-parent history.
+
+    Commits are numbered by their position in the history, oldest first. Every version of an entity
+    is stored once, with the range of positions it is defined at, so entities that do not change
+    between commits cost nothing and only new commits are processed on every update. Records of
+    entity versions are shared by all the entities and positions they are defined at. Commits the
+    configuration could not be evaluated at keep the entity versions of the previous commit.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, path: Path) -> None:
+        """
+        Initialize.
+
+        :param connection: Connection to the index database.
+        :param path: Location of the index database.
+        """
+        self.connection = connection
+        self.path = path
+        # Digests of the entity versions defined at the last indexed commit
+        self._open_versions: Optional[Dict[EntityKey, bytes]] = None
+        self._records: Dict[Tuple[str, bytes], Any] = {}
+
+    @classmethod
+    def open(cls, path: Path, root_file: str, evaluator_name: str) -> HistoryIndex:
+        """
+        Open the history index of a project configuration, create it if it does not exist.
+
+        An index of another format version is rebuilt from scratch.
+
+        :param path: Location of the index database.
+        :param root_file: Path of the project configuration file relative to the repository root.
+        :param evaluator_name: Name of the evaluator that produces the configurations.
+        :return: History index instance.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        if meta and meta.get("format_version") != HISTORY_FORMAT_VERSION:
+            LOGGER.warning(
+                "Rebuilding history index of another format version.",
+                path=str(path),
+                format_version=meta.get("format_version"),
+            )
+            with connection:
+                for table in TABLES:
+                    connection.execute(f"DROP TABLE {table}")
+            connection.executescript(SCHEMA)
+            meta = {}
+        expected = {
+            "format_version": HISTORY_FORMAT_VERSION,
+            "root_file": root_file,
+            "evaluator": evaluator_name,
+        }
+        if not meta:
+            with connection:
+                connection.executemany("INSERT INTO meta VALUES (?, ?)", expected.items())
+        elif meta != expected:
+            connection.close()
+            raise HistoryIndexError(
+                f"'{path}' indexes {meta['root_file']} evaluated by {meta['evaluator']}, not"
+                f" {root_file} evaluated by {evaluator_name}."
+            )
+        return cls(connection, path)
+
+    def close(self) -> None:
+        """Close the index database."""
+        self.connection.close()
+
+    @property
+    def size(self) -> int:
+        """Number of indexed commits."""
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM commits").fetchone()
+        return size
+
+    @property
+    def tip(self) -> Optional[str]:
+        """SHA of the last indexed commit, None if the index is empty."""
+        row = self.connection.execute(
+            "SELECT sha FROM commits ORDER BY position DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_position(self, commit: str) -> int:
+        """
+        Get position of an indexed commit.
+
+        :param commit: Commit SHA.
+        :return: Position of the commit in the history.
+        """
+        row = self.connection.execute(
+            "SELECT position FROM commits WHERE sha = ?", (commit,)
+        ).fetchone()
+        if row is None:
+            raise HistoryIndexError(f"Commit {commit} is not in the history index.")
+        return row[0]
+
+    def is_evaluated(self, position: int) -> bool:
+        """
+        Check whether the configuration could be evaluated at the commit at a position.
+
+        :param position: Position of the commit in the history.
+        :return: Whether the entity versions at the position are of the commit.
+        """
+        (evaluated,) = self.connection.execute(
+            "SELECT evaluated FROM commits WHERE position = ?", (position,)
+        ).fetchone()
+        return bool(evaluated)
+
+    def get_commit(self, position: int) -> str:
+        """
+        Get SHA of the commit at a position.
+
+        :param position: Position of the commit in the history.
+        :return: Commit SHA.
+        """
+        (commit,) = self.connection.execute(
+            "SELECT sha FROM commits WHERE position = ?", (position,)
+        ).fetchone()
+        return commit
+
+    @PROFILER.profiled("history")
+    def append(self, commits: List[str], evg_configs: List[Optional[CompactEvgConfig]]) -> None:
+        """
+        Append commits to the end of the indexed history.
+
+        :param commits: SHAs of the commits, oldest first.
+        :param evg_configs: Evaluated configurations at the commits in the same order, the same
+            configuration object for commits with the same configuration, None for commits the
+            configuration could not be evaluated at.
+        """
+        open_versions = self._get_open_versions()
+        position = self.size
+        previous: Optional[CompactEvgConfig] = None
+        with self.connection:
+            for commit, evg_config in zip(commits, evg_configs):
+                self.connection.execute(
+                    "INSERT INTO commits VALUES (?, ?, ?)",
+                    (position, commit, evg_config is not None),
+                )
+                if evg_config is not None and evg_config is not previous:
+                    self._append_entities(position, evg_config, open_versions)
+                    previous = evg_config
+                position += 1
+        LOGGER.debug("Appended commits to history index.", commits=len(commits), size=position)
+
+    def _append_entities(
+        self, position: int, evg_config: CompactEvgConfig, open_versions: Dict[EntityKey, bytes]
+    ) -> None:
+        """
+        Record entity versions that start or end at a position.
+
+        :param position: Position of the commit in the history.
+        :param evg_config: Evaluated configuration at the commit.
+        :param open_versions: Digests of the entity versions defined at the previous commit, they
+            are updated in place.
+        """
+        entities = get_entities(evg_config)
+        ended = [key for key in open_versions if key not in entities]
+        started = []
+        for key, record in entities.items():
+            digest = get_entity_digest(record)
+            if open_versions.get(key) != digest:
+                if key in open_versions:
+                    ended.append(key)
+                started.append((key, digest, record))
+
+        self.connection.executemany(
+            "UPDATE versions SET last_position = ?"
+            " WHERE kind = ? AND name = ? AND last_position IS NULL",
+            ((position - 1, kind, name) for kind, name in ended),
+        )
+        for key in ended:
+            del open_versions[key]
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO records VALUES (?, ?, ?)",
+            (
+                (kind, digest, pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+                for (kind, _), digest, record in started
+            ),
+        )
+        self.connection.executemany(
+            "INSERT INTO versions VALUES (?, ?, ?, ?, NULL)",
+            ((kind, name, digest, position) for (kind, name), digest, _ in started),
+        )
+        for key, digest, _ in started:
+            open_versions[key] = digest
+
+    def _get_open_versions(self) -> Dict[EntityKey, bytes]:
+        """
+        Get digests of the entity versions defined at the last indexed commit.
+
+        :return: Entity kinds and names to digests of their versions.
+        """
+        if self._open_versions is None:
+            self._open_versions = {
+                (kind, name): digest
+                for kind, name, digest in self.connection.execute(
+                    "SELECT kind, name, digest FROM versions WHERE last_position IS NULL"
+                )
+            }
+        return self._open_versions
+
+    def get_change_positions(self, start: int, end: int) -> List[int]:
+        """
+        Get positions of the commits that changed any entity.
+
+        :param start: Position of the first commit, exclusive.
+        :param end: Position of the last commit, inclusive.
+        :return: Positions of the commits that started or ended an entity version, in order.
+        """
+        rows = self.connection.execute(
+            "SELECT first_position FROM versions WHERE first_position > ? AND first_position <= ?"
+            " UNION SELECT last_position + 1 FROM versions"
+            " WHERE last_position >= ? AND last_position < ? ORDER BY 1",
+            (start, end, start, end),
+        )
+        return [position for (position,) in rows]
+
+    @PROFILER.profiled("history")
+    def get_config(self, position: int) -> CompactEvgConfig:
+        """
+        Rebuild the configuration at a commit from its entity versions.
+
+        :param position: Position of the commit in the history.
+        :return: Compact configuration.
+        """
+        entities = {}
+        rows: Iterable[Tuple[str, str, bytes, bytes]] = self.connection.execute(
+            "SELECT versions.kind, versions.name, versions.digest, records.record"
+            " FROM versions JOIN records"
+            " ON records.kind = versions.kind AND records.digest = versions.digest"
+            " WHERE first_position <= ? AND (last_position IS NULL OR last_position >= ?)",
+            (position, position),
+        )
+        for kind, name, digest, data in rows:
+            # Records are shared between the configurations rebuilt from the index
+            if (kind, digest) not in self._records:
+                self._records[(kind, digest)] = pickle.loads(data)
+            entities[(kind, name)] = self._records[(kind, digest)]
+        return build_config(entities)
@@ -0,0 +1,365 @@
+"""Service for selecting task runs that verify evergreen project configuration changes."""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import structlog
+
+from evg_config_changes_verifier.models.compact_evg_config import TaskGroupRecord, VariantRecord
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.models.task_durations import TaskDurations
+from evg_config_changes_verifier.utils.profiler import PROFILER
+from evg_config_changes_verifier.utils.set_cover import greedy_set_cover
+
+LOGGER = structlog.get_logger(__name__)
+
+# Task or task group name and canonical digest of its entry in a build variant
+TaskRun = Tuple[str, Optional[bytes]]
+
+
+class TaskSelectionService:
+    """Service for selecting task runs that verify evergreen project configuration changes."""
+
+    def __init__(
+        self,
+        minimize_variants: bool = False,
+        ignored_expansions: Iterable[str] = (),
+        task_durations: Optional[TaskDurations] = None,
+        budget: Optional[float] = None,
+        cross_product: bool = True,
+    ) -> None:
+        """
+        Initialize.
+
+        :param minimize_variants: Run changed tasks on representatives of equivalent build
+            variants only.
+        :param ignored_expansions: Names of expansions that do not make build variants different.
+        :param task_durations: Historical task durations to estimate cost of task runs with.
+        :param budget: Maximum estimated duration in seconds of the selected task runs.
+        :param cross_product: Patch arguments schedule the cross product of the changed build
+            variants and tasks, rather than exactly the selected pairs.
+        """
+        if budget is not None and task_durations is None:
+            raise ValueError("Task durations are required to keep within a budget.")
+        self.minimize_variants = minimize_variants
+        self.ignored_expansions = frozenset(ignored_expansions)
+        self.task_durations = task_durations
+        self.budget = budget
+        self.cross_product = cross_product
+
+    @classmethod
+    def create(
+        cls,
+        minimize_variants: bool = False,
+        ignored_expansions: Iterable[str] = (),
+        task_durations_file: Optional[str] = None,
+        budget: Optional[float] = None,
+        cross_product: bool = True,
+    ) -> TaskSelectionService:
+        """
+        Create task selection service instance.
+
+        :param minimize_variants: Run changed tasks on representatives of equivalent build
+            variants only.
+        :param ignored_expansions: Names of expansions that do not make build variants different.
+        :param task_durations_file: Location of CSV or JSON file with historical task durations.
+        :param budget: Maximum estimated duration in seconds of the selected task runs.
+        :param cross_product: Patch arguments schedule the cross product of the changed build
+            variants and tasks, rather than exactly the selected pairs.
+        :return: Task selection service instance.
+        """
+        task_durations = None
+        if task_durations_file is not None:
+            task_durations = TaskDurations.load(Path(task_durations_file))
+        return cls(minimize_variants, ignored_expansions, task_durations, budget, cross_product)
+
+    @PROFILER.profiled("selection")
+    def select(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> EvgConfigChanges:
+        """
+        Select task runs out of the changed (variant, task) pairs.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :return: Evergreen project configuration changes with the selected pairs.
+        """
+        if self.minimize_variants:
+            evg_config_changes = self._select_representative_variants(
+                evg_config_states, evg_config_changes
+            )
+        if self.task_durations is not None:
+            evg_config_changes = self._select_within_budget(
+                evg_config_states, evg_config_changes, self.task_durations
+            )
+        return evg_config_changes
+
+    def _select_representative_variants(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> EvgConfigChanges:
+        """
+        Collapse changed build variants that run tasks in the same environment.
+
+        Build variants are equivalent if they run on the same distros with the same expansions.
+        Within every group of equivalent build variants the fewest of them are picked so that every
+        changed task runs on at least one of them with the same task entry.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :return: Evergreen project configuration changes with representative build variants only.
+        """
+        variants = evg_config_states.patched_config.variants
+        groups: Dict[Any, Dict[str, Set[TaskRun]]] = defaultdict(dict)
+        for variant_name, tasks_and_groups in evg_config_changes.variant_tasks.items():
+            variant = variants[variant_name]
+            groups[self._get_environment(variant)][variant_name] = {
+                (task_name, variant.tasks.get(task_name)) for task_name in tasks_and_groups
+            }
+
+        variant_tasks = {}
+        direct_variant_tasks = {}
+        represented_variants = {}
+        for group in groups.values():
+            direct_task_runs = {
+                (task_name, variants[variant_name].tasks.get(task_name))
+                for variant_name in group
+                for task_name in evg_config_changes.direct_variant_tasks.get(variant_name, ())
+            }
+            # Every build variant can run the changed tasks it lists in the environment
+            runnable = {
+                variant_name: needed.union(variants[variant_name].tasks.items())
+                for variant_name, needed in group.items()
+            }
+            cover = greedy_set_cover(set().union(*group.values()), runnable)
+            for variant_name, task_runs in cover.items():
+                variant_tasks[variant_name] = {task_name for task_name, _ in task_runs}
+                direct_tasks = {task_name for task_name, _ in task_runs & direct_task_runs}
+                if direct_tasks:
+                    direct_variant_tasks[variant_name] = direct_tasks
+            for variant_name, needed in group.items():
+                if variant_name not in cover:
+                    represented_variants[variant_name] = {
+                        representative
+                        for representative, task_runs in cover.items()
+                        if not needed.isdisjoint(task_runs)
+                    }
+
+        LOGGER.info(
+            "Selected representative build variants.",
+            changed=len(evg_config_changes.variant_tasks),
+            environments=len(groups),
+            representatives=len(variant_tasks),
+        )
+        return evg_config_changes._replace(
+            variant_tasks=variant_tasks,
+            direct_variant_tasks=direct_variant_tasks,
+            represented_variants=represented_variants,
+        )
+
+    def _select_within_budget(
+        self,
+        evg_config_states: EvgConfigStates,
+        evg_config_changes: EvgConfigChanges,
+        task_durations: TaskDurations,
+    ) -> EvgConfigChanges:
+        """
+        Estimate cost of task runs and keep the most valuable ones within the budget.
+
+        Pairs that changed themselves are more valuable than the ones affected indirectly, among
+        equally valuable pairs cheaper ones are picked first, so that more of them fit. The cost is
+        the one of the task runs the patch arguments schedule, with the cross product of the
+        selected build variants and tasks if those are printed.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :param task_durations: Historical task durations.
+        :return: Evergreen project configuration changes with the selected pairs and their cost.
+        """
+        task_groups = evg_config_states.patched_config.task_groups
+
+        def estimate(variant_name: str, task_name: str) -> float:
+            return self._estimate_cost(task_durations, task_groups, variant_name, task_name)
+
+        candidates = []
+        for variant_name, tasks_and_groups in evg_config_changes.variant_tasks.items():
+            direct_tasks = evg_config_changes.direct_variant_tasks.get(variant_name, set())
+            for task_name in tasks_and_groups:
+                cost = estimate(variant_name, task_name)
+                candidates.append((task_name not in direct_tasks, cost, variant_name, task_name))
+        candidates.sort()
+
+        budget = math.inf if self.budget is None else self.budget
+        if self.cross_product:
+            selected = self._select_cross_product(
+                evg_config_states, evg_config_changes, candidates, budget, estimate
+            )
+        else:
+            selected = set()
+            selected_cost = 0.0
+            for _, cost, variant_name, task_name in candidates:
+                if selected_cost + cost <= budget:
+                    selected_cost += cost
+                    selected.add((variant_name, task_name))
+
+        skipped_cost = 0.0
+        variant_tasks: Dict[str, Set[str]] = {}
+        skipped_variant_tasks: Dict[str, Set[str]] = {}
+        for _, cost, variant_name, task_name in candidates:
+            if (variant_name, task_name) in selected:
+                variant_tasks.setdefault(variant_name, set()).add(task_name)
+            else:
+                skipped_cost += cost
+                skipped_variant_tasks.setdefault(variant_name, set()).add(task_name)
+        evg_config_changes = evg_config_changes._replace(
+            variant_tasks=variant_tasks,
+            direct_variant_tasks={
+                variant_name: direct_tasks & variant_tasks[variant_name]
+                for variant_name, direct_tasks in evg_config_changes.direct_variant_tasks.items()
+                if not direct_tasks.isdisjoint(variant_tasks.get(variant_name, ()))
+            },
+            skipped_variant_tasks=skipped_variant_tasks,
+        )
+
+        scheduled = (
+            self._get_cross_product_runs(evg_config_states, evg_config_changes)
+            if self.cross_product
+            else selected
+        )
+        total_cost = sum(estimate(variant_name, task_name) for variant_name, task_name in scheduled)
+        skipped = sum(len(tasks) for tasks in skipped_variant_tasks.values())
+        LOGGER.info(
+            "Estimated cost of task runs.",
+            budget=self.budget,
+            selected=len(candidates) - skipped,
+            scheduled=len(scheduled),
+            scheduled_cost=round(total_cost, 1),
+            skipped=skipped,
+            skipped_cost=round(skipped_cost, 1),
+        )
+        return evg_config_changes._replace(estimated_cost=total_cost)
+
+    @staticmethod
+    def _select_cross_product(
+        evg_config_states: EvgConfigStates,
+        evg_config_changes: EvgConfigChanges,
+        candidates: List[Tuple[bool, float, str, str]],
+        budget: float,
+        estimate: Callable[[str, str], float],
+    ) -> Set[Tuple[str, str]]:
+        """
+        Select pairs whose build variants and tasks scheduled as a cross product fit the budget.
+
+        A pair adds its build variant and task to the patch, which also schedules the task on the
+        other selected build variants listing it and the other selected tasks on the build
+        variant, a pair is selected only if all those task runs fit.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :param candidates: Priorities, costs, build variants and tasks of the pairs, in order.
+        :param budget: Maximum estimated duration in seconds of the scheduled task runs.
+        :param estimate: Function estimating duration of a task run on a build variant.
+        :return: Build variant and task names of the scheduled task runs.
+        """
+        patched_index = evg_config_states.patched_index
+        listed_tasks = patched_index.get_listed_tasks_by_variant(
+            evg_config_changes.tasks_and_groups
+        )
+        # Build variants and tasks with no pairs are printed whatever is selected
+        variants = (
+            evg_config_changes.variants
+            - evg_config_changes.represented_variants.keys()
+            - {variant_name for _, _, variant_name, _ in candidates}
+        )
+        tasks = evg_config_changes.tasks_and_groups - {
+            task_name for _, _, _, task_name in candidates
+        }
+        scheduled = {
+            (variant_name, task_name)
+            for variant_name in variants
+            for task_name in listed_tasks.get(variant_name, set()) & tasks
+        }
+        total_cost = sum(estimate(variant_name, task_name) for variant_name, task_name in scheduled)
+
+        for _, _, variant_name, task_name in candidates:
+            if (variant_name, task_name) in scheduled:
+                continue
+            added = {
+                (listing_variant, task_name)
+                for listing_variant in patched_index.task_or_group_to_variants.get(task_name, ())
+                if listing_variant in variants or listing_variant == variant_name
+            } | {
+                (variant_name, listed_task)
+                for listed_task in listed_tasks.get(variant_name, set()) & tasks
+            }
+            added -= scheduled
+            cost = sum(estimate(*task_run) for task_run in added)
+            if total_cost + cost <= budget:
+                total_cost += cost
+                scheduled.update(added)
+                variants.add(variant_name)
+                tasks.add(task_name)
+        return scheduled
+
+    @staticmethod
+    def _get_cross_product_runs(
+        evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> Set[Tuple[str, str]]:
+        """
+        Get task runs a patch with the cross product of the printed build variants and tasks has.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :return: Build variant and task names of the scheduled task runs.
+        """
+        variants, tasks = evg_config_changes.get_cross_product()
+        listed_tasks = evg_config_states.patched_index.get_listed_tasks_by_variant(tasks)
+        return {
+            (variant_name, task_name)
+            for variant_name in variants
+            for task_name in listed_tasks.get(variant_name, ())
+        }
+
+    @staticmethod
+    def _estimate_cost(
+        task_durations: TaskDurations,
+        task_groups: Dict[str, TaskGroupRecord],
+        variant_name: str,
+        task_name: str,
+    ) -> float:
+        """
+        Estimate duration of a task or task group run on a build variant.
+
+        Task groups with no history of their own cost as much as their tasks together.
+
+        :param task_durations: Historical task durations.
+        :param task_groups: Task group names to task group records.
+        :param variant_name: Build variant name.
+        :param task_name: Task or task group name.
+        :return: Estimated duration in seconds.
+        """
+        duration = task_durations.get(variant_name, task_name)
+        if duration is not None:
+            return duration
+        task_group = task_groups.get(task_name)
+        if task_group is None:
+            return task_durations.default
+        return sum(
+            task_durations.get(variant_name, name) or task_durations.default
+            for name in task_group.tasks
+        )
+
+    def _get_environment(self, variant: VariantRecord) -> Tuple[bytes, FrozenSet[Any]]:
+        """
+        Get key of the environment build variant tasks run in.
+
+        :param variant: Build variant record.
+        :return: Digest of distros and digests of relevant expansions.
+        """
+        return variant.run_on_digest, frozenset(
+            (name, digest)
+            for name, digest in variant.expansions.items()
+            if name not in self.ignored_expansions
+        )
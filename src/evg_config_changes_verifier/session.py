@@ -0,0 +1,300 @@
+"""Python API for verifying evergreen project configuration changes in-process."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+import structlog
+
+from evg_config_changes_verifier.clients.evg_cli_proxy import EvgCliProxy
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.daemon_server import EvaluatedState
+from evg_config_changes_verifier.models.change_reasons import ChangeReason, ChangeReasons
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+from evg_config_changes_verifier.services.evg_config_cache import DEFAULT_CACHE_DIR, EvgConfigCache
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+
+LOGGER = structlog.get_logger(__name__)
+
+DEFAULT_TARGET_BRANCH = "origin/master"
+# Number of evaluated configuration states kept in memory, e.g. the merge-base and a few edits
+DEFAULT_MAX_STATES = 8
+
+
+class VerifierSessionError(Exception):
+    """Error verifying configuration changes in a session."""
+
+
+class VerificationResult(NamedTuple):
+    """
+    Result of verifying evergreen project configuration changes.
+
+    * evg_project_config: Location of Evergreen project configuration.
+    * base_revision: Revision with the original state.
+    * head_revision: Revision with the patched state, None for the local working tree.
+    * changes: Evergreen project configuration changes with the selected task runs.
+    * reasons: Kinds of changed entities, i.e. the names of `EvgConfigChanges` fields holding
+      them, to names of the entities the update checks found changed to the reasons.
+    """
+
+    evg_project_config: Path
+    base_revision: str
+    head_revision: Optional[str]
+    changes: EvgConfigChanges
+    reasons: ChangeReasons
+
+    def get_reasons(self, kind: str, name: str) -> Tuple[ChangeReason, ...]:
+        """
+        Get reasons an entity is found changed.
+
+        :param kind: Kind of the entity, e.g. `tasks_and_groups` or `variants`.
+        :param name: Name of the entity.
+        :return: Reasons, empty if the entity is not changed.
+        """
+        return self.reasons.get(kind, {}).get(name, ())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Make JSON serializable dictionary of the result."""
+        return {
+            "project": str(self.evg_project_config),
+            "base": self.base_revision,
+            "head": self.head_revision,
+            **self.changes.as_dict(),
+            "evg_patch_args": self.changes.as_evg_patch_cmd_args(),
+            "reasons": {
+                kind: {
+                    name: [reason.as_dict() for reason in reasons]
+                    for name, reasons in reasons_by_name.items()
+                }
+                for kind, reasons_by_name in self.reasons.items()
+            },
+        }
+
+
+class VerifierSession:
+    """
+    Session verifying evergreen project configuration changes of the repository repeatedly.
+
+    Evaluated configuration states and their indexes are kept in memory between calls, keyed by
+    the content of their include closures, so the merge-base is evaluated once and an edited
+    configuration only when its files change. Like the command line interface the session works
+    with the repository of the current working directory. It does not use the dependency injection
+    of the command line interface and can be embedded in other services.
+    """
+
+    def __init__(
+        self,
+        evg_config_service: EvgConfigService,
+        task_selection_service: Optional[TaskSelectionService] = None,
+        max_states: int = DEFAULT_MAX_STATES,
+    ) -> None:
+        """
+        Initialize.
+
+        :param evg_config_service: Service for working with evergreen project configurations.
+        :param task_selection_service: Service for selecting task runs that verify the changes,
+            all the changed (variant, task) pairs are selected if not given.
+        :param max_states: Maximum number of evaluated configuration states kept in memory.
+        """
+        self.evg_config_service = evg_config_service
+        self.task_selection_service = task_selection_service
+        self.max_states = max_states
+        self._lock = threading.Lock()
+        self._states: OrderedDict[str, EvaluatedState] = OrderedDict()
+        self._changes: Dict[Tuple[str, str], EvgConfigChanges] = {}
+
+    @classmethod
+    def create(
+        cls,
+        native_evaluator: bool = False,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        task_selection_service: Optional[TaskSelectionService] = None,
+        max_states: int = DEFAULT_MAX_STATES,
+    ) -> VerifierSession:
+        """
+        Create verifier session instance.
+
+        :param native_evaluator: Evaluate configurations in-process instead of with Evergreen CLI.
+        :param cache_dir: Directory of the cache of evaluated configurations, None to disable it.
+        :param task_selection_service: Service for selecting task runs that verify the changes.
+        :param max_states: Maximum number of evaluated configuration states kept in memory.
+        :return: Verifier session instance.
+        """
+        git_cli_proxy = GitCliProxy.create()
+        evg_cli_proxy = NativeEvgEvaluator.create() if native_evaluator else EvgCliProxy.create()
+        evg_config_service = EvgConfigService(
+            git_cli_proxy=git_cli_proxy,
+            evg_cli_proxy=evg_cli_proxy,
+            evg_include_service=EvgIncludeService(git_cli_proxy=git_cli_proxy),
+            evg_config_cache=EvgConfigCache.create(
+                enabled=cache_dir is not None, cache_dir=cache_dir or DEFAULT_CACHE_DIR
+            ),
+        )
+        return cls(evg_config_service, task_selection_service, max_states)
+
+    def verify(
+        self,
+        evg_project_yaml: Union[str, Path],
+        target_branch: str = DEFAULT_TARGET_BRANCH,
+        base_revision: Optional[str] = None,
+        head_revision: Optional[str] = None,
+        overrides: Optional[Dict[str, str]] = None,
+        task_selection_service: Optional[TaskSelectionService] = None,
+    ) -> VerificationResult:
+        """
+        Verify evergreen project configuration changes.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param target_branch: The branch that patch will be merged into.
+        :param base_revision: Revision with the original state, defaults to the merge-base of the
+            head revision with the target branch.
+        :param head_revision: Revision with the patched state, defaults to the local working tree.
+        :param overrides: Paths of configuration files relative to the repository root to their
+            contents in the patched state, e.g. unsaved edits.
+        :param task_selection_service: Service for selecting task runs that verify the changes,
+            defaults to the one of the session.
+        :return: Verification result.
+        """
+        evg_project_yaml = Path(evg_project_yaml)
+        git_cli_proxy = self.evg_config_service.git_cli_proxy
+        if base_revision is None:
+            base_revision = git_cli_proxy.merge_base(target_branch, head_revision or "HEAD")
+
+        with self._lock:
+            original, patched = self._get_states(
+                evg_project_yaml, [(base_revision, None), (head_revision, overrides)]
+            )
+            evg_config_states = EvgConfigStates(
+                original_config=original.evg_config,
+                patched_config=patched.evg_config,
+                original_index=original.index,
+                patched_index=patched.index,
+            )
+            changes_key = (original.version, patched.version)
+            evg_config_changes = self._changes.get(changes_key)
+            if evg_config_changes is None:
+                evg_config_changes = find_evg_config_changes(evg_config_states)
+                if None not in changes_key:
+                    self._changes[changes_key] = evg_config_changes
+
+        reasons = evg_config_changes.get_reasons()
+        task_selection_service = task_selection_service or self.task_selection_service
+        if task_selection_service is not None:
+            evg_config_changes = task_selection_service.select(
+                evg_config_states, evg_config_changes
+            )
+        return VerificationResult(
+            evg_project_config=evg_project_yaml,
+            base_revision=base_revision,
+            head_revision=head_revision,
+            changes=evg_config_changes,
+            reasons=reasons,
+        )
+
+    def _get_states(
+        self, evg_project_yaml: Path, sources: List[Tuple[Optional[str], Optional[Dict[str, str]]]]
+    ) -> List[EvaluatedState]:
+        """
+        Get evaluated configuration states, evaluating the ones not in memory concurrently.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param sources: Revisions, None for the local working tree, with the overridden files.
+        :return: Evaluated configuration states in the same order as sources.
+        """
+        evg_include_service = self.evg_config_service.evg_include_service
+        states: Dict[int, EvaluatedState] = {}
+        missing = {}
+        for position, (revision, overrides) in enumerate(sources):
+            closure = evg_include_service.get_include_closure(evg_project_yaml, revision, overrides)
+            if closure is None:
+                states[position] = self._evaluate_in_place(evg_project_yaml, revision, overrides)
+                continue
+            state_key = self.evg_config_service.get_state_key(closure)
+            if state_key in self._states:
+                self._states.move_to_end(state_key)
+                states[position] = self._states[state_key]
+            else:
+                missing.setdefault(state_key, (closure, []))[1].append(position)
+
+        if missing:
+            evaluated = self.evg_config_service.evaluate_closures(
+                evg_project_yaml, [closure for closure, _ in missing.values()]
+            )
+            for (state_key, (_, positions)), evg_config in zip(missing.items(), evaluated):
+                state = EvaluatedState.create(state_key, evg_config)
+                self._put(state)
+                for position in positions:
+                    states[position] = state
+            LOGGER.info("Evaluated configuration states.", evaluated=len(missing))
+        return [states[position] for position in range(len(sources))]
+
+    def _evaluate_in_place(
+        self, evg_project_yaml: Path, revision: Optional[str], overrides: Optional[Dict[str, str]]
+    ) -> EvaluatedState:
+        """
+        Evaluate a configuration whose include closure could not be resolved, not kept in memory.
+
+        :param evg_project_yaml: Location of Evergreen project configuration.
+        :param revision: Revision to evaluate the configuration at, None for the local working
+            tree.
+        :param overrides: Paths of configuration files relative to the repository root to their
+            contents.
+        :return: Evaluated configuration state.
+        """
+        if overrides:
+            raise VerifierSessionError(
+                f"Could not resolve files included by {evg_project_yaml} to override them."
+            )
+        if revision is not None:
+            (evg_config,) = self.evg_config_service.evaluate_revisions(evg_project_yaml, [revision])
+        else:
+            (evg_config,) = self.evg_config_service.evg_cli_proxy.evaluate_configs(
+                [(evg_project_yaml, None)]
+            )
+        return EvaluatedState.create(None, evg_config)
+
+    def _put(self, state: EvaluatedState) -> None:
+        """
+        Keep an evaluated state in memory, evicting the least recently used ones if needed.
+
+        :param state: Evaluated configuration state.
+        """
+        self._states[state.version] = state
+        while len(self._states) > self.max_states:
+            evicted, _ = self._states.popitem(last=False)
+            self._changes = {
+                changes_key: changes
+                for changes_key, changes in self._changes.items()
+                if evicted not in changes_key
+            }
+
+    def clear(self) -> None:
+        """Forget the evaluated states and changes kept in memory."""
+        with self._lock:
+            self._states.clear()
+            self._changes.clear()
+
+    def close(self) -> None:
+        """Forget the kept states and stop the git processes of the session."""
+        self.clear()
+        self.evg_config_service.git_cli_proxy.object_reader.close()
+
+    def __enter__(self) -> VerifierSession:
+        """Use the session as a context manager closing it on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the session."""
+        self.close()
@@ -1,11 +1,31 @@
 """An interface to check evergreen project configuration updates."""
 import abc
+from typing import FrozenSet
 
 from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 
 
 class UpdatesCheck(abc.ABC):
-    """An interface to check evergreen project configuration updates."""
+    """
+    An interface to check evergreen project configuration updates.
+
+    Every check declares names of the change sets it reads and the ones it produces. A check runs
+    once all the checks producing the change sets it reads are done, and it sees only the changes
+    found by those. Checks record why they find entities changed with `EvgConfigChanges.add_reason`.
+    """
+
+    # Names of change sets the check reads, produced by other checks
+    reads: FrozenSet[str] = frozenset()
+    # Names of change sets the check produces
+    produces: FrozenSet[str] = frozenset()
+    # Whether the check runs alone on the thread running the checks, e.g. because it forks worker
+    # processes, which is not safe while other threads run
+    exclusive: bool = False
+
+    @property
+    def name(self) -> str:
+        """Name of the check."""
+        return type(self).__name__
 
     @abc.abstractmethod
     def check(
@@ -15,6 +35,7 @@ class UpdatesCheck(abc.ABC):
         Check evergreen project configuration updates.
 
         :param evg_config_states: Original and patched Evergreen project configuration states.
-        :param evg_config_changes: Evergreen project configuration changes.
+        :param evg_config_changes: Changes found by the checks producing the change sets the check
+            reads, the check adds the changes it finds.
         """
         raise NotImplementedError()
@@ -0,0 +1,65 @@
+"""Check display task definitions updates in evergreen project configuration."""
+import structlog
+
+from evg_config_changes_verifier.models.change_reasons import (
+    DISPLAY_TASKS_CHANGED,
+    RUNS_ON_CHANGED_VARIANTS,
+)
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+
+LOGGER = structlog.get_logger(__name__)
+
+
+@register_check
+class DisplayTasksCheck(UpdatesCheck):
+    """Check display task definitions updates in evergreen project configuration."""
+
+    produces = frozenset({"display_tasks"})
+
+    def check(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> None:
+        """
+        Check display task definitions updates of existing build variants.
+
+        Execution tasks of new and changed display tasks need to run on their build variants.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        """
+        updated_variants = set()
+        updated_tasks_and_groups = set()
+        original_variants = evg_config_states.original_config.variants
+
+        for variant_name, variant in evg_config_states.patched_config.variants.items():
+            original_variant = original_variants.get(variant_name)
+            if original_variant is None:
+                # All tasks of new build variants are checked with the build variants
+                continue
+
+            for display_task_name, display_task in variant.display_tasks.items():
+                if original_variant.display_tasks.get(display_task_name) != display_task:
+                    evg_config_changes.add_reason(
+                        "variants", variant_name, DISPLAY_TASKS_CHANGED, [display_task_name]
+                    )
+                    for task_name in display_task.execution_tasks:
+                        evg_config_changes.add_reason(
+                            "tasks_and_groups", task_name, RUNS_ON_CHANGED_VARIANTS, [variant_name]
+                        )
+                    updated_variants.add(variant_name)
+                    updated_tasks_and_groups.update(display_task.execution_tasks)
+                    evg_config_changes.add_variant_tasks(
+                        variant_name, display_task.execution_tasks, direct=True
+                    )
+
+        LOGGER.info(
+            "Found updated display tasks.",
+            variants=updated_variants if len(updated_variants) > 0 else None,
+            tasks_and_groups=updated_tasks_and_groups
+            if len(updated_tasks_and_groups) > 0
+            else None,
+        )
+        evg_config_changes.variants.update(updated_variants)
+        evg_config_changes.tasks_and_groups.update(updated_tasks_and_groups)
@@ -1,15 +1,20 @@
 """Check function definitions updates in evergreen project configuration."""
 import structlog
 
+from evg_config_changes_verifier.models.change_reasons import DEFINITION_CHANGED, NEW
 from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
 
 LOGGER = structlog.get_logger(__name__)
 
 
+@register_check
 class FunctionsCheck(UpdatesCheck):
     """Check function definitions updates in evergreen project configuration."""
 
+    produces = frozenset({"functions"})
+
     def check(
         self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
     ) -> None:
@@ -20,17 +25,16 @@ class FunctionsCheck(UpdatesCheck):
         :param evg_config_changes: Evergreen project configuration changes.
         """
         updated_funcs = set()
-        funcs = evg_config_states.patched_yaml.get("functions", {})
-        original_funcs = evg_config_states.original_yaml.get("functions", {})
+        original_funcs = evg_config_states.original_config.functions
 
-        for func_name, func_body in funcs.items():
-            if func_name not in original_funcs:
+        for func_name, func in evg_config_states.patched_config.functions.items():
+            original_func = original_funcs.get(func_name)
+            if original_func is None:
                 updated_funcs.add(func_name)
-                continue
-
-            original_func_body = original_funcs[func_name]
-            if str(func_body) != str(original_func_body):
+                evg_config_changes.add_reason("functions", func_name, NEW)
+            elif original_func.digest != func.digest:
                 updated_funcs.add(func_name)
+                evg_config_changes.add_reason("functions", func_name, DEFINITION_CHANGED)
 
         LOGGER.info(
             "Found updated functions.", funcs=updated_funcs if len(updated_funcs) > 0 else None
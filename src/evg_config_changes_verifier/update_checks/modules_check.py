@@ -0,0 +1,41 @@
+"""Check module definitions updates in evergreen project configuration."""
+import structlog
+
+from evg_config_changes_verifier.models.change_reasons import DEFINITION_CHANGED, NEW
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+
+LOGGER = structlog.get_logger(__name__)
+
+
+@register_check
+class ModulesCheck(UpdatesCheck):
+    """Check module definitions updates in evergreen project configuration."""
+
+    produces = frozenset({"modules"})
+
+    def check(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> None:
+        """
+        Check module definitions updates.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        """
+        updated_modules = set()
+        original_modules = evg_config_states.original_config.modules
+
+        for module_name, module_digest in evg_config_states.patched_config.modules.items():
+            if module_name not in original_modules:
+                updated_modules.add(module_name)
+                evg_config_changes.add_reason("modules", module_name, NEW)
+            elif original_modules[module_name] != module_digest:
+                updated_modules.add(module_name)
+                evg_config_changes.add_reason("modules", module_name, DEFINITION_CHANGED)
+
+        LOGGER.info(
+            "Found updated modules.", modules=updated_modules if len(updated_modules) > 0 else None
+        )
+        evg_config_changes.modules.update(updated_modules)
@@ -0,0 +1,47 @@
+"""Check parameter definitions updates in evergreen project configuration."""
+import structlog
+
+from evg_config_changes_verifier.models.change_reasons import DEFINITION_CHANGED, NEW, REMOVED
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+
+LOGGER = structlog.get_logger(__name__)
+
+
+@register_check
+class ParametersCheck(UpdatesCheck):
+    """Check parameter definitions updates in evergreen project configuration."""
+
+    produces = frozenset({"parameters"})
+
+    def check(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> None:
+        """
+        Check parameter definitions updates.
+
+        Parameters are expansions every task can read, removed parameters are updated too.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        """
+        original_parameters = evg_config_states.original_config.parameters
+        patched_parameters = evg_config_states.patched_config.parameters
+        updated_parameters = set()
+        for key in original_parameters.keys() | patched_parameters.keys():
+            if key not in original_parameters:
+                evg_config_changes.add_reason("parameters", key, NEW)
+            elif key not in patched_parameters:
+                evg_config_changes.add_reason("parameters", key, REMOVED)
+            elif original_parameters[key] != patched_parameters[key]:
+                evg_config_changes.add_reason("parameters", key, DEFINITION_CHANGED)
+            else:
+                continue
+            updated_parameters.add(key)
+
+        LOGGER.info(
+            "Found updated parameters.",
+            parameters=updated_parameters if len(updated_parameters) > 0 else None,
+        )
+        evg_config_changes.parameters.update(updated_parameters)
@@ -0,0 +1,54 @@
+"""Check project-level pre, post and timeout commands updates in evergreen project configuration."""
+import structlog
+
+from evg_config_changes_verifier.models.change_reasons import (
+    CALLS_CHANGED_FUNCTIONS,
+    DEFINITION_CHANGED,
+)
+from evg_config_changes_verifier.models.compact_evg_config import PROJECT_COMMAND_BLOCKS
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+
+LOGGER = structlog.get_logger(__name__)
+
+
+@register_check
+class ProjectCommandsCheck(UpdatesCheck):
+    """Check project-level pre, post and timeout commands updates."""
+
+    reads = frozenset({"functions"})
+    produces = frozenset({"project_commands"})
+
+    def check(
+        self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
+    ) -> None:
+        """
+        Check project-level pre, post and timeout commands updates.
+
+        A block is updated if its commands or any of the functions it calls are updated.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param evg_config_changes: Evergreen project configuration changes.
+        """
+        original_config = evg_config_states.original_config
+        patched_config = evg_config_states.patched_config
+        updated_blocks = set()
+        for key in PROJECT_COMMAND_BLOCKS:
+            if patched_config.get_section_digest(key) != original_config.get_section_digest(key):
+                updated_blocks.add(key)
+                evg_config_changes.add_reason("project_commands", key, DEFINITION_CHANGED)
+            funcs = evg_config_changes.functions.intersection(
+                patched_config.project_funcs.get(key, ())
+            )
+            if funcs:
+                updated_blocks.add(key)
+                evg_config_changes.add_reason(
+                    "project_commands", key, CALLS_CHANGED_FUNCTIONS, funcs
+                )
+
+        LOGGER.info(
+            "Found updated project-level commands.",
+            blocks=updated_blocks if len(updated_blocks) > 0 else None,
+        )
+        evg_config_changes.project_commands.update(updated_blocks)
@@ -0,0 +1,37 @@
+"""Registry of evergreen project configuration update checks."""
+import importlib
+import pkgutil
+from typing import Dict, List, Type, TypeVar
+
+from evg_config_changes_verifier import update_checks
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+
+UpdatesCheckT = TypeVar("UpdatesCheckT", bound=Type[UpdatesCheck])
+
+_REGISTERED_CHECKS: Dict[str, Type[UpdatesCheck]] = {}
+
+
+def register_check(check_class: UpdatesCheckT) -> UpdatesCheckT:
+    """
+    Register an update check class, its instance runs in every verification.
+
+    :param check_class: Update check class.
+    :return: The same update check class.
+    """
+    if not check_class.produces:
+        raise ValueError(f"Update check {check_class.__name__} produces no change sets.")
+    _REGISTERED_CHECKS[check_class.__name__] = check_class
+    return check_class
+
+
+def get_update_checks() -> List[UpdatesCheck]:
+    """
+    Get instances of all registered update checks.
+
+    Every module of this package is imported first, so checks defined there register themselves.
+
+    :return: Update checks in order of their names.
+    """
+    for module in pkgutil.iter_modules(update_checks.__path__):
+        importlib.import_module(f"{update_checks.__name__}.{module.name}")
+    return [_REGISTERED_CHECKS[name]() for name in sorted(_REGISTERED_CHECKS)]
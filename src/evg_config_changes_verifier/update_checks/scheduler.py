@@ -0,0 +1,228 @@
+"""Scheduler running evergreen project configuration update checks as a dependency graph."""
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set
+
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import get_update_checks
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+
+class UpdatesCheckScheduler:
+    """
+    Scheduler running evergreen project configuration update checks as a dependency graph.
+
+    A check depends on every check producing a change set it reads. Checks whose dependencies are
+    done run concurrently, each of them on the union of the changes its dependencies found, so the
+    changes found do not depend on the order the checks finish in. Exclusive checks run alone.
+    """
+
+    def __init__(self, update_checks: Iterable[UpdatesCheck], max_workers: Optional[int] = None):
+        """
+        Initialize.
+
+        :param update_checks: Update checks to run.
+        :param max_workers: Maximum number of checks to run at the same time, defaults to the
+            number of CPUs.
+        """
+        self.update_checks = list(update_checks)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.dependencies = self._resolve_dependencies(self.update_checks)
+        self.ordered_checks = self._sort_checks(self.update_checks, self.dependencies)
+
+    @classmethod
+    def create(cls, max_workers: Optional[int] = None) -> UpdatesCheckScheduler:
+        """
+        Create scheduler of all registered update checks.
+
+        :param max_workers: Maximum number of checks to run at the same time.
+        :return: Scheduler instance.
+        """
+        return cls(get_update_checks(), max_workers)
+
+    @staticmethod
+    def _resolve_dependencies(update_checks: List[UpdatesCheck]) -> Dict[str, Set[str]]:
+        """
+        Resolve names of the checks every check depends on.
+
+        :param update_checks: Update checks.
+        :return: Check name to names of the checks producing change sets it reads.
+        """
+        producers: Dict[str, Set[str]] = {}
+        for update_check in update_checks:
+            for change_set in update_check.produces:
+                producers.setdefault(change_set, set()).add(update_check.name)
+
+        dependencies = {}
+        for update_check in update_checks:
+            missing = update_check.reads - producers.keys()
+            if missing:
+                raise ValueError(
+                    f"No update check produces {sorted(missing)} read by {update_check.name}."
+                )
+            dependencies[update_check.name] = set().union(
+                *(producers[change_set] for change_set in update_check.reads)
+            ) - {update_check.name}
+        return dependencies
+
+    @staticmethod
+    def _sort_checks(
+        update_checks: List[UpdatesCheck], dependencies: Dict[str, Set[str]]
+    ) -> List[UpdatesCheck]:
+        """
+        Sort checks so that every check comes after all the checks it depends on.
+
+        :param update_checks: Update checks.
+        :param dependencies: Check name to names of the checks it depends on.
+        :return: Sorted update checks, independent checks keep their order.
+        """
+        ordered: List[UpdatesCheck] = []
+        done: Set[str] = set()
+        pending = list(update_checks)
+        while pending:
+            ready = [check for check in pending if dependencies[check.name] <= done]
+            if not ready:
+                raise ValueError(
+                    f"Update checks depend on each other: {sorted(c.name for c in pending)}."
+                )
+            ordered.extend(ready)
+            done.update(check.name for check in ready)
+            pending = [check for check in pending if check.name not in done]
+        return ordered
+
+    def run(self, evg_config_states: EvgConfigStates) -> EvgConfigChanges:
+        """
+        Run all update checks.
+
+        Exclusive checks run on this thread once the other checks that can run are done and their
+        threads are stopped.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :return: Changes found by all the checks.
+        """
+        results: Dict[str, EvgConfigChanges] = {}
+        pending = list(self.ordered_checks)
+        while pending:
+            self._run_concurrently(pending, evg_config_states, results)
+            for update_check in [check for check in pending if self._is_ready(check, results)]:
+                pending.remove(update_check)
+                results[update_check.name] = self.run_check(
+                    update_check, evg_config_states, results
+                )
+        return self.merge(results)
+
+    def _is_ready(self, update_check: UpdatesCheck, results: Dict[str, EvgConfigChanges]) -> bool:
+        """
+        Check whether all the checks an update check depends on are done.
+
+        :param update_check: Update check.
+        :param results: Check name to changes found by it, for all the finished checks.
+        :return: Whether the check can run.
+        """
+        return self.dependencies[update_check.name] <= results.keys()
+
+    def _run_concurrently(
+        self,
+        pending: List[UpdatesCheck],
+        evg_config_states: EvgConfigStates,
+        results: Dict[str, EvgConfigChanges],
+    ) -> None:
+        """
+        Run pending checks that are not exclusive until none of them can run.
+
+        :param pending: Checks to run, the finished ones are removed.
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param results: Check name to changes found by it, the finished checks are added.
+        """
+
+        def get_ready() -> List[UpdatesCheck]:
+            return [
+                update_check
+                for update_check in pending
+                if not update_check.exclusive and self._is_ready(update_check, results)
+            ]
+
+        if self.max_workers == 1:
+            ready = get_ready()
+            while ready:
+                for update_check in ready:
+                    pending.remove(update_check)
+                    results[update_check.name] = self.run_check(
+                        update_check, evg_config_states, results
+                    )
+                ready = get_ready()
+            return
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="update-check") as executor:
+            running: Dict[Future, UpdatesCheck] = {}
+            while True:
+                for update_check in get_ready():
+                    pending.remove(update_check)
+                    future = executor.submit(
+                        self.run_check, update_check, evg_config_states, results
+                    )
+                    running[future] = update_check
+                if not running:
+                    return
+                # Results are only added here, checks read the ones of finished dependencies
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future).name] = future.result()
+
+    def run_check(
+        self,
+        update_check: UpdatesCheck,
+        evg_config_states: EvgConfigStates,
+        results: Dict[str, EvgConfigChanges],
+    ) -> EvgConfigChanges:
+        """
+        Run an update check on the changes found by the checks it depends on.
+
+        :param update_check: Update check to run.
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param results: Check name to changes found by it, for all the checks it depends on.
+        :return: Changes found by the check together with the changes it read.
+        """
+        with PROFILER.span(update_check.name, "check") as span:
+            evg_config_changes = EvgConfigChanges.create_empty()
+            for name in self.dependencies[update_check.name]:
+                evg_config_changes.merge(results[name])
+            read_counts = self._get_change_counts(evg_config_changes)
+            update_check.check(evg_config_states, evg_config_changes)
+            # Only the changes the check found itself, not the ones it read
+            span.set(
+                **{
+                    key: count - read_counts[key]
+                    for key, count in self._get_change_counts(evg_config_changes).items()
+                }
+            )
+        return evg_config_changes
+
+    @staticmethod
+    def _get_change_counts(evg_config_changes: EvgConfigChanges) -> Dict[str, int]:
+        """
+        Count changed entities reported in profiles of the checks.
+
+        :param evg_config_changes: Evergreen project configuration changes.
+        :return: Kinds of entities to numbers of the changed ones.
+        """
+        return {
+            "functions": len(evg_config_changes.functions),
+            "tasks_and_groups": len(evg_config_changes.tasks_and_groups),
+            "variants": len(evg_config_changes.variants),
+        }
+
+    def merge(self, results: Dict[str, EvgConfigChanges]) -> EvgConfigChanges:
+        """
+        Merge changes found by all the checks.
+
+        :param results: Check name to changes found by it.
+        :return: Changes found by all the checks.
+        """
+        evg_config_changes = EvgConfigChanges.create_empty()
+        for update_check in self.ordered_checks:
+            evg_config_changes.merge(results[update_check.name])
+        return evg_config_changes
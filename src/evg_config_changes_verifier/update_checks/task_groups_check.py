@@ -1,15 +1,27 @@
 """Check task group definitions updates in evergreen project configuration."""
 import structlog
 
+from evg_config_changes_verifier.models.change_reasons import (
+    CALLS_CHANGED_FUNCTIONS,
+    CONTAINS_CHANGED_TASKS,
+    DEFINITION_CHANGED,
+    NEW,
+    READS_CHANGED_PARAMETERS,
+)
 from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
 
 LOGGER = structlog.get_logger(__name__)
 
 
+@register_check
 class TaskGroupsCheck(UpdatesCheck):
     """Check task group definitions updates in evergreen project configuration."""
 
+    reads = frozenset({"functions", "parameters", "tasks"})
+    produces = frozenset({"task_groups"})
+
     def check(
         self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
     ) -> None:
@@ -20,37 +32,48 @@ class TaskGroupsCheck(UpdatesCheck):
         :param evg_config_changes: Evergreen project configuration changes.
         """
         updated_task_groups = set()
-        original_task_groups_dict = {
-            task_group["name"]: task_group
-            for task_group in evg_config_states.original_yaml.get("task_groups", [])
-        }
-
-        for task_group in evg_config_states.patched_yaml.get("task_groups", []):
-            task_group_name = task_group["name"]
+        original_task_groups = evg_config_states.original_config.task_groups
+        patched_task_groups = evg_config_states.patched_config.task_groups
 
-            if task_group_name not in original_task_groups_dict:
+        for task_group_name, task_group in patched_task_groups.items():
+            original_task_group = original_task_groups.get(task_group_name)
+            if original_task_group is None:
                 updated_task_groups.add(task_group_name)
-                continue
-
-            original_task_group = original_task_groups_dict[task_group_name]
-            if str(task_group) != str(original_task_group):
+                evg_config_changes.add_reason("tasks_and_groups", task_group_name, NEW)
+            elif original_task_group.digest != task_group.digest:
                 updated_task_groups.add(task_group_name)
-                continue
+                evg_config_changes.add_reason(
+                    "tasks_and_groups", task_group_name, DEFINITION_CHANGED
+                )
 
-            if any(
-                task in evg_config_changes.tasks_and_groups for task in task_group.get("tasks", [])
-            ):
-                updated_task_groups.add(task_group_name)
-                continue
+        patched_index = evg_config_states.patched_index
+        changed_tasks = set(evg_config_changes.tasks_and_groups)
+        for task_group_name in patched_index.get_task_groups_affected_by(
+            evg_config_changes.functions, changed_tasks
+        ):
+            task_group = patched_task_groups[task_group_name]
+            updated_task_groups.add(task_group_name)
+            funcs = evg_config_changes.functions.intersection(task_group.funcs)
+            if funcs:
+                evg_config_changes.add_reason(
+                    "tasks_and_groups", task_group_name, CALLS_CHANGED_FUNCTIONS, funcs
+                )
+            tasks = changed_tasks.intersection(task_group.tasks)
+            if tasks:
+                evg_config_changes.add_reason(
+                    "tasks_and_groups", task_group_name, CONTAINS_CHANGED_TASKS, tasks
+                )
 
-            task_group_funcs = set()
-            for key in ("setup_group", "teardown_group", "setup_task", "teardown_task"):
-                if key in task_group and task_group[key] is not None:
-                    task_group_funcs.update(
-                        command["func"] for command in task_group[key] if "func" in command
+        if evg_config_changes.parameters:
+            for task_group_name in patched_task_groups:
+                parameters = patched_index.get_expansions_read_by(
+                    task_group_name, evg_config_changes.parameters
+                )
+                if parameters:
+                    updated_task_groups.add(task_group_name)
+                    evg_config_changes.add_reason(
+                        "tasks_and_groups", task_group_name, READS_CHANGED_PARAMETERS, parameters
                     )
-            if any(func in evg_config_changes.functions for func in task_group_funcs):
-                updated_task_groups.add(task_group_name)
 
         LOGGER.info(
             "Found updated task groups.",
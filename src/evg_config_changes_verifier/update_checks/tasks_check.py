@@ -1,15 +1,31 @@
 """Check task definitions updates in evergreen project configuration."""
+from typing import List, Tuple
+
 import structlog
 
+from evg_config_changes_verifier.models.change_reasons import (
+    CALLS_CHANGED_FUNCTIONS,
+    DEFINITION_CHANGED,
+    NEW,
+    PROJECT_COMMANDS_CHANGED,
+    READS_CHANGED_PARAMETERS,
+)
 from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+from evg_config_changes_verifier.utils.sharded_diff import map_shards
 
 LOGGER = structlog.get_logger(__name__)
 
 
+@register_check
 class TasksCheck(UpdatesCheck):
     """Check task definitions updates in evergreen project configuration."""
 
+    reads = frozenset({"functions", "parameters", "project_commands"})
+    produces = frozenset({"tasks"})
+    exclusive = True
+
     def check(
         self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
     ) -> None:
@@ -20,27 +36,73 @@ class TasksCheck(UpdatesCheck):
         :param evg_config_changes: Evergreen project configuration changes.
         """
         updated_tasks = set()
-        original_tasks_dict = {
-            task["name"]: task for task in evg_config_states.original_yaml.get("tasks", [])
-        }
+        # Tasks are compared in shards, in worker processes for very large configurations
+        for shard_changes in map_shards(
+            self._check_tasks,
+            (evg_config_states, evg_config_changes),
+            list(evg_config_states.patched_config.tasks),
+        ):
+            updated_tasks.update(shard_changes.tasks_and_groups)
+            evg_config_changes.merge(shard_changes)
 
-        for task in evg_config_states.patched_yaml.get("tasks", []):
-            task_name = task["name"]
+        patched_tasks = evg_config_states.patched_config.tasks
+        patched_index = evg_config_states.patched_index
+        for task_name in patched_index.get_tasks_calling(evg_config_changes.functions):
+            updated_tasks.add(task_name)
+            evg_config_changes.add_reason(
+                "tasks_and_groups",
+                task_name,
+                CALLS_CHANGED_FUNCTIONS,
+                evg_config_changes.functions.intersection(patched_tasks[task_name].funcs),
+            )
 
-            if task_name not in original_tasks_dict:
+        if evg_config_changes.project_commands:
+            for task_name in patched_index.standalone_tasks:
                 updated_tasks.add(task_name)
-                continue
+                evg_config_changes.add_reason(
+                    "tasks_and_groups",
+                    task_name,
+                    PROJECT_COMMANDS_CHANGED,
+                    evg_config_changes.project_commands,
+                )
 
-            original_task = original_tasks_dict[task_name]
-            if str(task) != str(original_task):
-                updated_tasks.add(task_name)
-                continue
+        LOGGER.info("Found updated tasks.", tasks=updated_tasks if len(updated_tasks) > 0 else None)
+        evg_config_changes.tasks_and_groups.update(updated_tasks)
 
-            task_funcs = {
-                command["func"] for command in task.get("commands", []) if "func" in command
-            }
-            if any(func in evg_config_changes.functions for func in task_funcs):
+    @staticmethod
+    def _check_tasks(
+        context: Tuple[EvgConfigStates, EvgConfigChanges], task_names: List[str]
+    ) -> EvgConfigChanges:
+        """
+        Find updated tasks among a shard of patched tasks.
+
+        :param context: Original and patched Evergreen project configuration states and the
+            changes found by the earlier checks.
+        :param task_names: Names of the patched tasks to check.
+        :return: New tasks, changed tasks and tasks reading changed parameters with the reasons.
+        """
+        evg_config_states, evg_config_changes = context
+        original_tasks = evg_config_states.original_config.tasks
+        patched_tasks = evg_config_states.patched_config.tasks
+        patched_index = evg_config_states.patched_index
+        task_changes = EvgConfigChanges.create_empty()
+        updated_tasks = task_changes.tasks_and_groups
+        for task_name in task_names:
+            original_task = original_tasks.get(task_name)
+            if original_task is None:
+                updated_tasks.add(task_name)
+                task_changes.add_reason("tasks_and_groups", task_name, NEW)
+            elif original_task.digest != patched_tasks[task_name].digest:
                 updated_tasks.add(task_name)
+                task_changes.add_reason("tasks_and_groups", task_name, DEFINITION_CHANGED)
 
-        LOGGER.info("Found updated tasks.", tasks=updated_tasks if len(updated_tasks) > 0 else None)
-        evg_config_changes.tasks_and_groups.update(updated_tasks)
+            if evg_config_changes.parameters:
+                parameters = patched_index.get_expansions_read_by(
+                    task_name, evg_config_changes.parameters
+                )
+                if parameters:
+                    updated_tasks.add(task_name)
+                    task_changes.add_reason(
+                        "tasks_and_groups", task_name, READS_CHANGED_PARAMETERS, parameters
+                    )
+        return task_changes
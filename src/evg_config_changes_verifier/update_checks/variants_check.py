@@ -1,15 +1,34 @@
 """Check variants definitions updates in evergreen project configuration."""
+from typing import Iterable, List, Set, Tuple
+
 import structlog
 
+from evg_config_changes_verifier.models.change_reasons import (
+    EXPANSIONS_CHANGED,
+    LISTS_CHANGED_TASKS,
+    MODULES_CHANGED,
+    NEW,
+    RUN_ON_CHANGED,
+    RUNS_ON_CHANGED_VARIANTS,
+    TASK_ENTRIES_CHANGED,
+)
+from evg_config_changes_verifier.models.compact_evg_config import VariantRecord
 from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
 from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.registry import register_check
+from evg_config_changes_verifier.utils.sharded_diff import map_shards
 
 LOGGER = structlog.get_logger(__name__)
 
 
+@register_check
 class VariantsCheck(UpdatesCheck):
     """Check variants definitions updates in evergreen project configuration."""
 
+    reads = frozenset({"modules", "task_groups", "tasks"})
+    produces = frozenset({"variants"})
+    exclusive = True
+
     def check(
         self, evg_config_states: EvgConfigStates, evg_config_changes: EvgConfigChanges
     ) -> None:
@@ -19,56 +38,175 @@ class VariantsCheck(UpdatesCheck):
         :param evg_config_states: Original and patched Evergreen project configuration states.
         :param evg_config_changes: Evergreen project configuration changes.
         """
-        updated_variants = set()
-        updated_tasks_and_groups = set()
-        original_variants_dict = {
-            variant["name"]: variant
-            for variant in evg_config_states.original_yaml.get("buildvariants", [])
+        # Tasks and task groups changed by the earlier checks run on every variant listing them
+        listed_tasks = evg_config_states.patched_index.get_listed_tasks_by_variant(
+            evg_config_changes.tasks_and_groups
+        )
+        redefined = {
+            name
+            for name in evg_config_changes.tasks_and_groups
+            if self._is_redefined(evg_config_states, name)
         }
 
-        for variant in evg_config_states.patched_yaml.get("buildvariants", []):
-            variant_name = variant["name"]
-            variant_tasks = {task["name"] for task in variant.get("tasks", [])}
+        updated_variants = set(listed_tasks)
+        updated_tasks_and_groups = set()
+        patched_variants = evg_config_states.patched_config.variants
+        # Build variants are compared in shards, in worker processes for very large configurations
+        for shard_changes in map_shards(
+            self._check_variants,
+            (evg_config_states, evg_config_changes),
+            list(patched_variants),
+            size=sum(len(variant.tasks) for variant in patched_variants.values()),
+        ):
+            updated_variants.update(shard_changes.variants)
+            updated_tasks_and_groups.update(shard_changes.tasks_and_groups)
+            evg_config_changes.merge(shard_changes)
+
+        for variant_name, tasks_and_groups in listed_tasks.items():
+            evg_config_changes.add_reason(
+                "variants", variant_name, LISTS_CHANGED_TASKS, tasks_and_groups
+            )
+            evg_config_changes.add_variant_tasks(variant_name, tasks_and_groups - redefined)
+            evg_config_changes.add_variant_tasks(
+                variant_name, tasks_and_groups & redefined, direct=True
+            )
 
-            if variant_name not in original_variants_dict:
-                updated_variants.add(variant_name)
-                updated_tasks_and_groups.update(variant_tasks)
-                continue
+        LOGGER.info(
+            "Found updated variants.",
+            variants=updated_variants if len(updated_variants) > 0 else None,
+            tasks_and_groups=updated_tasks_and_groups
+            if len(updated_tasks_and_groups) > 0
+            else None,
+        )
+        evg_config_changes.variants.update(updated_variants)
 
-            original_variant = original_variants_dict[variant_name]
-            if str(variant.get("expansions", {})) != str(original_variant.get("expansions", {})):
-                updated_variants.add(variant_name)
-                updated_tasks_and_groups.update(variant_tasks)
+    @classmethod
+    def _check_variants(
+        cls, context: Tuple[EvgConfigStates, EvgConfigChanges], variant_names: List[str]
+    ) -> EvgConfigChanges:
+        """
+        Find updated build variants and their tasks among a shard of patched build variants.
+
+        :param context: Original and patched Evergreen project configuration states and the
+            changes found by the earlier checks.
+        :param variant_names: Names of the patched build variants to check.
+        :return: Updated build variants, their tasks and task groups and the pairs of them.
+        """
+        evg_config_states, evg_config_changes = context
+        original_variants = evg_config_states.original_config.variants
+        patched_variants = evg_config_states.patched_config.variants
+        variant_changes = EvgConfigChanges.create_empty()
+
+        for variant_name in variant_names:
+            variant = patched_variants[variant_name]
+            original_variant = original_variants.get(variant_name)
+            if original_variant is None:
+                cls._add_variant_changes(variant_changes, variant_name, NEW, (), variant.tasks)
+                variant_changes.add_variant_tasks(variant_name, variant.tasks, direct=True)
                 continue
 
-            if str(variant.get("run_on", [])) != str(original_variant.get("run_on", [])):
-                updated_variants.add(variant_name)
-                updated_tasks_and_groups.update(variant_tasks)
+            run_on_changed = variant.run_on_digest != original_variant.run_on_digest
+            modules = cls._get_changed_modules(original_variant, variant, evg_config_changes)
+            if run_on_changed or modules:
+                if run_on_changed:
+                    cls._add_variant_changes(
+                        variant_changes, variant_name, RUN_ON_CHANGED, (), variant.tasks
+                    )
+                if modules:
+                    cls._add_variant_changes(
+                        variant_changes, variant_name, MODULES_CHANGED, modules, variant.tasks
+                    )
+                variant_changes.add_variant_tasks(variant_name, variant.tasks)
                 continue
 
-            original_variant_tasks_dict = {
-                task["name"]: task for task in original_variant.get("tasks", [])
-            }
-            for task in variant.get("tasks", []):
-                task_name = task["name"]
+            if variant.expansions != original_variant.expansions:
+                # Only tasks that read the changed expansions run differently
+                expansions = variant.get_changed_expansions(original_variant)
+                reading_tasks = evg_config_states.patched_index.get_tasks_reading(
+                    variant.tasks, expansions
+                )
+                if reading_tasks:
+                    cls._add_variant_changes(
+                        variant_changes, variant_name, EXPANSIONS_CHANGED, expansions, reading_tasks
+                    )
+                    variant_changes.add_variant_tasks(variant_name, reading_tasks)
+
+            for task_name, task_digest in variant.tasks.items():
+                if original_variant.tasks.get(task_name) != task_digest:
+                    cls._add_variant_changes(
+                        variant_changes,
+                        variant_name,
+                        TASK_ENTRIES_CHANGED,
+                        [task_name],
+                        [task_name],
+                    )
+                    variant_changes.add_variant_tasks(variant_name, [task_name], direct=True)
+        return variant_changes
 
-                if task_name not in original_variant_tasks_dict:
-                    updated_tasks_and_groups.add(task_name)
-                    continue
+    @staticmethod
+    def _add_variant_changes(
+        evg_config_changes: EvgConfigChanges,
+        variant_name: str,
+        code: str,
+        related: Iterable[str],
+        tasks_and_groups: Iterable[str],
+    ) -> None:
+        """
+        Add a changed build variant and the tasks and task groups it runs differently.
 
-                original_task = original_variant_tasks_dict[task_name]
-                if str(task) != str(original_task):
-                    updated_tasks_and_groups.add(task_name)
+        :param evg_config_changes: Evergreen project configuration changes.
+        :param variant_name: Name of the build variant.
+        :param code: Reason code of the build variant.
+        :param related: Names of the entities the reason refers to.
+        :param tasks_and_groups: Names of the tasks and task groups the change affects.
+        """
+        evg_config_changes.variants.add(variant_name)
+        evg_config_changes.add_reason("variants", variant_name, code, related)
+        for task_name in tasks_and_groups:
+            evg_config_changes.tasks_and_groups.add(task_name)
+            evg_config_changes.add_reason(
+                "tasks_and_groups", task_name, RUNS_ON_CHANGED_VARIANTS, [variant_name]
+            )
 
-            if any(task in evg_config_changes.tasks_and_groups for task in variant_tasks):
-                updated_variants.add(variant_name)
+    @staticmethod
+    def _get_changed_modules(
+        original_variant: VariantRecord,
+        variant: VariantRecord,
+        evg_config_changes: EvgConfigChanges,
+    ) -> Set[str]:
+        """
+        Get changed modules a build variant checks out.
 
-        LOGGER.info(
-            "Found updated variants.",
-            variants=updated_variants if len(updated_variants) > 0 else None,
-            tasks_and_groups=updated_tasks_and_groups
-            if len(updated_tasks_and_groups) > 0
-            else None,
+        :param original_variant: Original build variant record.
+        :param variant: Patched build variant record.
+        :param evg_config_changes: Evergreen project configuration changes.
+        :return: Names of the modules the build variant started or stopped checking out and of the
+            updated ones it checks out, all of them if only their order changed.
+        """
+        modules = set(variant.modules).symmetric_difference(original_variant.modules)
+        modules.update(evg_config_changes.modules.intersection(variant.modules))
+        if not modules and variant.modules != original_variant.modules:
+            return set(variant.modules)
+        return modules
+
+    @classmethod
+    def _is_redefined(cls, evg_config_states: EvgConfigStates, name: str) -> bool:
+        """
+        Check whether definition of a task or task group itself is new or changed.
+
+        Task groups are redefined when definition of any of their tasks is new or changed too.
+
+        :param evg_config_states: Original and patched Evergreen project configuration states.
+        :param name: Name of the task or task group.
+        :return: Whether the definition is new or changed.
+        """
+        original_config = evg_config_states.original_config
+        patched_config = evg_config_states.patched_config
+        if name in patched_config.tasks:
+            return original_config.tasks.get(name) != patched_config.tasks[name]
+        task_group = patched_config.task_groups.get(name)
+        if task_group is None:
+            return False
+        return original_config.task_groups.get(name) != task_group or any(
+            cls._is_redefined(evg_config_states, task_name) for task_name in task_group.tasks
         )
-        evg_config_changes.variants.update(updated_variants)
-        evg_config_changes.tasks_and_groups.update(updated_tasks_and_groups)
@@ -0,0 +1,73 @@
+"""Canonical structural hashing of evaluated evergreen project configuration entities."""
+import hashlib
+from typing import Any, Dict, Iterable, Tuple
+
+DIGEST_SIZE = 16
+
+
+class ConfigHasher:
+    """
+    Canonical structural hasher of parsed YAML values.
+
+    Mappings are hashed independently of the order of their keys, sequences preserve order.
+    Digests of mappings and sequences are Merkle-style: they are built from digests of their
+    items and cached per sub-tree, so every sub-tree is hashed at most once. The cache is keyed
+    by object identity, YAML anchors and aliases are loaded as shared objects, so the sub-trees
+    they share between entities are hashed only once too.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # The hashed object is kept alongside its digest so that its id is never reused
+        self._digests: Dict[int, Tuple[Any, bytes]] = {}
+
+    def digest(self, value: Any) -> bytes:
+        """
+        Get canonical digest of a parsed YAML value.
+
+        :param value: Parsed YAML value.
+        :return: Canonical digest.
+        """
+        return self._encode(value)
+
+    def retain(self, values: Iterable[Any]) -> None:
+        """
+        Drop cached digests of all the sub-trees but the given ones.
+
+        :param values: Sub-trees to keep cached, e.g. the ones YAML aliases may refer to again.
+        """
+        self._digests = {
+            id(value): self._digests[id(value)] for value in values if id(value) in self._digests
+        }
+
+    def _encode(self, value: Any) -> bytes:
+        """
+        Encode a parsed YAML value into canonical bytes.
+
+        Scalars are encoded as is with type and length prefix, collections as their digests.
+
+        :param value: Parsed YAML value.
+        :return: Canonical bytes.
+        """
+        if isinstance(value, (dict, list)):
+            cached = self._digests.get(id(value))
+            if cached is not None:
+                return cached[1]
+
+            if isinstance(value, dict):
+                hasher = hashlib.blake2b(b"d", digest_size=DIGEST_SIZE)
+                for item in sorted(self._encode(k) + self._encode(v) for k, v in value.items()):
+                    hasher.update(item)
+            else:
+                hasher = hashlib.blake2b(b"l", digest_size=DIGEST_SIZE)
+                for item in value:
+                    hasher.update(self._encode(item))
+            digest = b"#" + hasher.digest()
+            self._digests[id(value)] = (value, digest)
+            return digest
+
+        if isinstance(value, str):
+            encoded = value.encode()
+            return b"s%d:" % len(encoded) + encoded
+        encoded = f"{type(value).__name__}:{value!r}".encode()
+        return b"o%d:" % len(encoded) + encoded
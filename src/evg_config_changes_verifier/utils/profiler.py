@@ -0,0 +1,228 @@
+"""Lightweight instrumentation of verification phases."""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import IO, Any, Callable, Dict, List, NamedTuple, TypeVar
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+MAX_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+CallableT = TypeVar("CallableT", bound=Callable[..., Any])
+
+
+def _get_children_cpu_time() -> float:
+    """Get CPU time of terminated child processes, e.g. git and evergreen CLI runs."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _get_max_rss() -> int:
+    """Get peak resident set size of the process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAX_RSS_UNIT
+
+
+class ProfileRecord(NamedTuple):
+    """
+    Measurements of a single profiled span.
+
+    * name: Name of the span.
+    * category: Category of the span, e.g. "git", "evaluate", "parse" or "check".
+    * start: Start time in seconds relative to the profiler start.
+    * wall_time: Wall time in seconds.
+    * cpu_time: CPU time of the process in seconds, includes other threads running meanwhile.
+    * subprocess_time: CPU time in seconds of child processes that finished during the span.
+    * max_rss: Peak resident set size of the process in bytes at the end of the span.
+    * thread_id: Native id of the thread that ran the span.
+    * args: Additional values recorded with the span, e.g. entity counts.
+    """
+
+    name: str
+    category: str
+    start: float
+    wall_time: float
+    cpu_time: float
+    subprocess_time: float
+    max_rss: int
+    thread_id: int
+    args: Dict[str, Any]
+
+
+class _NullSpan:
+    """Span of a disabled profiler that records nothing."""
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def set(self, **args: Any) -> None:
+        """Ignore values recorded with the span."""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span of an enabled profiler that records its measurements on exit."""
+
+    def __init__(self, profiler: Profiler, name: str, category: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> _Span:
+        self.children_cpu_start = _get_children_cpu_time()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        wall_end = time.perf_counter()
+        self.profiler.records.append(
+            ProfileRecord(
+                name=self.name,
+                category=self.category,
+                start=self.wall_start - self.profiler.start_time,
+                wall_time=wall_end - self.wall_start,
+                cpu_time=time.process_time() - self.cpu_start,
+                subprocess_time=_get_children_cpu_time() - self.children_cpu_start,
+                max_rss=_get_max_rss(),
+                thread_id=threading.get_native_id(),
+                args=self.args,
+            )
+        )
+
+    def set(self, **args: Any) -> None:
+        """
+        Record additional values with the span.
+
+        :param args: Values to record.
+        """
+        self.args.update(args)
+
+
+class Profiler:
+    """
+    Recorder of timings and memory usage of verification phases.
+
+    Disabled profiler hands out a shared no-op span, so instrumented code costs an attribute check
+    per call when profiling is off.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.enabled = False
+        self.start_time = time.perf_counter()
+        self.records: List[ProfileRecord] = []
+
+    def enable(self) -> None:
+        """Start recording spans."""
+        self.enabled = True
+        self.start_time = time.perf_counter()
+        self.records = []
+
+    def span(self, name: str, category: str, **args: Any) -> Any:
+        """
+        Make a context manager measuring the enclosed code.
+
+        :param name: Name of the span.
+        :param category: Category of the span.
+        :param args: Values to record with the span.
+        :return: Context manager, values can be recorded with its `set` method.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def profiled(self, category: str) -> Callable[[CallableT], CallableT]:
+        """
+        Make a decorator measuring every call of a function.
+
+        :param category: Category of the spans.
+        :return: Decorator.
+        """
+
+        def decorator(func: CallableT) -> CallableT:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, func.__qualname__, category, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore
+
+        return decorator
+
+    def format_summary(self) -> str:
+        """
+        Format table of recorded spans aggregated by name, in the order they first started.
+
+        :return: Summary table.
+        """
+        aggregated: Dict[str, List[ProfileRecord]] = OrderedDict()
+        for record in sorted(self.records, key=lambda r: r.start):
+            aggregated.setdefault(record.name, []).append(record)
+
+        lines = [
+            f"{'span':<48} {'calls':>5} {'wall, s':>8} {'cpu, s':>8} {'subproc, s':>10}"
+            f" {'max rss, MiB':>12}  details"
+        ]
+        for name, records in aggregated.items():
+            details = " ".join(f"{key}={value}" for key, value in records[-1].args.items())
+            lines.append(
+                f"{name:<48} {len(records):>5}"
+                f" {sum(r.wall_time for r in records):>8.3f}"
+                f" {sum(r.cpu_time for r in records):>8.3f}"
+                f" {sum(r.subprocess_time for r in records):>10.3f}"
+                f" {max(r.max_rss for r in records) / 2 ** 20:>12.1f}  {details}".rstrip()
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, output: IO[str]) -> None:
+        """
+        Write recorded spans in Chrome trace event format, viewable in Perfetto or chrome://tracing.
+
+        :param output: File to write the trace to.
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "verify-evg-config-changes"},
+            }
+        ]
+        for record in self.records:
+            events.append(
+                {
+                    "name": record.name,
+                    "cat": record.category,
+                    "ph": "X",
+                    "ts": record.start * 1e6,
+                    "dur": record.wall_time * 1e6,
+                    "pid": pid,
+                    "tid": record.thread_id,
+                    "args": {
+                        "cpu_ms": round(record.cpu_time * 1e3, 3),
+                        "subprocess_cpu_ms": round(record.subprocess_time * 1e3, 3),
+                        "max_rss_mib": round(record.max_rss / 2**20, 1),
+                        **record.args,
+                    },
+                }
+            )
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, output)
+
+
+# Shared by all modules, so that instrumentation needs no wiring through the dependency injection
+PROFILER = Profiler()
@@ -0,0 +1,38 @@
+"""Greedy approximation of the set cover problem."""
+import heapq
+from typing import Dict, Hashable, Set, TypeVar
+
+ElementT = TypeVar("ElementT", bound=Hashable)
+
+
+def greedy_set_cover(
+    universe: Set[ElementT], subsets: Dict[str, Set[ElementT]]
+) -> Dict[str, Set[ElementT]]:
+    """
+    Choose subsets covering the universe, picking the one covering most uncovered elements first.
+
+    Gains of subsets only decrease as elements get covered, so the gains are re-evaluated lazily:
+    a subset is picked once its fresh gain is not less than the stale gains of all the others.
+    Ties are broken by subset name. Elements no subset contains stay uncovered.
+
+    :param universe: Elements to cover.
+    :param subsets: Names of subsets to their elements.
+    :return: Names of chosen subsets in the order they were picked to the elements each of them
+        covers first.
+    """
+    uncovered = set(universe)
+    heap = [(-len(elements & uncovered), name) for name, elements in subsets.items()]
+    heapq.heapify(heap)
+    chosen = {}
+    while uncovered and heap:
+        _, name = heapq.heappop(heap)
+        covered = subsets[name] & uncovered
+        if not covered:
+            continue
+        # Stale gains may tie with the fresh one, those subsets with smaller names go first
+        if heap and (-len(covered), name) > heap[0]:
+            heapq.heappush(heap, (-len(covered), name))
+            continue
+        chosen[name] = covered
+        uncovered -= covered
+    return chosen
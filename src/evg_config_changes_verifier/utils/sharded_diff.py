@@ -0,0 +1,143 @@
+"""Comparison of configuration entities split into shards by name in forked worker processes."""
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import structlog
+
+LOGGER = structlog.get_logger(__name__)
+
+ResultT = TypeVar("ResultT")
+ShardFunction = Callable[[Any, List[str]], ResultT]
+
+# Number of compared entries, e.g. tasks or (build variant, task) entries, every worker process
+# gets at least. An entry is compared in about 0.2-0.3us and starting the workers takes about
+# 0.15s, so smaller comparisons are faster in a single process
+MIN_SHARD_SIZE = 1000000
+
+# Shard functions with their contexts and shards, set before forking the workers so that the
+# workers inherit them instead of receiving pickled copies of the configurations
+_SHARD_JOBS: Dict[int, Tuple[ShardFunction, Any, List[List[str]]]] = {}
+_SHARD_JOBS_LOCK = threading.Lock()
+_SHARD_JOB_IDS = itertools.count()
+
+# Threads that may run while forking the workers. Plumbum starts its timeout thread on import, it
+# waits on a queue the workers never use
+FORK_SAFE_THREADS = frozenset({"PlumbumTimeoutThread"})
+
+
+def get_shard(name: str, shards: int) -> int:
+    """
+    Get the shard an entity belongs to, the same in every process.
+
+    :param name: Name of the entity.
+    :param shards: Number of shards.
+    :return: Position of the shard.
+    """
+    return zlib.crc32(name.encode()) % shards
+
+
+def split_into_shards(names: Sequence[str], shards: int) -> List[List[str]]:
+    """
+    Split entity names into shards by their hashes.
+
+    :param names: Names of the entities.
+    :param shards: Number of shards.
+    :return: Names of the entities of every shard.
+    """
+    split: List[List[str]] = [[] for _ in range(shards)]
+    for name in names:
+        split[get_shard(name, shards)].append(name)
+    return split
+
+
+def can_fork_workers() -> bool:
+    """
+    Check whether worker processes can be forked safely from the current thread.
+
+    Workers are not forked by worker processes themselves, where processes cannot be forked and
+    while other threads run, which may hold locks the forked processes could never acquire.
+
+    :return: Whether worker processes can be forked.
+    """
+    return (
+        multiprocessing.parent_process() is None
+        and "fork" in multiprocessing.get_all_start_methods()
+        and threading.current_thread() is threading.main_thread()
+        and all(
+            thread is threading.main_thread() or thread.name in FORK_SAFE_THREADS
+            for thread in threading.enumerate()
+        )
+    )
+
+
+def get_shard_workers(size: int, min_shard_size: int = MIN_SHARD_SIZE) -> int:
+    """
+    Get number of worker processes to compare entities in.
+
+    :param size: Number of compared entries.
+    :param min_shard_size: Number of compared entries every worker gets at least.
+    :return: Number of worker processes, less than 2 to compare the entities in this process.
+    """
+    if not can_fork_workers():
+        return 1
+    return min(os.cpu_count() or 1, size // max(min_shard_size, 1))
+
+
+def _run_shard(job_id: int, shard: int) -> Any:
+    """
+    Run a shard function on a shard of an inherited job.
+
+    :param job_id: Id of the job.
+    :param shard: Position of the shard.
+    :return: Result of the shard function.
+    """
+    function, context, shards = _SHARD_JOBS[job_id]
+    return function(context, shards[shard])
+
+
+def map_shards(
+    function: ShardFunction,
+    context: Any,
+    names: Sequence[str],
+    size: Optional[int] = None,
+    min_shard_size: int = MIN_SHARD_SIZE,
+) -> List[ResultT]:
+    """
+    Apply a function to shards of entity names, in forked worker processes if they are large.
+
+    The function gets the context and names of the entities of a shard. Worker processes inherit
+    the context and the shards, only positions of the shards and the results are sent between
+    processes, so the function should not log or modify the context. Small comparisons run in this
+    process as a single shard with all the names.
+
+    :param function: Function comparing the entities of a shard.
+    :param context: Read-only state the function compares the entities in, e.g. configuration
+        states.
+    :param names: Names of the entities to compare.
+    :param size: Number of compared entries, defaults to the number of entities.
+    :param min_shard_size: Number of compared entries every worker gets at least.
+    :return: Results of the function for every shard in the order of the shards.
+    """
+    size = len(names) if size is None else size
+    workers = min(get_shard_workers(size, min_shard_size), len(names))
+    if workers < 2:
+        return [function(context, list(names))]
+
+    shards = split_into_shards(names, workers)
+    with _SHARD_JOBS_LOCK:
+        job_id = next(_SHARD_JOB_IDS)
+        _SHARD_JOBS[job_id] = (function, context, shards)
+    try:
+        LOGGER.debug("Comparing entities in worker processes.", workers=workers, size=size)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            return list(executor.map(_run_shard, itertools.repeat(job_id), range(workers)))
+    finally:
+        with _SHARD_JOBS_LOCK:
+            del _SHARD_JOBS[job_id]
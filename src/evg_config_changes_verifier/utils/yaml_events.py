@@ -0,0 +1,264 @@
+"""Construction of parts of a YAML document from its event stream."""
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import yaml
+from yaml.constructor import ConstructorError, SafeConstructor
+from yaml.events import (
+    AliasEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    Event,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from yaml.resolver import Resolver
+
+from evg_config_changes_verifier.utils.yaml_utils import SafeLoader
+
+STR_TAG = "tag:yaml.org,2002:str"
+MERGE_TAG = "tag:yaml.org,2002:merge"
+# Tags of collections constructed as plain lists and dicts, like the safe loader does
+PLAIN_COLLECTION_TAGS = (None, "!", "tag:yaml.org,2002:seq", "tag:yaml.org,2002:map")
+
+
+class YamlEventLoader:
+    """
+    Loader of a single YAML document that constructs parts of it on demand from parser events.
+
+    Items of the root mapping and items of its collections can be constructed one by one, so the
+    whole document never exists in memory at once. Values are constructed the same way the safe
+    loader constructs them, including scalar types, anchors, aliases and merge keys.
+    """
+
+    def __init__(self, document: Union[str, bytes, IO[bytes]]) -> None:
+        """
+        Initialize.
+
+        :param document: YAML document or a stream to read it from incrementally.
+        """
+        self._events = yaml.parse(document, Loader=SafeLoader)
+        self._anchors: Dict[str, Any] = {}
+        self._resolver = Resolver()
+        self._constructor = SafeConstructor()
+
+    @property
+    def anchored_values(self) -> Iterable[Any]:
+        """Values of the anchors defined so far, the only ones aliases may refer to later."""
+        return self._anchors.values()
+
+    def iter_root_mapping(self) -> Iterator[Tuple[Any, Event]]:
+        """
+        Iterate over the root mapping of the document.
+
+        The value of every item must be consumed with `construct` or `iter_items` before the
+        next item is requested.
+
+        :return: Iterator over keys and the first events of their values.
+        """
+        event = self._next_event()
+        if isinstance(event, StreamStartEvent):
+            event = self._next_event()
+        if isinstance(event, StreamEndEvent):
+            return
+        if not isinstance(event, DocumentStartEvent):
+            raise ConstructorError(None, None, f"expected a document, but found {event}")
+
+        event = self._next_event()
+        if isinstance(event, ScalarEvent) and self._construct_scalar(event) is None:
+            self._expect(DocumentEndEvent)
+            return
+        if not isinstance(event, MappingStartEvent) or event.anchor is not None:
+            raise ConstructorError(
+                None, None, "expected a mapping at the document root", event.start_mark
+            )
+
+        root_event = event
+        while True:
+            event = self._next_event()
+            if isinstance(event, MappingEndEvent):
+                break
+            yield self._construct_key(root_event, event), self._next_event()
+        self._expect(DocumentEndEvent)
+
+    def iter_items(self, event: Event) -> Iterator[Any]:
+        """
+        Iterate over items of a collection constructing them one by one.
+
+        :param event: The first event of the collection.
+        :return: Iterator over sequence items or over (key, value) pairs of mapping items.
+        """
+        if isinstance(event, SequenceStartEvent) and event.anchor is None:
+            self._check_collection_tag(event)
+            while True:
+                item_event = self._next_event()
+                if isinstance(item_event, SequenceEndEvent):
+                    return
+                yield self.construct(item_event)
+        elif isinstance(event, MappingStartEvent) and event.anchor is None:
+            yield from self._construct_mapping(event).items()
+        else:
+            # Anchored collections are constructed whole, aliases may refer to them later
+            value = self.construct(event)
+            if isinstance(value, dict):
+                yield from value.items()
+            elif value is not None:
+                yield from value
+
+    def construct(self, event: Event) -> Any:
+        """
+        Construct the value of the node starting with the given event.
+
+        :param event: The first event of the node.
+        :return: Constructed value.
+        """
+        if isinstance(event, ScalarEvent):
+            value = self._construct_scalar(event)
+        elif isinstance(event, AliasEvent):
+            if event.anchor not in self._anchors:
+                raise ConstructorError(
+                    None, None, f"found undefined alias {event.anchor}", event.start_mark
+                )
+            return self._anchors[event.anchor]
+        elif isinstance(event, SequenceStartEvent):
+            self._check_collection_tag(event)
+            value = []
+            if event.anchor is not None:
+                self._anchors[event.anchor] = value
+            while True:
+                item_event = self._next_event()
+                if isinstance(item_event, SequenceEndEvent):
+                    break
+                value.append(self.construct(item_event))
+        elif isinstance(event, MappingStartEvent):
+            value = self._construct_mapping(event)
+        else:
+            raise ConstructorError(None, None, f"unexpected {event}", event.start_mark)
+
+        if event.anchor is not None:
+            self._anchors[event.anchor] = value
+        return value
+
+    def _construct_mapping(self, event: MappingStartEvent) -> Dict[Any, Any]:
+        """
+        Construct a mapping, applying merge keys the way the safe loader does.
+
+        :param event: The first event of the mapping.
+        :return: Constructed mapping.
+        """
+        self._check_collection_tag(event)
+        value: Dict[Any, Any] = {}
+        merged: List[Dict[Any, Any]] = []
+        while True:
+            key_event = self._next_event()
+            if isinstance(key_event, MappingEndEvent):
+                break
+            if isinstance(key_event, ScalarEvent) and self._resolve(key_event) == MERGE_TAG:
+                merged.extend(self._get_merged_mappings(self._next_event()))
+                continue
+            key = self._construct_key(event, key_event)
+            value[key] = self.construct(self._next_event())
+
+        if merged:
+            # Earlier merged mappings take precedence over later ones, explicit keys over all
+            flattened: Dict[Any, Any] = {}
+            for mapping in reversed(merged):
+                flattened.update(mapping)
+            flattened.update(value)
+            value = flattened
+        return value
+
+    def _construct_key(self, event: MappingStartEvent, key_event: Event) -> Any:
+        """
+        Construct a mapping key.
+
+        :param event: The first event of the mapping.
+        :param key_event: The first event of the key.
+        :return: Constructed key.
+        """
+        key = self.construct(key_event)
+        if isinstance(key, (dict, list)):
+            raise ConstructorError(
+                "while constructing a mapping",
+                event.start_mark,
+                "found unhashable key",
+                key_event.start_mark,
+            )
+        return key
+
+    def _get_merged_mappings(self, event: Event) -> List[Dict[Any, Any]]:
+        """
+        Get mappings referred to by a merge key.
+
+        :param event: The first event of the merge key value.
+        :return: Mappings to merge in order of precedence.
+        """
+        value = self.construct(event)
+        mappings = value if isinstance(value, list) else [value]
+        if not all(isinstance(mapping, dict) for mapping in mappings):
+            raise ConstructorError(
+                "while constructing a mapping",
+                None,
+                "expected a mapping or list of mappings for merging",
+                event.start_mark,
+            )
+        return mappings
+
+    def _construct_scalar(self, event: ScalarEvent) -> Any:
+        """
+        Construct a scalar value.
+
+        :param event: Scalar event.
+        :return: Constructed value.
+        """
+        tag = self._resolve(event)
+        if tag == STR_TAG:
+            return event.value
+        constructor = self._constructor.yaml_constructors.get(tag)
+        if constructor is None:
+            constructor = self._constructor.yaml_constructors[None]
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, event.style)
+        return constructor(self._constructor, node)
+
+    def _resolve(self, event: ScalarEvent) -> str:
+        """
+        Resolve the tag of a scalar.
+
+        :param event: Scalar event.
+        :return: Resolved tag.
+        """
+        if event.tag is not None and event.tag != "!":
+            return event.tag
+        return self._resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+
+    @staticmethod
+    def _check_collection_tag(event: Event) -> None:
+        """
+        Make sure the collection is constructed as a plain list or dict.
+
+        :param event: The first event of the collection.
+        """
+        if event.tag not in PLAIN_COLLECTION_TAGS:
+            raise ConstructorError(
+                None, None, f"collections tagged {event.tag} are not supported", event.start_mark
+            )
+
+    def _next_event(self) -> Event:
+        """Get the next parser event."""
+        return next(self._events)
+
+    def _expect(self, event_type: type) -> None:
+        """
+        Consume the next event making sure it has the expected type.
+
+        :param event_type: Expected type of the event.
+        """
+        event = self._next_event()
+        if not isinstance(event, event_type):
+            raise ConstructorError(
+                None, None, f"expected {event_type.__name__}, but found {event}", event.start_mark
+            )
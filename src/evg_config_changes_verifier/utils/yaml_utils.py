@@ -0,0 +1,17 @@
+"""Helpers for parsing YAML documents."""
+from typing import IO, Any, Union
+
+import yaml
+
+# libyaml based loader is several times faster, fall back to pure python one if it is unavailable
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(document: Union[str, bytes, IO[bytes]]) -> Any:
+    """
+    Parse YAML document.
+
+    :param document: YAML document or a stream to read it from incrementally.
+    :return: Parsed document.
+    """
+    return yaml.load(document, Loader=SafeLoader)
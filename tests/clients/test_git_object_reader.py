@@ -0,0 +1,44 @@
+import pytest
+from plumbum import local
+
+import evg_config_changes_verifier.clients.git_object_reader as under_test
+from tests.git_repo import run_git
+
+
+def test_read_many_should_return_none_for_missing_objects_with_spaces_in_names(
+    git_repo, commit_files
+):
+    commit_files({"etc/evergreen.yml": "tasks: []\n", "etc/inc.yml": "functions: {}\n"})
+    reader = under_test.GitObjectReader(local.cmd.git)
+
+    missing, included = reader.read_many(["HEAD:no such.yml", "HEAD:etc/inc.yml"])
+    evergreen = reader.read("HEAD:etc/evergreen.yml")
+    reader.close()
+
+    assert missing is None
+    assert included.oid == run_git(git_repo, "rev-parse", "HEAD:etc/inc.yml")
+    assert evergreen.oid == run_git(git_repo, "rev-parse", "HEAD:etc/evergreen.yml")
+    assert evergreen.content == b"tasks: []\n"
+
+
+def test_read_should_return_objects_after_a_failed_request(git_repo, commit_files, monkeypatch):
+    commit_files({"etc/evergreen.yml": "tasks: []\n"})
+    reader = under_test.GitObjectReader(local.cmd.git)
+    reader.read("HEAD")
+    process = reader._process
+    # The process answers with garbage, e.g. it was replaced by something else
+    monkeypatch.setattr(process.stdout, "readline", lambda: b"garbage\n")
+
+    with pytest.raises(under_test.GitObjectError):
+        reader.read("HEAD:etc/evergreen.yml")
+    evergreen = reader.read("HEAD:etc/evergreen.yml")
+    reader.close()
+
+    assert reader._process is None or reader._process is not process
+    assert evergreen.content == b"tasks: []\n"
+
+
+def test_hash_blob_should_match_git_hash_object(git_repo):
+    (git_repo / "file.yml").write_text("tasks: []\n")
+
+    assert under_test.hash_blob(b"tasks: []\n") == run_git(git_repo, "hash-object", "file.yml")
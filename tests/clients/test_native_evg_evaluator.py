@@ -0,0 +1,74 @@
+import shutil
+import warnings
+from pathlib import Path
+
+import pytest
+
+import evg_config_changes_verifier.clients.native_evg_evaluator as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.utils.yaml_utils import load_yaml
+
+# Project configurations with the `evergreen evaluate --path etc/evergreen.yml` output expected
+FIXTURES = Path(__file__).parent.parent / "data" / "native_evaluator"
+CASES = sorted(case.name for case in FIXTURES.iterdir() if case.is_dir())
+# Cases with expected outputs written by hand instead of recorded from `evergreen evaluate`, the
+# parity with evergreen is not verified for them, see the README.md of the fixtures
+PROVISIONAL_CASES = frozenset(CASES)
+
+
+@pytest.fixture()
+def evaluator():
+    return under_test.NativeEvgEvaluator(GitCliProxy.create())
+
+
+def copy_case(case: str, destination: Path):
+    shutil.copytree(FIXTURES / case / "repo", destination, dirs_exist_ok=True)
+    return load_yaml((FIXTURES / case / "evaluated.yml").read_text())
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_evaluate_config_should_match_evergreen_evaluate(git_repo, evaluator, case):
+    if case in PROVISIONAL_CASES:
+        # Still checks the merge rules the expected output was written with
+        warnings.warn(f"Expected evaluation of '{case}' is not recorded from evergreen.")
+    recorded = copy_case(case, git_repo)
+
+    assert evaluator.evaluate_config(Path("etc/evergreen.yml")) == recorded
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_evaluate_config_should_resolve_includes_from_subdirectory(
+    git_repo, evaluator, monkeypatch, case
+):
+    recorded = copy_case(case, git_repo)
+    monkeypatch.chdir(git_repo / "etc")
+
+    assert evaluator.evaluate_config(Path("evergreen.yml")) == recorded
+
+
+def test_evaluate_config_should_resolve_includes_from_checkout_root(
+    git_repo, evaluator, monkeypatch, tmp_path
+):
+    copy_case("includes", git_repo)
+    checkout = tmp_path / "checkout"
+    recorded = copy_case("variant_merging", checkout)
+    monkeypatch.chdir(git_repo / "etc")
+
+    evaluated = evaluator.evaluate_config(Path("evergreen.yml"), cwd=checkout / "etc")
+
+    assert evaluated == recorded
+
+
+def test_evaluate_should_output_evaluated_yaml(git_repo, evaluator):
+    recorded = copy_case("anchors", git_repo)
+
+    assert load_yaml(evaluator.evaluate(Path("etc/evergreen.yml"))) == recorded
+
+
+def test_evaluate_config_should_reject_redefined_variant_keys(git_repo, evaluator):
+    copy_case("variant_merging", git_repo)
+    variants = git_repo / "etc" / "variants" / "linux_extra.yml"
+    variants.write_text(variants.read_text().replace("display_name: Linux", "display_name: Other"))
+
+    with pytest.raises(under_test.EvgEvaluationError, match="redefines 'display_name'"):
+        evaluator.evaluate_config(Path("etc/evergreen.yml"))
@@ -0,0 +1,30 @@
+"""Shared fixtures of the tests."""
+from pathlib import Path
+from typing import Callable, Dict
+
+import pytest
+
+from tests.git_repo import run_git, write_files
+
+
+@pytest.fixture()
+def git_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Empty git repository that is the current working directory."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    run_git(repo, "init", "-q", "-b", "master")
+    monkeypatch.chdir(repo)
+    return repo
+
+
+@pytest.fixture()
+def commit_files(git_repo: Path) -> Callable[[Dict[str, str]], str]:
+    """Function writing files into the repository and committing them, returns the commit."""
+
+    def commit(files: Dict[str, str]) -> str:
+        write_files(git_repo, files)
+        run_git(git_repo, "add", "-A")
+        run_git(git_repo, "commit", "-q", "-m", "commit")
+        return run_git(git_repo, "rev-parse", "HEAD")
+
+    return commit
@@ -0,0 +1,42 @@
+"""Helpers creating git repositories in the tests."""
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def run_git(repo: Path, *args: str) -> str:
+    """
+    Run a git command in a repository.
+
+    :param repo: Repository root.
+    :param args: Arguments of the git command.
+    :return: Standard output of the command.
+    """
+    return subprocess.run(
+        ["git", "-C", str(repo), *args],
+        env={**os.environ, **GIT_ENV},
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+
+
+def write_files(repo: Path, files: Dict[str, str]) -> None:
+    """
+    Write files into a repository working tree.
+
+    :param repo: Repository root.
+    :param files: Paths of the files relative to the repository root to their contents.
+    """
+    for path, content in files.items():
+        file_path = repo / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
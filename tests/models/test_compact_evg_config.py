@@ -0,0 +1,82 @@
+import yaml
+
+import evg_config_changes_verifier.models.compact_evg_config as under_test
+from evg_config_changes_verifier.utils import config_hasher
+
+ALIASED_YML = """
+variables:
+  - &setup
+    - command: shell.exec
+      params:
+        script: ./setup.sh
+        env: {A: "1", B: "2"}
+tasks:
+  - name: t1
+    commands: *setup
+  - name: t2
+    commands: *setup
+  - name: t3
+    commands: *setup
+"""
+
+
+class ExpandingDumper(yaml.SafeDumper):
+    """Dumper writing shared objects again instead of aliases to them."""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def count_hashed_collections(monkeypatch):
+    hashed = []
+    blake2b = config_hasher.hashlib.blake2b
+
+    def counting_blake2b(*args, **kwargs):
+        hashed.append(args[0])
+        return blake2b(*args, **kwargs)
+
+    monkeypatch.setattr(config_hasher.hashlib, "blake2b", counting_blake2b)
+    return hashed
+
+
+def test_load_should_hash_sub_trees_shared_by_aliases_once(monkeypatch):
+    # The same configuration with the aliases expanded, as `evergreen evaluate` prints it
+    expanded_yml = yaml.dump(yaml.safe_load(ALIASED_YML), Dumper=ExpandingDumper)
+    hashed = count_hashed_collections(monkeypatch)
+
+    expanded = under_test.CompactEvgConfig.load(expanded_yml)
+    expanded_count = len(hashed)
+    hashed.clear()
+    aliased = under_test.CompactEvgConfig.load(ALIASED_YML)
+
+    assert aliased == expanded
+    # The commands list, the command and its params and env mappings are hashed once, in the
+    # variables section, instead of for every task too
+    assert len(hashed) == expanded_count - 3 * 4
+
+
+def test_load_should_match_from_dict():
+    assert under_test.CompactEvgConfig.load(ALIASED_YML) == under_test.CompactEvgConfig.from_dict(
+        yaml.safe_load(ALIASED_YML)
+    )
+
+
+def test_from_dict_should_not_depend_on_order_of_mapping_keys():
+    reordered_yml = """
+tasks:
+  - commands:
+      - params: {env: {B: "2", A: "1"}, script: ./setup.sh}
+        command: shell.exec
+    name: t1
+"""
+    original_yml = """
+tasks:
+  - name: t1
+    commands:
+      - command: shell.exec
+        params: {script: ./setup.sh, env: {A: "1", B: "2"}}
+"""
+
+    assert under_test.CompactEvgConfig.from_dict(
+        yaml.safe_load(reordered_yml)
+    ) == under_test.CompactEvgConfig.from_dict(yaml.safe_load(original_yml))
@@ -0,0 +1,123 @@
+import pytest
+import yaml
+
+import evg_config_changes_verifier.models.evg_config_index as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+
+EVERGREEN_YML = """
+pre:
+  - func: setup
+functions:
+  setup:
+    - command: shell.exec
+      params: {script: "./setup.sh ${workdir}"}
+  build:
+    - command: shell.exec
+      params: {script: "make ${compile_flags}"}
+  fixture:
+    - command: shell.exec
+      params: {script: ./fixture.sh}
+tasks:
+  - name: compile
+    commands:
+      - func: build
+  - name: unit
+    commands:
+      - func: build
+      - command: shell.exec
+        params: {script: "./test.sh ${test_flags}"}
+  - name: integration
+    commands:
+      - command: shell.exec
+        params: {script: ./integration.sh}
+  - name: shell
+    commands:
+      - command: shell.exec
+        params: {script: ./shell.sh, add_expansions_to_env: true}
+task_groups:
+  - name: tests
+    setup_group:
+      - func: fixture
+    tasks: [unit, integration]
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: compile
+      - name: tests
+  - name: windows
+    run_on: [windows]
+    tasks:
+      - name: integration
+    display_tasks:
+      - name: all_tests
+        execution_tasks: [unit]
+"""
+
+
+@pytest.fixture()
+def evg_config_index():
+    return under_test.EvgConfigIndex.create(
+        CompactEvgConfig.from_dict(yaml.safe_load(EVERGREEN_YML))
+    )
+
+
+def test_create_should_map_functions_to_callers(evg_config_index):
+    assert evg_config_index.func_to_tasks == {"build": {"compile", "unit"}}
+    assert evg_config_index.func_to_task_groups == {"fixture": {"tests"}}
+    assert evg_config_index.project_funcs == {"setup"}
+
+
+def test_create_should_map_tasks_to_task_groups_and_variants(evg_config_index):
+    assert evg_config_index.task_to_task_groups == {"unit": {"tests"}, "integration": {"tests"}}
+    assert evg_config_index.task_or_group_to_variants == {
+        "compile": {"linux"},
+        "tests": {"linux"},
+        "integration": {"windows"},
+        # Execution tasks of display tasks are listed by the build variant too
+        "unit": {"windows"},
+    }
+    assert evg_config_index.standalone_tasks == {"compile", "integration"}
+
+
+def test_create_should_resolve_expansions_read_by_tasks_and_groups(evg_config_index):
+    expansions = evg_config_index.task_or_group_expansions
+
+    # Standalone tasks run the project-level blocks too
+    assert expansions["compile"] == {"compile_flags", "workdir"}
+    assert expansions["integration"] == {"workdir"}
+    # Task groups read the expansions of their tasks but do not run project-level blocks
+    assert expansions["tests"] == {"compile_flags", "test_flags"}
+
+
+def test_get_tasks_calling_should_collect_callers(evg_config_index):
+    assert evg_config_index.get_tasks_calling(["build", "setup", "unknown"]) == {"compile", "unit"}
+
+
+def test_get_task_groups_affected_by_should_collect_by_functions_and_tasks(evg_config_index):
+    assert evg_config_index.get_task_groups_affected_by(["fixture"], []) == {"tests"}
+    assert evg_config_index.get_task_groups_affected_by([], ["integration"]) == {"tests"}
+    assert evg_config_index.get_task_groups_affected_by(["build"], ["compile"]) == set()
+
+
+def test_get_listed_tasks_by_variant_should_group_tasks_by_variant(evg_config_index):
+    assert evg_config_index.get_listed_tasks_by_variant(["compile", "unit", "integration"]) == {
+        "linux": {"compile"},
+        "windows": {"unit", "integration"},
+    }
+
+
+def test_get_tasks_reading_should_include_unknown_and_unresolved_tasks(evg_config_index):
+    assert evg_config_index.get_tasks_reading(
+        ["compile", "integration", "tests", "shell", "unknown"], {"compile_flags"}
+    ) == {"compile", "tests", "shell", "unknown"}
+
+
+def test_get_expansions_read_by_should_intersect_read_expansions(evg_config_index):
+    assert evg_config_index.get_expansions_read_by("tests", {"test_flags", "workdir"}) == {
+        "test_flags"
+    }
+    assert evg_config_index.get_expansions_read_by("shell", {"test_flags", "workdir"}) == {
+        "test_flags",
+        "workdir",
+    }
@@ -0,0 +1,99 @@
+import json
+
+import yaml
+
+import evg_config_changes_verifier.models.evg_models as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+
+ORIGINAL_YML = """
+functions:
+  build:
+    - command: shell.exec
+      params:
+        script: make
+tasks:
+  - name: compile
+    commands:
+      - func: build
+  - name: lint
+    commands:
+      - command: shell.exec
+        params:
+          script: ./lint.sh
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: compile
+      - name: lint
+"""
+
+
+def find_changes(original_yml: str, patched_yml: str) -> under_test.EvgConfigChanges:
+    return find_evg_config_changes(
+        under_test.EvgConfigStates.create(
+            CompactEvgConfig.from_dict(yaml.safe_load(original_yml)),
+            CompactEvgConfig.from_dict(yaml.safe_load(patched_yml)),
+        )
+    )
+
+
+def test_from_dict_should_restore_reasons():
+    evg_config_changes = find_changes(ORIGINAL_YML, ORIGINAL_YML.replace("make", "make -j8"))
+
+    # The daemon sends the dictionary as JSON
+    restored = under_test.EvgConfigChanges.from_dict(
+        json.loads(json.dumps(evg_config_changes.as_dict()))
+    )
+
+    assert restored == evg_config_changes
+    assert restored.get_reasons() == evg_config_changes.get_reasons()
+    assert restored.as_dict()["reasons"]["tasks_and_groups"] == {
+        "compile": [{"code": "calls_changed_functions", "related": ["build"]}]
+    }
+
+
+def test_from_dict_should_restore_empty_changes():
+    evg_config_changes = under_test.EvgConfigChanges.create_empty()
+
+    assert under_test.EvgConfigChanges.from_dict(evg_config_changes.as_dict()) == (
+        evg_config_changes
+    )
+
+
+def make_changes(variant_tasks):
+    evg_config_changes = under_test.EvgConfigChanges.create_empty()
+    for variant, tasks in variant_tasks.items():
+        evg_config_changes.variants.add(variant)
+        evg_config_changes.tasks_and_groups.update(tasks)
+        evg_config_changes.add_variant_tasks(variant, tasks)
+    return evg_config_changes
+
+
+def test_as_per_variant_evg_patch_cmd_args_should_group_variants_running_the_same_tasks():
+    evg_config_changes = make_changes(
+        {"linux": {"lint"}, "macos": {"lint"}, "windows": {"unit", "compile"}}
+    )
+
+    assert evg_config_changes.as_per_variant_evg_patch_cmd_args() == [
+        "-v linux -v macos -t lint",
+        "-v windows -t compile -t unit",
+    ]
+    assert evg_config_changes.as_patch_params() == {
+        "variants_tasks": [
+            {"variant": "linux", "tasks": ["lint"]},
+            {"variant": "macos", "tasks": ["lint"]},
+            {"variant": "windows", "tasks": ["compile", "unit"]},
+        ]
+    }
+
+
+def test_get_cross_product_should_leave_out_represented_and_skipped_pairs():
+    evg_config_changes = make_changes({"linux": {"lint", "unit"}, "macos": {"lint"}})
+    evg_config_changes.variants.update({"rhel", "windows"})
+    evg_config_changes.tasks_and_groups.add("compile")
+    evg_config_changes.represented_variants["rhel"] = {"linux"}
+    evg_config_changes.skipped_variant_tasks.update({"windows": {"compile"}, "linux": {"compile"}})
+
+    assert evg_config_changes.get_cross_product() == ({"linux", "macos"}, {"lint", "unit"})
@@ -0,0 +1,102 @@
+import json
+import pickle
+
+import pytest
+
+import evg_config_changes_verifier.services.baseline_snapshot as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_config_index import EvgConfigIndex
+
+REVISION = "0" * 40
+
+
+@pytest.fixture()
+def evg_config():
+    return CompactEvgConfig.from_dict(
+        {
+            "functions": {
+                "compile": [{"command": "shell.exec", "params": {"script": "make ${flags}"}}],
+                "upload": [{"command": "expansions.write", "params": {"file": "exp.yml"}}],
+            },
+            "pre": [{"func": "upload"}],
+            "tasks": [
+                {"name": "build", "commands": [{"func": "compile"}]},
+                {"name": "test", "commands": [{"command": "shell.exec"}]},
+            ],
+            "task_groups": [
+                {"name": "group", "setup_group": [{"func": "upload"}], "tasks": ["test"]}
+            ],
+            "buildvariants": [
+                {
+                    "name": "linux",
+                    "run_on": ["ubuntu"],
+                    "expansions": {"flags": "-j8", "args": "${flags} -O2"},
+                    "modules": ["enterprise"],
+                    "tasks": [{"name": "build"}, {"name": "group"}],
+                    "display_tasks": [{"name": "all", "execution_tasks": ["build"]}],
+                }
+            ],
+            "modules": [{"name": "enterprise", "repo": "git@github.com:org/enterprise.git"}],
+            "parameters": [{"key": "version", "value": "1"}],
+            "stepback": True,
+        }
+    )
+
+
+def test_get_should_rebuild_written_configuration_and_index(tmp_path, evg_config):
+    snapshot = under_test.BaselineSnapshot.write(
+        tmp_path, REVISION, "native", {"etc/evergreen.yml": evg_config}
+    )
+
+    loaded = under_test.BaselineSnapshot.open(snapshot.path).get("etc/evergreen.yml")
+
+    assert loaded == (evg_config, EvgConfigIndex.create(evg_config))
+    assert loaded[0].tasks["build"].funcs == frozenset({"compile"})
+    assert loaded[0].functions["upload"].expansions is None
+    assert isinstance(loaded[0].task_groups["group"].tasks, tuple)
+    assert snapshot.get("etc/other.yml") is None
+
+
+def test_snapshot_entries_should_be_data_only(tmp_path, evg_config):
+    snapshot = under_test.BaselineSnapshot.write(
+        tmp_path, REVISION, "native", {"etc/evergreen.yml": evg_config}
+    )
+    offset, length = snapshot.entries["etc/evergreen.yml"]
+
+    entry = json.loads(snapshot.path.read_bytes()[offset : offset + length])
+
+    assert under_test.decode_state(entry) == (evg_config, EvgConfigIndex.create(evg_config))
+
+
+def test_get_should_reject_pickled_entries(tmp_path, evg_config):
+    snapshot = under_test.BaselineSnapshot.write(
+        tmp_path, REVISION, "native", {"etc/evergreen.yml": evg_config}
+    )
+    offset, _ = snapshot.entries["etc/evergreen.yml"]
+    payload = pickle.dumps((evg_config, EvgConfigIndex.create(evg_config)))
+    snapshot.path.write_bytes(snapshot.path.read_bytes()[:offset] + payload)
+    snapshot.entries["etc/evergreen.yml"] = (offset, len(payload))
+
+    with pytest.raises(under_test.BaselineSnapshotError, match="invalid entry"):
+        snapshot.get("etc/evergreen.yml")
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        b"[]",
+        b'{"entries": 1}',
+        b'{"revision": "r", "evaluator": "native", "entries": {"etc/evergreen.yml": 1}}',
+        b'{"revision": "r", "evaluator": "native", "entries": {"etc/evergreen.yml": [0, -1]}}',
+        b"{",
+    ],
+)
+def test_open_should_reject_invalid_headers(tmp_path, header):
+    path = tmp_path / f"{REVISION}.evgsnap"
+    preamble = under_test.PREAMBLE.pack(
+        under_test.SNAPSHOT_MAGIC, under_test.SNAPSHOT_FORMAT_VERSION, len(header)
+    )
+    path.write_bytes(preamble + header)
+
+    with pytest.raises(under_test.BaselineSnapshotError, match="invalid header"):
+        under_test.BaselineSnapshot.open(path)
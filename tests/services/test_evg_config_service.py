@@ -0,0 +1,137 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import evg_config_changes_verifier.services.evg_config_service as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+from evg_config_changes_verifier.services.baseline_snapshot import (
+    PREAMBLE,
+    SNAPSHOT_FORMAT_VERSION,
+    SNAPSHOT_MAGIC,
+)
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from tests.git_repo import write_files
+
+
+class FakeEvgCliProxy:
+    """Evaluator recording the checkouts every call evaluates in."""
+
+    evaluator_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+        self.earlier_checkouts_left = []
+
+    def evaluate_configs(self, evaluations):
+        self.earlier_checkouts_left.extend(
+            cwd for cwds in self.calls for cwd in cwds if cwd is not None and cwd.exists()
+        )
+        self.calls.append([cwd for _, cwd in evaluations])
+        return [
+            CompactEvgConfig.from_dict({"tasks": [{"name": (cwd / location).read_text().strip()}]})
+            for location, cwd in evaluations
+        ]
+
+
+@pytest.fixture()
+def evg_cli_proxy():
+    return FakeEvgCliProxy()
+
+
+@pytest.fixture()
+def evg_config_service(evg_cli_proxy):
+    git_cli_proxy = GitCliProxy.create()
+    return under_test.EvgConfigService(
+        git_cli_proxy=git_cli_proxy,
+        evg_cli_proxy=evg_cli_proxy,
+        evg_include_service=EvgIncludeService(git_cli_proxy),
+        evg_config_cache=EvgConfigCache(None),
+    )
+
+
+def test_evaluate_revisions_should_check_out_a_window_of_revisions_at_a_time(
+    commit_files, evg_config_service, evg_cli_proxy, monkeypatch
+):
+    monkeypatch.setattr(under_test, "MAX_CONCURRENT_EVALUATIONS", 2)
+    revisions = [commit_files({"etc/evergreen.yml": f"t{i}\n"}) for i in range(5)]
+
+    configs = evg_config_service.evaluate_revisions("etc/evergreen.yml", revisions)
+
+    assert [list(config.tasks) for config in configs] == [[f"t{i}"] for i in range(5)]
+    assert [len(cwds) for cwds in evg_cli_proxy.calls] == [2, 2, 1]
+    # Checkouts of a window are removed before the next one is checked out
+    assert evg_cli_proxy.earlier_checkouts_left == []
+
+
+def evergreen_yml(script: str) -> str:
+    return f"""
+include:
+  - filename: etc/functions.yml
+tasks:
+  - name: lint
+    commands:
+      - func: setup
+      - command: shell.exec
+        params:
+          script: {script}
+  - name: test
+    commands:
+      - func: setup
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: lint
+      - name: test
+"""
+
+
+FUNCTIONS_YML = """
+functions:
+  setup:
+    - command: shell.exec
+      params:
+        script: ./setup.sh
+"""
+
+
+@pytest.mark.parametrize("absolute", [True, False])
+@pytest.mark.parametrize("cwd", [".", "etc"])
+def test_get_evg_config_states_should_evaluate_original_state_in_worktree(
+    git_repo, commit_files, monkeypatch, absolute, cwd
+):
+    commit_files({"etc/evergreen.yml": evergreen_yml("a"), "etc/functions.yml": FUNCTIONS_YML})
+    write_files(git_repo, {"etc/evergreen.yml": evergreen_yml("b")})
+    monkeypatch.chdir(git_repo / cwd)
+    evg_project_yaml = git_repo / "etc" / "evergreen.yml"
+    if not absolute:
+        evg_project_yaml = Path(os.path.relpath(evg_project_yaml))
+    git_cli_proxy = GitCliProxy.create()
+    evg_config_service = under_test.EvgConfigService(
+        git_cli_proxy=git_cli_proxy,
+        evg_cli_proxy=NativeEvgEvaluator(git_cli_proxy),
+        evg_include_service=EvgIncludeService(git_cli_proxy),
+        evg_config_cache=EvgConfigCache(None),
+    )
+
+    states = evg_config_service.get_evg_config_states(evg_project_yaml, "master", use_worktree=True)
+
+    # The original state is the committed one, not the one of the working tree
+    changes = find_evg_config_changes(states)
+    assert changes.tasks_and_groups == {"lint"}
+    assert changes.variants == {"linux"}
+
+
+def test_load_baseline_snapshot_should_ignore_snapshot_with_invalid_header(
+    git_repo, evg_config_service, tmp_path
+):
+    path = tmp_path / "snapshot.evgsnap"
+    header = b'{"entries": 1}'
+    path.write_bytes(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)) + header)
+
+    assert evg_config_service._load_baseline_snapshot(path, [Path("etc/evergreen.yml")], "0") == {}
@@ -0,0 +1,46 @@
+import pytest
+
+import evg_config_changes_verifier.services.evg_include_service as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from tests.git_repo import write_files
+
+EVERGREEN_YML = "include:\n  - filename: etc/inc.yml\ntasks: []\n"
+# Unterminated flow sequence of includes
+INVALID_YML = "include: [\n"
+
+
+@pytest.fixture()
+def include_service():
+    return under_test.EvgIncludeService(git_cli_proxy=GitCliProxy.create())
+
+
+def test_get_include_closure_should_read_included_files(commit_files, include_service):
+    revision = commit_files({"etc/evergreen.yml": EVERGREEN_YML, "etc/inc.yml": "functions: {}\n"})
+
+    closure = include_service.get_include_closure("etc/evergreen.yml", revision)
+
+    assert list(closure.contents) == ["etc/evergreen.yml", "etc/inc.yml"]
+    assert include_service.get_include_closure_files("etc/evergreen.yml") == list(closure.contents)
+
+
+def test_get_include_closure_should_return_none_for_invalid_yaml(commit_files, include_service):
+    revision = commit_files({"etc/evergreen.yml": EVERGREEN_YML, "etc/inc.yml": INVALID_YML})
+
+    assert include_service.get_include_closure("etc/evergreen.yml", revision) is None
+    assert include_service.get_include_closure("etc/evergreen.yml", None) is None
+    assert include_service.get_include_closure_files("etc/evergreen.yml") is None
+
+
+def test_get_include_closure_should_return_none_for_invalid_overrides(
+    commit_files, git_repo, include_service
+):
+    revision = commit_files({"etc/evergreen.yml": EVERGREEN_YML, "etc/inc.yml": "functions: {}\n"})
+    write_files(git_repo, {"etc/evergreen.yml": INVALID_YML})
+
+    assert include_service.get_include_closure_files("etc/evergreen.yml") is None
+    assert (
+        include_service.get_include_closure(
+            "etc/evergreen.yml", revision, overrides={"etc/evergreen.yml": INVALID_YML}
+        )
+        is None
+    )
@@ -0,0 +1,118 @@
+import pytest
+import yaml
+
+import evg_config_changes_verifier.services.history_index as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+
+
+def make_config(lint_script: str) -> CompactEvgConfig:
+    return CompactEvgConfig.from_dict(
+        yaml.safe_load(
+            f"""
+functions:
+  build:
+    - command: shell.exec
+      params:
+        script: make
+tasks:
+  - name: compile
+    commands:
+      - func: build
+  - name: lint
+    commands:
+      - command: shell.exec
+        params:
+          script: {lint_script}
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: compile
+      - name: lint
+"""
+        )
+    )
+
+
+@pytest.fixture()
+def index_path(tmp_path):
+    return tmp_path / "history" / f"index{under_test.HISTORY_INDEX_SUFFIX}"
+
+
+@pytest.fixture()
+def history_index(index_path):
+    history_index = under_test.HistoryIndex.open(index_path, "evergreen.yml", "native")
+    yield history_index
+    history_index.close()
+
+
+def count_versions(history_index, kind, name):
+    (count,) = history_index.connection.execute(
+        "SELECT COUNT(*) FROM versions WHERE kind = ? AND name = ?", (kind, name)
+    ).fetchone()
+    return count
+
+
+def test_get_config_should_rebuild_stored_configs(index_path, history_index):
+    first, second = make_config("./lint.sh"), make_config("./lint.sh --strict")
+    history_index.append(["a", "b", "c"], [first, first, second])
+    history_index.close()
+
+    reopened = under_test.HistoryIndex.open(index_path, "evergreen.yml", "native")
+
+    assert reopened.size == 3
+    assert reopened.tip == "c"
+    assert reopened.get_position("b") == 1
+    assert reopened.get_commit(2) == "c"
+    assert [reopened.get_config(position) for position in range(3)] == [first, first, second]
+    reopened.close()
+
+
+def test_append_should_store_every_entity_version_once(history_index):
+    first, second = make_config("./lint.sh"), make_config("./lint.sh --strict")
+    history_index.append(["a", "b"], [first, make_config("./lint.sh")])
+    history_index.append(["c", "d"], [second, make_config("./lint.sh")])
+
+    assert count_versions(history_index, "tasks", "compile") == 1
+    assert count_versions(history_index, "functions", "build") == 1
+    assert count_versions(history_index, "tasks", "lint") == 3
+    # The version of the lint task at the last commit shares the record of the first one
+    (records,) = history_index.connection.execute(
+        "SELECT COUNT(*) FROM records WHERE kind = 'tasks'"
+    ).fetchone()
+    assert records == 3
+    assert history_index.get_change_positions(0, 3) == [2, 3]
+    assert history_index.get_config(3) == first
+
+
+def test_append_should_keep_previous_versions_at_unevaluable_commits(history_index):
+    first, second = make_config("./lint.sh"), make_config("./lint.sh --strict")
+    history_index.append(["a", "b", "c"], [first, None, second])
+
+    assert [history_index.is_evaluated(position) for position in range(3)] == [
+        True,
+        False,
+        True,
+    ]
+    assert history_index.get_config(1) == first
+    assert history_index.get_change_positions(0, 2) == [2]
+
+
+def test_open_should_reject_index_of_another_project(index_path, history_index):
+    history_index.close()
+
+    with pytest.raises(under_test.HistoryIndexError):
+        under_test.HistoryIndex.open(index_path, "etc/evergreen.yml", "native")
+
+
+def test_open_should_rebuild_index_of_another_format_version(index_path, history_index):
+    history_index.append(["a"], [make_config("./lint.sh")])
+    with history_index.connection:
+        history_index.connection.execute("UPDATE meta SET value = '0' WHERE key = 'format_version'")
+    history_index.close()
+
+    rebuilt = under_test.HistoryIndex.open(index_path, "evergreen.yml", "native")
+
+    assert rebuilt.size == 0
+    assert rebuilt.tip is None
+    rebuilt.close()
@@ -0,0 +1,166 @@
+import pytest
+
+import evg_config_changes_verifier.services.task_selection_service as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigStates
+from evg_config_changes_verifier.models.task_durations import TaskDurations
+from evg_config_changes_verifier.orchestrator import find_evg_config_changes
+
+
+def build_config(script: str) -> CompactEvgConfig:
+    return CompactEvgConfig.from_dict(
+        {
+            "tasks": [
+                {
+                    "name": name,
+                    "commands": [{"command": "shell.exec", "params": {"script": script}}],
+                }
+                for name in ("t1", "t2")
+            ],
+            "buildvariants": [
+                {"name": name, "run_on": [name], "tasks": [{"name": "t1"}, {"name": "t2"}]}
+                for name in ("a", "b")
+            ],
+        }
+    )
+
+
+@pytest.fixture()
+def states():
+    return EvgConfigStates.create(build_config("echo original"), build_config("echo patched"))
+
+
+@pytest.fixture()
+def task_durations():
+    return TaskDurations.create(
+        [(variant, task, 10.0) for variant in ("a", "b") for task in ("t1", "t2")]
+    )
+
+
+def get_scheduled_runs(changes):
+    variants, tasks = changes.get_cross_product()
+    return {(variant, task) for variant in variants for task in tasks}
+
+
+def test_select_should_keep_cross_product_within_budget(states, task_durations):
+    changes = find_evg_config_changes(states)
+    selection = under_test.TaskSelectionService(task_durations=task_durations, budget=20)
+
+    selected = selection.select(states, changes)
+
+    scheduled = get_scheduled_runs(selected)
+    assert len(scheduled) == 2
+    assert selected.estimated_cost == 20
+    assert selected.get_pair_runs() == 2
+    for variant, tasks in selected.variant_tasks.items():
+        assert {(variant, task) for task in tasks} <= scheduled
+    for variant, tasks in selected.skipped_variant_tasks.items():
+        assert not {(variant, task) for task in tasks} & scheduled
+
+
+def test_select_should_keep_selected_pairs_within_budget_per_variant(states, task_durations):
+    changes = find_evg_config_changes(states)
+    selection = under_test.TaskSelectionService(
+        task_durations=task_durations, budget=30, cross_product=False
+    )
+
+    selected = selection.select(states, changes)
+
+    assert selected.get_pair_runs() == 3
+    assert selected.estimated_cost == 30
+
+
+def test_select_should_report_cost_of_all_scheduled_runs_without_budget(states, task_durations):
+    changes = find_evg_config_changes(states)
+    selection = under_test.TaskSelectionService(task_durations=task_durations)
+
+    selected = selection.select(states, changes)
+
+    assert len(get_scheduled_runs(selected)) == 4
+    assert selected.estimated_cost == 40
+    assert not selected.skipped_variant_tasks
+
+
+def build_variants_config(script, expansions=None, lint_entry=None):
+    variants = {
+        "linux": {"run_on": ["ubuntu"], "expansions": {"tag": "a"}},
+        "linux-debug": {"run_on": ["ubuntu"], "expansions": {"tag": "b"}},
+        "windows": {"run_on": ["windows"]},
+    }
+    variants["linux-debug"]["expansions"].update(expansions or {})
+    return CompactEvgConfig.from_dict(
+        {
+            "tasks": [
+                {
+                    "name": name,
+                    "commands": [{"command": "shell.exec", "params": {"script": script}}],
+                }
+                for name in ("compile", "lint")
+            ],
+            "buildvariants": [
+                {
+                    "name": name,
+                    **variant,
+                    "tasks": [
+                        {"name": "compile"},
+                        lint_entry if name == "linux-debug" and lint_entry else {"name": "lint"},
+                    ],
+                }
+                for name, variant in variants.items()
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "ignored_expansions, expansions, lint_entry, variant_tasks, represented_variants",
+    [
+        # Build variants with different expansions run tasks in different environments
+        (
+            (),
+            None,
+            None,
+            {v: {"compile", "lint"} for v in ("linux", "linux-debug", "windows")},
+            {},
+        ),
+        (
+            ["tag"],
+            None,
+            None,
+            {v: {"compile", "lint"} for v in ("linux", "windows")},
+            {"linux-debug": {"linux"}},
+        ),
+        (
+            ["tag"],
+            {"compile_flags": "-O0"},
+            None,
+            {v: {"compile", "lint"} for v in ("linux", "linux-debug", "windows")},
+            {},
+        ),
+        # Tasks listed with different task entries run on both build variants
+        (
+            ["tag"],
+            None,
+            {"name": "lint", "distros": ["ubuntu-large"]},
+            {"linux": {"compile", "lint"}, "linux-debug": {"lint"}, "windows": {"compile", "lint"}},
+            {},
+        ),
+    ],
+)
+def test_select_should_run_changed_tasks_on_representative_variants(
+    ignored_expansions, expansions, lint_entry, variant_tasks, represented_variants
+):
+    states = EvgConfigStates.create(
+        build_variants_config("echo original", expansions, lint_entry),
+        build_variants_config("echo patched", expansions, lint_entry),
+    )
+    selection = under_test.TaskSelectionService(
+        minimize_variants=True, ignored_expansions=ignored_expansions
+    )
+
+    selected = selection.select(states, find_evg_config_changes(states))
+
+    assert selected.variant_tasks == variant_tasks
+    assert selected.direct_variant_tasks == variant_tasks
+    assert selected.represented_variants == represented_variants
+    assert selected.get_cross_product() == (variant_tasks.keys(), {"compile", "lint"})
@@ -0,0 +1,103 @@
+import pytest
+
+import evg_config_changes_verifier.batch_orchestrator as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+
+
+def evergreen_yml(script: str) -> str:
+    return f"""
+tasks:
+  - name: lint
+    commands:
+      - command: shell.exec
+        params:
+          script: {script}
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: lint
+"""
+
+
+@pytest.fixture()
+def batch_orchestrator(git_repo):
+    git_cli_proxy = GitCliProxy.create()
+    evg_config_service = EvgConfigService(
+        git_cli_proxy=git_cli_proxy,
+        evg_cli_proxy=NativeEvgEvaluator(git_cli_proxy),
+        evg_include_service=EvgIncludeService(git_cli_proxy),
+        evg_config_cache=EvgConfigCache(None),
+    )
+    return under_test.BatchVerificationOrchestrator(
+        evg_config_service=evg_config_service,
+        git_cli_proxy=git_cli_proxy,
+        task_selection_service=TaskSelectionService.create(),
+    )
+
+
+def test_get_commit_range_changes_should_skip_the_root_commit(commit_files, batch_orchestrator):
+    commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh")})
+    unchanged = commit_files({"README.md": "readme\n"})
+    changed = commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh --strict")})
+
+    steps = batch_orchestrator.get_commit_range_changes("etc/evergreen.yml", "HEAD")
+
+    assert [step.head_revision for step in steps] == [unchanged, changed]
+    assert not steps[0].changes.tasks_and_groups
+    assert steps[1].changes.tasks_and_groups == {"lint"}
+    assert steps[1].changes.variants == {"linux"}
+
+
+def test_get_commit_range_changes_should_be_empty_for_only_the_root_commit(
+    commit_files, batch_orchestrator
+):
+    commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh")})
+
+    assert batch_orchestrator.get_commit_range_changes("etc/evergreen.yml", "HEAD") == []
+
+
+def commit_changes(commit_files):
+    commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh")})
+    commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh --strict")})
+    commit_files({"etc/evergreen.yml": evergreen_yml("./lint.sh --fix")})
+
+
+def test_get_commit_range_changes_should_not_fork_when_workers_cannot_be_forked(
+    commit_files, batch_orchestrator, monkeypatch
+):
+    commit_changes(commit_files)
+    sizes = []
+
+    def get_shard_workers(size):
+        sizes.append(size)
+        return 1
+
+    def process_pool_executor(*args, **kwargs):
+        raise AssertionError("Forked worker processes.")
+
+    monkeypatch.setattr(under_test, "get_shard_workers", get_shard_workers)
+    monkeypatch.setattr(under_test, "ProcessPoolExecutor", process_pool_executor)
+
+    steps = batch_orchestrator.get_commit_range_changes("etc/evergreen.yml", "HEAD~2..HEAD")
+
+    # Every patched configuration has a task and a build variant task
+    assert sizes == [4]
+    assert [step.changes.tasks_and_groups for step in steps] == [{"lint"}, {"lint"}]
+
+
+def test_get_commit_range_changes_should_find_the_same_changes_in_worker_processes(
+    commit_files, batch_orchestrator, monkeypatch
+):
+    commit_changes(commit_files)
+    sequential = batch_orchestrator.get_commit_range_changes("etc/evergreen.yml", "HEAD~2..HEAD")
+
+    monkeypatch.setattr(under_test, "get_shard_workers", lambda size: 4)
+    forked = batch_orchestrator.get_commit_range_changes("etc/evergreen.yml", "HEAD~2..HEAD")
+
+    assert [step.as_dict() for step in forked] == [step.as_dict() for step in sequential]
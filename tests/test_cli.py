@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import click
+import pytest
+from click.testing import CliRunner
+
+import evg_config_changes_verifier.cli as under_test
+from evg_config_changes_verifier.daemon_client import default_socket_path
+
+
+def test_get_daemon_socket_should_be_the_same_in_every_directory_of_repository(
+    git_repo, monkeypatch
+):
+    (git_repo / "etc" / "components").mkdir(parents=True)
+    root_socket = under_test.get_daemon_socket(None)
+
+    monkeypatch.chdir(git_repo / "etc" / "components")
+
+    assert under_test.get_daemon_socket(None) == root_socket
+    assert root_socket == default_socket_path(git_repo)
+
+
+def test_get_daemon_socket_should_use_given_location(git_repo):
+    assert under_test.get_daemon_socket(Path("/tmp/daemon.sock")) == Path("/tmp/daemon.sock")
+
+
+def test_default_socket_path_should_differ_between_repositories(tmp_path):
+    assert default_socket_path(tmp_path / "repo") != default_socket_path(tmp_path / "other")
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["batch", "--help"],
+        ["snapshot", "--help"],
+        ["history", "--help"],
+        ["history", "index", "--help"],
+        ["daemon", "--help"],
+    ],
+)
+def test_subcommand_help_should_not_need_project_configuration(tmp_path, monkeypatch, args):
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(under_test.main, args)
+
+    assert result.exit_code == 0, result.output
+    assert "Usage:" in result.output
+
+
+def test_subcommand_should_fail_on_missing_project_configuration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(under_test.main, ["snapshot", "--output", "snapshots"])
+
+    assert result.exit_code == 2
+    assert "File 'etc/evergreen.yml' does not exist." in result.output
+
+
+def test_subcommand_should_fail_on_budget_without_task_durations(git_repo, commit_files):
+    commit_files({"etc/evergreen.yml": "tasks: []\n"})
+
+    result = CliRunner().invoke(under_test.main, ["--budget", "10", "batch", "--ref", "HEAD"])
+
+    assert result.exit_code == 2
+    assert "--budget requires --task-durations." in result.output
+
+
+def test_resolve_evg_project_configs_should_expand_patterns_without_duplicates(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    for path in ("etc/evergreen.yml", "etc/projects/b.yml", "etc/projects/a.yml"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("tasks: []\n")
+
+    evg_project_configs = under_test.resolve_evg_project_configs(
+        ("etc/projects/b.yml", "etc/**/*.yml", "etc/evergreen.yml")
+    )
+
+    assert evg_project_configs == [
+        Path("etc/projects/b.yml"),
+        Path("etc/evergreen.yml"),
+        Path("etc/projects/a.yml"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, message",
+    [
+        ("etc/missing.yml", "File 'etc/missing.yml' does not exist."),
+        ("etc/*.json", "No files match"),
+    ],
+)
+def test_resolve_evg_project_configs_should_reject_missing_files(
+    tmp_path, monkeypatch, pattern, message
+):
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(click.BadParameter, match=message):
+        under_test.resolve_evg_project_configs((pattern,))
@@ -0,0 +1,124 @@
+from pathlib import Path
+
+import pytest
+
+import evg_config_changes_verifier.history_orchestrator as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.services.history_index import HistoryIndexError
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+
+
+def evergreen_yml(build_script: str, lint_script: str) -> str:
+    return f"""
+functions:
+  build:
+    - command: shell.exec
+      params:
+        script: {build_script}
+tasks:
+  - name: compile
+    commands:
+      - func: build
+  - name: lint
+    commands:
+      - command: shell.exec
+        params:
+          script: {lint_script}
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: compile
+      - name: lint
+"""
+
+
+@pytest.fixture()
+def history_orchestrator(git_repo):
+    git_cli_proxy = GitCliProxy.create()
+    evg_config_service = EvgConfigService(
+        git_cli_proxy=git_cli_proxy,
+        evg_cli_proxy=NativeEvgEvaluator(git_cli_proxy),
+        evg_include_service=EvgIncludeService(git_cli_proxy),
+        evg_config_cache=EvgConfigCache(None),
+    )
+    return under_test.HistoryOrchestrator(
+        evg_config_service=evg_config_service,
+        git_cli_proxy=git_cli_proxy,
+        task_selection_service=TaskSelectionService.create(),
+    )
+
+
+@pytest.fixture()
+def history_index(tmp_path, history_orchestrator):
+    history_index = history_orchestrator.open_index(
+        Path("evergreen.yml"), tmp_path / "index.sqlite", tmp_path / "cache"
+    )
+    yield history_index
+    history_index.close()
+
+
+@pytest.fixture()
+def commits(commit_files):
+    """Commits changing the lint task, then the build function across an unevaluable commit."""
+    return [
+        commit_files({"evergreen.yml": evergreen_yml("make", "./lint.sh")}),
+        commit_files({"README.md": "readme\n"}),
+        commit_files({"evergreen.yml": evergreen_yml("make", "./lint.sh --strict")}),
+        commit_files({"evergreen.yml": "tasks: [\n"}),
+        commit_files({"evergreen.yml": evergreen_yml("make -j8", "./lint.sh --strict")}),
+    ]
+
+
+def test_update_index_should_index_unevaluable_commits(
+    commits, history_orchestrator, history_index
+):
+    assert history_orchestrator.update_index(history_index, Path("evergreen.yml"), "master") == 5
+
+    assert history_index.tip == commits[-1]
+    assert [history_index.is_evaluated(position) for position in range(5)] == [
+        True,
+        True,
+        True,
+        False,
+        True,
+    ]
+    with pytest.raises(HistoryIndexError):
+        history_orchestrator.get_range_changes(history_index, commits[0], commits[3])
+
+
+def test_update_index_should_index_new_commits_only(
+    commits, commit_files, history_orchestrator, history_index
+):
+    history_orchestrator.update_index(history_index, Path("evergreen.yml"), "master")
+    commit_files({"README.md": "readme again\n"})
+
+    assert history_orchestrator.update_index(history_index, Path("evergreen.yml"), "master") == 1
+    assert history_index.size == 6
+
+
+@pytest.mark.parametrize(
+    "name, changed_at",
+    [("lint", 2), ("compile", 4), ("build", 4), ("linux", 2)],
+)
+def test_find_first_change_should_find_the_changing_commit(
+    commits, history_orchestrator, history_index, name, changed_at
+):
+    history_orchestrator.update_index(history_index, Path("evergreen.yml"), "master")
+
+    assert (
+        history_orchestrator.find_first_change(history_index, name, commits[0], commits[-1])
+        == commits[changed_at]
+    )
+
+
+def test_find_first_change_should_be_none_for_unchanged_entity(
+    commits, history_orchestrator, history_index
+):
+    history_orchestrator.update_index(history_index, Path("evergreen.yml"), "master")
+
+    assert history_orchestrator.find_first_change(history_index, "lint", commits[2], "HEAD") is None
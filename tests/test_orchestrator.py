@@ -0,0 +1,198 @@
+import copy
+from pathlib import Path
+
+import pytest
+import yaml
+
+import evg_config_changes_verifier.orchestrator as under_test
+from evg_config_changes_verifier.clients.git_cli_proxy import GitCliProxy
+from evg_config_changes_verifier.clients.native_evg_evaluator import NativeEvgEvaluator
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.services.evg_config_cache import EvgConfigCache
+from evg_config_changes_verifier.services.evg_config_service import EvgConfigService
+from evg_config_changes_verifier.services.evg_include_service import EvgIncludeService
+from evg_config_changes_verifier.services.task_selection_service import TaskSelectionService
+from tests.git_repo import write_files
+
+ORIGINAL = yaml.safe_load(
+    """
+tasks:
+  - name: compile
+    commands: [{command: shell.exec, params: {script: make}}]
+  - name: lint
+    commands: [{command: shell.exec, params: {script: ./lint.sh}}]
+  - name: unit
+    commands: [{command: shell.exec, params: {script: ./unit.sh}}]
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks: [{name: compile}, {name: lint}, {name: unit}]
+  - name: windows
+    run_on: [windows]
+    tasks: [{name: compile}, {name: unit}]
+  - name: macos
+    run_on: [macos]
+    tasks: [{name: compile}, {name: lint}]
+"""
+)
+
+
+def change_lint_task(config):
+    config["tasks"][1]["commands"][0]["params"]["script"] = "./lint.sh --strict"
+
+
+def change_windows_distros(config):
+    config["buildvariants"][1]["run_on"] = ["windows-2022"]
+
+
+def change_windows_unit_entry(config):
+    config["buildvariants"][1]["tasks"][1]["distros"] = ["windows-large"]
+
+
+def add_windows_display_task(config):
+    config["buildvariants"][1]["display_tasks"] = [{"name": "tests", "execution_tasks": ["unit"]}]
+
+
+def find_changes(*patches):
+    patched = copy.deepcopy(ORIGINAL)
+    for patch in patches:
+        patch(patched)
+    return under_test.find_evg_config_changes(
+        EvgConfigStates.create(
+            CompactEvgConfig.from_dict(ORIGINAL), CompactEvgConfig.from_dict(patched)
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "patch, variant_tasks, direct_variant_tasks",
+    [
+        # A changed task runs on every build variant listing it
+        (
+            change_lint_task,
+            {"linux": {"lint"}, "macos": {"lint"}},
+            {"linux": {"lint"}, "macos": {"lint"}},
+        ),
+        # A build variant with changed distros runs all the tasks it lists
+        (change_windows_distros, {"windows": {"compile", "unit"}}, {}),
+        # Changed task entries and display tasks run only on their build variant
+        (change_windows_unit_entry, {"windows": {"unit"}}, {"windows": {"unit"}}),
+        (add_windows_display_task, {"windows": {"unit"}}, {"windows": {"unit"}}),
+    ],
+)
+def test_find_evg_config_changes_should_find_changed_pairs(
+    patch, variant_tasks, direct_variant_tasks
+):
+    changes = find_changes(patch)
+
+    assert changes.variant_tasks == variant_tasks
+    assert changes.direct_variant_tasks == direct_variant_tasks
+    assert changes.variants == variant_tasks.keys()
+    assert changes.tasks_and_groups == set().union(*variant_tasks.values())
+
+
+def test_find_evg_config_changes_should_count_runs_of_the_cross_product():
+    changes = find_changes(change_lint_task, change_windows_distros)
+
+    assert changes.variant_tasks == {
+        "linux": {"lint"},
+        "macos": {"lint"},
+        "windows": {"compile", "unit"},
+    }
+    assert changes.get_pair_runs() == 4
+    # Every changed task the changed build variants list runs on them
+    assert changes.cross_product_runs == 7
+
+
+def project_yml(task, script_file):
+    return f"""
+include:
+  - filename: etc/functions.yml
+tasks:
+  - name: {task}
+    commands:
+      - func: build
+      - command: shell.exec
+        params:
+          script: ./{script_file}
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: {task}
+"""
+
+
+def functions_yml(script):
+    return f"""
+functions:
+  build:
+    - command: shell.exec
+      params:
+        script: {script}
+"""
+
+
+@pytest.fixture()
+def verification_orchestrator(git_repo, commit_files):
+    commit_files(
+        {
+            "etc/server.yml": project_yml("server", "server.sh"),
+            "etc/client.yml": project_yml("client", "client.sh"),
+            "etc/functions.yml": functions_yml("make"),
+        }
+    )
+    git_cli_proxy = GitCliProxy.create()
+    evg_config_service = EvgConfigService(
+        git_cli_proxy=git_cli_proxy,
+        evg_cli_proxy=NativeEvgEvaluator(git_cli_proxy),
+        evg_include_service=EvgIncludeService(git_cli_proxy),
+        evg_config_cache=EvgConfigCache(None),
+    )
+    return under_test.VerificationOrchestrator(
+        evg_config_service=evg_config_service,
+        task_selection_service=TaskSelectionService.create(),
+    )
+
+
+PROJECTS = [Path("etc/server.yml"), Path("etc/client.yml")]
+
+
+@pytest.mark.parametrize("use_worktree", [False, True])
+def test_get_evg_config_changes_by_project_should_find_changes_of_shared_files(
+    git_repo, verification_orchestrator, use_worktree
+):
+    write_files(git_repo, {"etc/functions.yml": functions_yml("make -j8")})
+
+    changes_by_project = verification_orchestrator.get_evg_config_changes_by_project(
+        PROJECTS, "master", use_worktree=use_worktree
+    )
+
+    assert list(changes_by_project) == PROJECTS
+    assert changes_by_project[Path("etc/server.yml")].variant_tasks == {"linux": {"server"}}
+    assert changes_by_project[Path("etc/client.yml")].variant_tasks == {"linux": {"client"}}
+
+
+def test_get_evg_config_changes_by_project_should_skip_unchanged_projects(
+    git_repo, verification_orchestrator, monkeypatch
+):
+    write_files(git_repo, {"etc/client.yml": project_yml("client", "client.sh --verbose")})
+    evaluated = []
+    evg_cli_proxy = verification_orchestrator.evg_config_service.evg_cli_proxy
+    evaluate_configs = evg_cli_proxy.evaluate_configs
+
+    def record_evaluations(locations):
+        evaluated.extend(Path(location).name for location, _ in locations)
+        return evaluate_configs(locations)
+
+    monkeypatch.setattr(evg_cli_proxy, "evaluate_configs", record_evaluations)
+
+    changes_by_project = verification_orchestrator.get_evg_config_changes_by_project(
+        PROJECTS, "master"
+    )
+
+    assert changes_by_project[Path("etc/server.yml")] == EvgConfigChanges.create_empty()
+    assert changes_by_project[Path("etc/client.yml")].variant_tasks == {"linux": {"client"}}
+    # The original and the patched states of the changed project only
+    assert evaluated == ["client.yml", "client.yml"]
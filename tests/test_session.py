@@ -0,0 +1,167 @@
+import pytest
+
+import evg_config_changes_verifier.session as under_test
+from evg_config_changes_verifier.models.change_reasons import (
+    CALLS_CHANGED_FUNCTIONS,
+    DEFINITION_CHANGED,
+    RUNS_ON_CHANGED_VARIANTS,
+    ChangeReason,
+)
+from tests.git_repo import write_files
+
+EVERGREEN_YML = """
+include:
+  - filename: etc/functions.yml
+
+tasks:
+  - name: compile
+    commands:
+      - func: build
+  - name: lint
+    commands:
+      - command: shell.exec
+        params:
+          script: ./lint.sh
+
+buildvariants:
+  - name: linux
+    run_on: [ubuntu]
+    tasks:
+      - name: compile
+      - name: lint
+  - name: windows
+    run_on: [windows]
+    tasks:
+      - name: lint
+"""
+
+
+def functions_yml(script: str) -> str:
+    return f"""
+functions:
+  build:
+    - command: shell.exec
+      params:
+        script: {script}
+"""
+
+
+@pytest.fixture()
+def base_revision(commit_files):
+    return commit_files(
+        {"etc/evergreen.yml": EVERGREEN_YML, "etc/functions.yml": functions_yml("make")}
+    )
+
+
+@pytest.fixture()
+def session():
+    with under_test.VerifierSession.create(native_evaluator=True, cache_dir=None) as session:
+        yield session
+
+
+@pytest.fixture()
+def evaluations(session, monkeypatch):
+    """Number of configuration states the session evaluated."""
+    evaluated = []
+    evaluate_closures = session.evg_config_service.evaluate_closures
+
+    def count_evaluations(evg_project_yaml, closures):
+        evaluated.extend(closures)
+        return evaluate_closures(evg_project_yaml, closures)
+
+    monkeypatch.setattr(session.evg_config_service, "evaluate_closures", count_evaluations)
+    return evaluated
+
+
+def test_verify_should_find_changes_between_explicit_revisions(
+    base_revision, commit_files, session
+):
+    head_revision = commit_files({"etc/functions.yml": functions_yml("make -j8")})
+
+    result = session.verify(
+        "etc/evergreen.yml", base_revision=base_revision, head_revision=head_revision
+    )
+
+    assert result.base_revision == base_revision
+    assert result.head_revision == head_revision
+    assert result.changes.functions == {"build"}
+    assert result.changes.tasks_and_groups == {"compile"}
+    assert result.changes.variants == {"linux"}
+    assert result.changes.variant_tasks == {"linux": {"compile"}}
+    assert result.get_reasons("functions", "build") == (ChangeReason(DEFINITION_CHANGED),)
+    assert result.get_reasons("tasks_and_groups", "compile") == (
+        ChangeReason.create(CALLS_CHANGED_FUNCTIONS, ["build"]),
+    )
+    assert result.get_reasons("tasks_and_groups", "lint") == ()
+    assert result.as_dict()["reasons"]["variants"]["linux"] == [
+        {"code": "lists_changed_tasks", "related": ["compile"]}
+    ]
+
+
+def test_verify_should_find_changes_of_overridden_files(base_revision, session):
+    result = session.verify(
+        "etc/evergreen.yml",
+        base_revision=base_revision,
+        overrides={
+            "etc/evergreen.yml": EVERGREEN_YML.replace("run_on: [windows]", "run_on: [win11]")
+        },
+    )
+
+    assert result.head_revision is None
+    assert result.changes.variants == {"windows"}
+    assert result.changes.tasks_and_groups == {"lint"}
+    assert result.get_reasons("tasks_and_groups", "lint") == (
+        ChangeReason.create(RUNS_ON_CHANGED_VARIANTS, ["windows"]),
+    )
+
+
+def test_verify_should_compare_working_tree_with_merge_base(base_revision, git_repo, session):
+    write_files(git_repo, {"etc/functions.yml": functions_yml("make -j8")})
+
+    result = session.verify("etc/evergreen.yml", target_branch="master")
+
+    assert result.base_revision == base_revision
+    assert result.changes.tasks_and_groups == {"compile"}
+
+
+def test_verify_should_reuse_evaluated_states(base_revision, commit_files, session, evaluations):
+    head_revision = commit_files({"etc/functions.yml": functions_yml("make -j8")})
+
+    first = session.verify("etc/evergreen.yml", base_revision=base_revision, head_revision="HEAD")
+    assert len(evaluations) == 2
+
+    again = session.verify(
+        "etc/evergreen.yml", base_revision=base_revision, head_revision=head_revision
+    )
+    assert len(evaluations) == 2
+    assert again.changes is first.changes
+
+    unchanged = session.verify(
+        "etc/evergreen.yml", base_revision=base_revision, head_revision=base_revision
+    )
+    assert len(evaluations) == 2
+    assert not unchanged.changes.tasks_and_groups
+
+    session.verify(
+        "etc/evergreen.yml",
+        base_revision=base_revision,
+        overrides={"etc/functions.yml": functions_yml("make -j16")},
+    )
+    assert len(evaluations) == 3
+
+    session.clear()
+    session.verify("etc/evergreen.yml", base_revision=base_revision, head_revision=head_revision)
+    assert len(evaluations) == 5
+
+
+def test_verify_should_reject_overrides_of_unresolved_includes(base_revision, session):
+    with pytest.raises(under_test.VerifierSessionError):
+        session.verify(
+            "etc/evergreen.yml",
+            base_revision=base_revision,
+            overrides={
+                "etc/evergreen.yml": EVERGREEN_YML.replace(
+                    "filename: etc/functions.yml", "filename: etc/missing.yml"
+                )
+            },
+        )
@@ -0,0 +1,65 @@
+from evg_config_changes_verifier.models.change_reasons import (
+    DISPLAY_TASKS_CHANGED,
+    RUNS_ON_CHANGED_VARIANTS,
+    ChangeReason,
+)
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.display_tasks_check import (
+    DisplayTasksCheck as under_test,
+)
+
+
+def build_variant(name, display_tasks):
+    return {
+        "name": name,
+        "run_on": ["ubuntu"],
+        "tasks": [{"name": f"t{i}"} for i in range(4)],
+        "display_tasks": [
+            {"name": display_name, "execution_tasks": execution_tasks}
+            for display_name, execution_tasks in display_tasks.items()
+        ],
+    }
+
+
+def build_config(*variants):
+    return CompactEvgConfig.from_dict(
+        {
+            "tasks": [{"name": f"t{i}", "commands": []} for i in range(4)],
+            "buildvariants": list(variants),
+        }
+    )
+
+
+def test_check_should_find_execution_tasks_of_changed_display_tasks():
+    states = EvgConfigStates.create(
+        build_config(build_variant("linux", {"unit": ["t0"], "lint": ["t3"]})),
+        build_config(build_variant("linux", {"unit": ["t0", "t1"], "all": ["t2"], "lint": ["t3"]})),
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.variants == {"linux"}
+    assert changes.tasks_and_groups == {"t0", "t1", "t2"}
+    assert changes.variant_tasks == {"linux": {"t0", "t1", "t2"}}
+    assert changes.direct_variant_tasks == {"linux": {"t0", "t1", "t2"}}
+    reasons = changes.get_reasons()
+    assert reasons["variants"] == {
+        "linux": (ChangeReason.create(DISPLAY_TASKS_CHANGED, ["all", "unit"]),)
+    }
+    assert reasons["tasks_and_groups"]["t2"] == (
+        ChangeReason.create(RUNS_ON_CHANGED_VARIANTS, ["linux"]),
+    )
+
+
+def test_check_should_skip_new_variants():
+    states = EvgConfigStates.create(
+        build_config(), build_config(build_variant("linux", {"unit": ["t0"]}))
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.variants == set()
+    assert changes.variant_tasks == {}
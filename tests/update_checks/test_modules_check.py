@@ -0,0 +1,32 @@
+from evg_config_changes_verifier.models.change_reasons import DEFINITION_CHANGED, NEW, ChangeReason
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.modules_check import ModulesCheck as under_test
+
+
+def build_config(modules):
+    return CompactEvgConfig.from_dict(
+        {
+            "modules": [
+                {"name": name, "repo": f"git@github.com:org/{name}.git", "branch": branch}
+                for name, branch in modules.items()
+            ]
+        }
+    )
+
+
+def test_check_should_find_new_and_changed_modules():
+    states = EvgConfigStates.create(
+        build_config({"unchanged": "master", "changed": "master", "removed": "master"}),
+        build_config({"unchanged": "master", "changed": "v7.0", "new": "master"}),
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    # Build variants cannot check out removed modules, those are found by the variants check
+    assert changes.modules == {"changed", "new"}
+    assert changes.get_reasons()["modules"] == {
+        "changed": (ChangeReason(DEFINITION_CHANGED),),
+        "new": (ChangeReason(NEW),),
+    }
@@ -0,0 +1,41 @@
+from evg_config_changes_verifier.models.change_reasons import (
+    DEFINITION_CHANGED,
+    NEW,
+    REMOVED,
+    ChangeReason,
+)
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.parameters_check import ParametersCheck as under_test
+
+
+def build_config(parameters):
+    return CompactEvgConfig.from_dict(
+        {"parameters": [{"key": key, "value": value} for key, value in parameters.items()]}
+    )
+
+
+def test_check_should_find_new_removed_and_changed_parameters():
+    states = EvgConfigStates.create(
+        build_config({"unchanged": "1", "changed": "1", "removed": "1"}),
+        build_config({"unchanged": "1", "changed": "2", "new": "1"}),
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.parameters == {"changed", "removed", "new"}
+    assert changes.get_reasons()["parameters"] == {
+        "changed": (ChangeReason(DEFINITION_CHANGED),),
+        "new": (ChangeReason(NEW),),
+        "removed": (ChangeReason(REMOVED),),
+    }
+
+
+def test_check_should_not_find_unchanged_parameters():
+    states = EvgConfigStates.create(build_config({"a": "1"}), build_config({"a": "1"}))
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.parameters == set()
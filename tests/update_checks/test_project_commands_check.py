@@ -0,0 +1,61 @@
+from evg_config_changes_verifier.models.change_reasons import (
+    CALLS_CHANGED_FUNCTIONS,
+    DEFINITION_CHANGED,
+    ChangeReason,
+)
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.project_commands_check import (
+    ProjectCommandsCheck as under_test,
+)
+
+
+def build_config(pre_script: str) -> CompactEvgConfig:
+    return CompactEvgConfig.from_dict(
+        {
+            "pre": [{"command": "shell.exec", "params": {"script": pre_script}}],
+            "post": [{"func": "cleanup"}],
+            "timeout": [{"command": "shell.exec", "params": {"script": "./timeout.sh"}}],
+            "functions": {"cleanup": [{"command": "shell.exec"}]},
+        }
+    )
+
+
+def run_check(states, changed_functions=()):
+    changes = EvgConfigChanges.create_empty()
+    changes.functions.update(changed_functions)
+    under_test().check(states, changes)
+    return changes
+
+
+def test_check_should_find_changed_blocks():
+    states = EvgConfigStates.create(build_config("./setup.sh"), build_config("./setup.sh -v"))
+
+    changes = run_check(states)
+
+    assert changes.project_commands == {"pre"}
+    assert changes.get_reasons()["project_commands"] == {"pre": (ChangeReason(DEFINITION_CHANGED),)}
+
+
+def test_check_should_find_blocks_calling_changed_functions():
+    states = EvgConfigStates.create(build_config("./setup.sh"), build_config("./setup.sh"))
+
+    changes = run_check(states, changed_functions={"cleanup", "other"})
+
+    assert changes.project_commands == {"post"}
+    assert changes.get_reasons()["project_commands"] == {
+        "post": (ChangeReason.create(CALLS_CHANGED_FUNCTIONS, ["cleanup"]),)
+    }
+
+
+def test_check_should_find_removed_blocks():
+    patched = CompactEvgConfig.from_dict({"functions": {"cleanup": [{"command": "shell.exec"}]}})
+    states = EvgConfigStates.create(build_config("./setup.sh"), patched)
+
+    assert run_check(states).project_commands == {"pre", "post", "timeout"}
+
+
+def test_check_should_not_find_unchanged_blocks():
+    states = EvgConfigStates.create(build_config("./setup.sh"), build_config("./setup.sh"))
+
+    assert run_check(states).project_commands == set()
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from evg_config_changes_verifier.models.change_reasons import CALLS_CHANGED_FUNCTIONS
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.base_check import UpdatesCheck
+from evg_config_changes_verifier.update_checks.scheduler import UpdatesCheckScheduler as under_test
+from evg_config_changes_verifier.utils.profiler import PROFILER
+
+
+class FakeCheck(UpdatesCheck):
+    """Check adding its name to the changed functions and recording what it read."""
+
+    def __init__(self):
+        self.read = None
+        self.thread = None
+
+    def check(self, evg_config_states, evg_config_changes):
+        self.read = set(evg_config_changes.functions)
+        self.thread = threading.current_thread()
+        evg_config_changes.functions.add(self.name)
+
+
+class Functions(FakeCheck):
+    produces = frozenset({"functions"})
+
+
+class Parameters(FakeCheck):
+    produces = frozenset({"parameters"})
+
+
+class Tasks(FakeCheck):
+    reads = frozenset({"functions", "parameters"})
+    produces = frozenset({"tasks"})
+    exclusive = True
+
+
+class Variants(FakeCheck):
+    reads = frozenset({"tasks"})
+    produces = frozenset({"variants"})
+
+
+@pytest.fixture()
+def states():
+    return EvgConfigStates.create(CompactEvgConfig.from_dict({}), CompactEvgConfig.from_dict({}))
+
+
+@pytest.fixture()
+def profiler(monkeypatch):
+    monkeypatch.setattr(PROFILER, "enabled", True)
+    monkeypatch.setattr(PROFILER, "records", [])
+    return PROFILER
+
+
+def test_ordered_checks_should_come_after_their_dependencies():
+    scheduler = under_test([Variants(), Tasks(), Parameters(), Functions()])
+
+    assert [check.name for check in scheduler.ordered_checks] == [
+        "Parameters",
+        "Functions",
+        "Tasks",
+        "Variants",
+    ]
+    assert scheduler.dependencies == {
+        "Functions": set(),
+        "Parameters": set(),
+        "Tasks": {"Functions", "Parameters"},
+        "Variants": {"Tasks"},
+    }
+
+
+def test_registered_checks_should_come_after_their_dependencies():
+    scheduler = under_test.create()
+
+    names = [check.name for check in scheduler.ordered_checks]
+    for name, dependencies in scheduler.dependencies.items():
+        assert all(names.index(dependency) < names.index(name) for dependency in dependencies)
+    assert scheduler.dependencies["TasksCheck"] == {
+        "FunctionsCheck",
+        "ParametersCheck",
+        "ProjectCommandsCheck",
+    }
+
+
+def test_create_should_fail_on_checks_depending_on_each_other():
+    class Cyclic(FakeCheck):
+        reads = frozenset({"variants"})
+        produces = frozenset({"functions"})
+
+    with pytest.raises(ValueError, match="depend on each other"):
+        under_test([Cyclic(), Parameters(), Tasks(), Variants()])
+
+
+def test_create_should_fail_on_change_sets_no_check_produces():
+    with pytest.raises(ValueError, match=r"No update check produces \['functions'\] read by Tasks"):
+        under_test([Parameters(), Tasks()])
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_run_should_pass_every_check_the_changes_of_its_dependencies(states, max_workers):
+    functions, parameters, tasks, variants = Functions(), Parameters(), Tasks(), Variants()
+    scheduler = under_test([variants, tasks, parameters, functions], max_workers)
+
+    changes = scheduler.run(states)
+
+    assert changes.functions == {"Functions", "Parameters", "Tasks", "Variants"}
+    assert functions.read == set()
+    assert tasks.read == {"Functions", "Parameters"}
+    assert variants.read == {"Functions", "Parameters", "Tasks"}
+    assert tasks.thread is threading.current_thread()
+
+
+def test_run_should_profile_only_the_changes_every_check_finds(states, profiler):
+    scheduler = under_test([Functions(), Parameters(), Tasks(), Variants()], max_workers=1)
+
+    scheduler.run(states)
+
+    args = {record.name: record.args for record in profiler.records}
+    assert args["Tasks"] == {"functions": 1, "tasks_and_groups": 0, "variants": 0}
+    assert args["Variants"] == {"functions": 1, "tasks_and_groups": 0, "variants": 0}
+
+
+def test_run_should_merge_the_changes_of_all_checks(states):
+    class ChangedTask(FakeCheck):
+        reads = frozenset({"functions"})
+        produces = frozenset({"tasks"})
+
+        def check(self, evg_config_states, evg_config_changes: EvgConfigChanges):
+            evg_config_changes.tasks_and_groups.add("t1")
+            evg_config_changes.add_reason("tasks_and_groups", "t1", CALLS_CHANGED_FUNCTIONS)
+
+    changes = under_test([Functions(), ChangedTask()], max_workers=2).run(states)
+
+    assert changes.functions == {"Functions"}
+    assert changes.tasks_and_groups == {"t1"}
+    assert changes.get_reasons()["tasks_and_groups"]["t1"][0].code == CALLS_CHANGED_FUNCTIONS
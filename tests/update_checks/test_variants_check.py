@@ -0,0 +1,103 @@
+import pytest
+
+from evg_config_changes_verifier.models.change_reasons import (
+    EXPANSIONS_CHANGED,
+    RUN_ON_CHANGED,
+    RUNS_ON_CHANGED_VARIANTS,
+    ChangeReason,
+)
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigChanges, EvgConfigStates
+from evg_config_changes_verifier.update_checks.variants_check import VariantsCheck as under_test
+
+
+def shell(script, **params):
+    return {"command": "shell.exec", "params": {"script": script, **params}}
+
+
+def build_config(expansions, run_on="ubuntu"):
+    return CompactEvgConfig.from_dict(
+        {
+            "pre": [shell("./setup.sh ${workdir}")],
+            "functions": {"build": [shell("make ${compile_flags}")]},
+            "tasks": [
+                {"name": "compile", "commands": [{"func": "build"}]},
+                {"name": "lint", "commands": [shell("./lint.sh ${lint_flags|*default_flags}")]},
+                {"name": "env", "commands": [shell("./env.sh", add_expansions_to_env=True)]},
+                {"name": "grouped", "commands": [shell("./test.sh ${test_flags}")]},
+            ],
+            "task_groups": [{"name": "tests", "tasks": ["grouped"]}],
+            "buildvariants": [
+                {
+                    "name": "linux",
+                    "run_on": [run_on],
+                    "expansions": expansions,
+                    "tasks": [{"name": name} for name in ("compile", "lint", "env", "tests")],
+                }
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "expansion, reading_tasks",
+    [
+        # Read by a called function
+        ("compile_flags", {"compile", "env"}),
+        # Read directly and as a default value of another expansion
+        ("lint_flags", {"lint", "env"}),
+        ("default_flags", {"lint", "env"}),
+        # Read by a task of a task group
+        ("test_flags", {"tests", "env"}),
+        # Read by the project-level pre block that standalone tasks run
+        ("workdir", {"compile", "lint", "env"}),
+        # Read by no command but exposed to the environment of a script
+        ("unused", {"env"}),
+    ],
+)
+def test_check_should_find_tasks_reading_changed_expansions(expansion, reading_tasks):
+    states = EvgConfigStates.create(
+        build_config({expansion: "original", "other": "1"}),
+        build_config({expansion: "patched", "other": "1"}),
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.variants == {"linux"}
+    assert changes.tasks_and_groups == reading_tasks
+    assert changes.variant_tasks == {"linux": reading_tasks}
+    assert not changes.direct_variant_tasks
+    reasons = changes.get_reasons()
+    assert reasons["variants"] == {"linux": (ChangeReason.create(EXPANSIONS_CHANGED, [expansion]),)}
+    assert reasons["tasks_and_groups"] == {
+        task_name: (ChangeReason.create(RUNS_ON_CHANGED_VARIANTS, ["linux"]),)
+        for task_name in reading_tasks
+    }
+
+
+def test_check_should_find_tasks_reading_added_and_removed_expansions():
+    states = EvgConfigStates.create(
+        build_config({"compile_flags": "-O2"}), build_config({"lint_flags": "--strict"})
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.variant_tasks == {"linux": {"compile", "lint", "env"}}
+    assert changes.get_reasons()["variants"]["linux"] == (
+        ChangeReason.create(EXPANSIONS_CHANGED, ["compile_flags", "lint_flags"]),
+    )
+
+
+def test_check_should_run_all_tasks_of_variant_with_changed_distros():
+    states = EvgConfigStates.create(
+        build_config({"compile_flags": "-O2"}),
+        build_config({"compile_flags": "-O0"}, run_on="ubuntu-large"),
+    )
+    changes = EvgConfigChanges.create_empty()
+
+    under_test().check(states, changes)
+
+    assert changes.variant_tasks == {"linux": {"compile", "lint", "env", "tests"}}
+    assert changes.get_reasons()["variants"]["linux"] == (ChangeReason.create(RUN_ON_CHANGED),)
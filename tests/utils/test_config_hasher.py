@@ -0,0 +1,68 @@
+import hashlib
+
+import pytest
+
+import evg_config_changes_verifier.utils.config_hasher as under_test
+
+
+def digest(value):
+    return under_test.ConfigHasher().digest(value)
+
+
+def test_digest_should_not_depend_on_order_of_mapping_keys():
+    command = {"command": "shell.exec", "params": {"script": "make", "env": {"A": "1", "B": "2"}}}
+    reordered = {"params": {"env": {"B": "2", "A": "1"}, "script": "make"}, "command": "shell.exec"}
+
+    assert digest([command]) == digest([reordered])
+
+
+def test_digest_should_depend_on_order_of_sequence_items():
+    assert digest(["compile", "lint"]) != digest(["lint", "compile"])
+
+
+@pytest.mark.parametrize(
+    "value, other",
+    [
+        ("1", 1),
+        (1, True),
+        (None, "None"),
+        (["ab"], ["a", "b"]),
+        ({"a": "bc"}, {"ab": "c"}),
+        ({"a": ["b"]}, {"a": "b"}),
+        ([], {}),
+    ],
+)
+def test_digest_should_tell_apart_different_values(value, other):
+    assert digest(value) != digest(other)
+
+
+def test_digest_should_hash_shared_sub_trees_once(monkeypatch):
+    hashed = []
+    blake2b = hashlib.blake2b
+
+    def counting_blake2b(*args, **kwargs):
+        hashed.append(args[0])
+        return blake2b(*args, **kwargs)
+
+    monkeypatch.setattr(under_test.hashlib, "blake2b", counting_blake2b)
+    shared = {"script": "make", "env": {"A": "1"}}
+    hasher = under_test.ConfigHasher()
+
+    first = hasher.digest({"params": shared})
+    second = hasher.digest({"params": shared, "timeout": 60})
+
+    assert first != second
+    # The shared mapping and its env mapping are hashed once, the outer mappings once each
+    assert len(hashed) == 4
+
+
+def test_retain_should_keep_only_given_cached_digests():
+    kept, dropped = {"script": "make"}, {"script": "lint"}
+    hasher = under_test.ConfigHasher()
+    kept_digest = hasher.digest(kept)
+    hasher.digest(dropped)
+
+    hasher.retain([kept, {"never": "hashed"}])
+
+    assert set(hasher._digests) == {id(kept)}
+    assert hasher.digest(kept) == kept_digest
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+import evg_config_changes_verifier.utils.set_cover as under_test
+
+
+def naive_greedy_set_cover(universe, subsets):
+    uncovered = set(universe)
+    chosen = {}
+    while uncovered:
+        name = min(subsets, key=lambda name: (-len(subsets[name] & uncovered), name))
+        covered = subsets[name] & uncovered
+        if not covered:
+            break
+        chosen[name] = covered
+        uncovered -= covered
+    return chosen
+
+
+def test_greedy_set_cover_should_pick_subsets_covering_most_uncovered_elements_first():
+    subsets = {"a": {1, 2, 3, 4}, "b": {1, 2, 3, 5}, "c": {5, 6}}
+
+    chosen = under_test.greedy_set_cover({1, 2, 3, 4, 5, 6}, subsets)
+
+    assert chosen == {"a": {1, 2, 3, 4}, "c": {5, 6}}
+    assert list(chosen) == ["a", "c"]
+
+
+def test_greedy_set_cover_should_break_ties_by_name():
+    assert under_test.greedy_set_cover({1, 2}, {"b": {1, 2}, "a": {1, 2}}) == {"a": {1, 2}}
+
+
+def test_greedy_set_cover_should_leave_elements_no_subset_contains_uncovered():
+    assert under_test.greedy_set_cover({1, 2, 3}, {"a": {1}, "b": {2, 4}, "c": set()}) == {
+        "b": {2},
+        "a": {1},
+    }
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_set_cover_should_match_naive_greedy_choice(seed):
+    rng = random.Random(seed)
+    universe = set(range(30))
+    subsets = {f"s{i:02}": set(rng.sample(range(35), rng.randint(0, 12))) for i in range(15)}
+
+    assert under_test.greedy_set_cover(universe, subsets) == naive_greedy_set_cover(
+        universe, subsets
+    )
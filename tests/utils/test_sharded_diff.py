@@ -0,0 +1,98 @@
+import threading
+
+import evg_config_changes_verifier.utils.sharded_diff as under_test
+from evg_config_changes_verifier.models.compact_evg_config import CompactEvgConfig
+from evg_config_changes_verifier.models.evg_models import EvgConfigStates
+from evg_config_changes_verifier.update_checks.scheduler import UpdatesCheckScheduler
+
+
+def build_config(patched: bool) -> CompactEvgConfig:
+    def script(name: str, changed: bool) -> str:
+        return f"echo {name} {'patched' if patched and changed else 'original'}"
+
+    return CompactEvgConfig.from_dict(
+        {
+            "functions": {
+                f"f{i}": [{"command": "shell.exec", "params": {"script": script(f"f{i}", i == 3)}}]
+                for i in range(10)
+            },
+            "tasks": [
+                {
+                    "name": f"t{i}",
+                    "commands": [
+                        {"func": f"f{i % 10}"},
+                        {
+                            "command": "shell.exec",
+                            "params": {"script": script(f"t{i}", i % 7 == 0)},
+                        },
+                    ],
+                }
+                for i in range(50)
+            ],
+            "buildvariants": [
+                {
+                    "name": f"v{i}",
+                    "run_on": ["rhel" if patched and i == 5 else "ubuntu"],
+                    "expansions": {"flag": "on" if patched and i == 8 else "off"},
+                    "tasks": [{"name": f"t{j}"} for j in range(i, 50, 4)],
+                }
+                for i in range(20)
+            ],
+        }
+    )
+
+
+def get_shard_worker_threads():
+    workers = []
+    thread = threading.Thread(target=lambda: workers.append(under_test.get_shard_workers(10**9)))
+    thread.start()
+    thread.join()
+    return workers
+
+
+def test_map_shards_should_apply_function_to_every_name_in_worker_processes(monkeypatch):
+    monkeypatch.setattr(under_test, "get_shard_workers", lambda *args: 3)
+    names = [f"t{i}" for i in range(20)]
+
+    results = under_test.map_shards(lambda prefix, shard: [prefix + n for n in shard], "x", names)
+
+    assert len(results) == 3
+    assert sorted(name for shard in results for name in shard) == sorted("x" + n for n in names)
+
+
+def test_get_shard_workers_should_not_fork_outside_of_main_thread():
+    assert get_shard_worker_threads() == [1]
+
+
+def test_can_fork_workers_should_be_false_while_other_threads_run():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert not under_test.can_fork_workers()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert under_test.can_fork_workers()
+
+
+def test_sharded_checks_should_find_the_same_changes_as_sequential_ones(monkeypatch):
+    states = EvgConfigStates.create(build_config(False), build_config(True))
+    sequential = UpdatesCheckScheduler.create(max_workers=1).run(states)
+
+    can_fork = []
+
+    def get_shard_workers(*args):
+        can_fork.append(under_test.can_fork_workers())
+        return 3
+
+    monkeypatch.setattr(under_test, "get_shard_workers", get_shard_workers)
+    sharded = UpdatesCheckScheduler.create(max_workers=4).run(states)
+
+    assert sharded.as_dict() == sequential.as_dict()
+    assert sharded.get_reasons() == sequential.get_reasons()
+    # Sharded checks run alone on the main thread, so forking the workers cannot deadlock
+    assert can_fork == [True, True]
+    assert sequential.tasks_and_groups
+    assert sequential.variants